@@ -1,17 +1,72 @@
-import json
 import os
 
-import joblib
-import numpy as np
-import pandas as pd
-from google.adk.tools.mcp_tool.mcp_toolset import MCPToolset
-from google.adk.tools.mcp_tool.mcp_session_manager import StdioConnectionParams, StdioServerParameters
 from google.adk.agents import Agent, LlmAgent
-from typing import Dict, List, Any, Optional
-from datetime import datetime
+from typing import Dict, Any, Optional
+
+from .lazy_tools import LazyToolset, lazy_function_tools, prewarm
+from .router import IntentRouterAgent
+from .surge_workflow import SurgePreparationAgent
 
 MCP_SERVER_PATH = "C:/ShubhamWorkspace/Dev/Hackathon/ArogyamAI/MCP/dist/index.js"
 
+# Set to 1 to import numpy/pandas, load the models and build the historical
+# store in a background thread as soon as the agent module is imported
+PREWARM = os.environ.get('MULTI_TOOL_AGENT_PREWARM', '0') == '1'
+
+# Moved behind first use to keep agent import fast; still importable from here
+_LAZY_EXPORTS = {
+    'forecast_horizon': '.forecast',
+    'predict_from_features': '.prediction',
+    'predict_batch': '.prediction',
+    'predict_cascade': '.cascade',
+    'run_scenarios': '.scenarios',
+    'run_scenarios_async': '.async_prediction',
+    'predict_from_features_async': '.async_prediction',
+    'predict_cascade_async': '.async_prediction',
+    'get_historical_store': '.historical_store',
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name in _LAZY_EXPORTS:
+        import importlib
+        return getattr(importlib.import_module(_LAZY_EXPORTS[name], __package__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _procurement_mcp_toolset():
+    # The MCP client stack is the slowest import here; only pay for it on first use.
+    # Sessions come from a process-wide pool of warm node servers shared by every
+    # agent session (size: MCP_POOL_SIZE)
+    from .mcp_pool import PooledMCPToolset, get_mcp_pool
+
+    return PooledMCPToolset(
+        get_mcp_pool('procurement', command='node', args=[os.path.abspath(MCP_SERVER_PATH)]),
+    )
+
+
+procurement_tools = LazyToolset(_procurement_mcp_toolset, name='procurement_mcp')
+snapshot_tools = LazyToolset(lazy_function_tools('.resource_snapshot', 'get_resource_snapshot'), name='resource_snapshot')
+requirement_tools = LazyToolset(
+    lazy_function_tools('.procurement', 'calculate_procurement_requirements', 'simulate_stockout_risk'),
+    name='procurement_requirements')
+forecast_tools = LazyToolset(lazy_function_tools('.forecast', 'forecast_horizon'), name='forecast')
+# Async too: a large sweep (or SHAP worker start-up) would otherwise stall the event loop
+scenario_tools = LazyToolset(lazy_function_tools('.async_prediction', 'run_scenarios_async'), name='scenarios')
+
+
+def _prediction_tools():
+    from .async_prediction import predict_cascade_async, predict_from_features_async
+    from .cascade import start_calibration
+    # Tools are listed before the LLM picks one, so the cascade's ~2s calibration
+    # fit overlaps that LLM call instead of the first prediction (unless prewarmed)
+    start_calibration()
+    return [predict_cascade_async, predict_from_features_async]
+
+
+# Async: inference and SHAP run on a bounded worker pool, off the event loop
+prediction_tools = LazyToolset(_prediction_tools, name='prediction')
+
 procurement_agent = Agent(
     name="procurement_agent",
     model="gemini-2.0-flash",
@@ -31,18 +86,32 @@ Step 1: RECEIVE PREDICTION
 - Extract: predicted patients, oxygen demand, ICU beds needed, ventilators
 
 Step 2: CHECK CURRENT STATUS
-- Call get_inventory(item) for oxygen_cylinders, icu_beds, ventilators
+- Call get_resource_snapshot(['oxygen_cylinders', 'icu_beds', 'ventilators']) ONCE
+  (returns inventory, bed capacity, staffing and suppliers together; don't call
+  get_inventory item by item)
 - Calculate days of current supply
 - Identify shortfalls
 
 Step 3: CALCULATE REQUIREMENTS
 - Use formula: (Predicted Daily Demand × Days Until Surge) + 20% Buffer
 - Example: If predicted 150 cylinders/day for 7 days = 1050 + 210 (20%) = 1260 needed
+- Don't do this arithmetic yourself: call calculate_procurement_requirements(current_stock,
+  days_until_surge, daily_demand or predicted_admissions, lead_days) once for all items.
+  It returns required, deficit, order_quantity, days_of_supply, alert level and
+  lead-time checks per item. icu_beds and ventilators are capacity: pass free units as
+  their stock; their requirement is the peak number in use, not a sum over the days.
+  If it returns an 'error', fix the named argument and call it again
 
 Step 4: VERIFY SUPPLIER CAPACITY
-- Call check_supplier_availability(item) for each resource
+- Use the suppliers section of the snapshot (fastest lead_days first per item);
+  call check_supplier_availability(item) only if an item is missing there
 - Confirm lead times align with surge timeline
 - Alert if lead time > available days before surge
+- Before every order, call simulate_stockout_risk(current_stock, lead_days, days_until_surge,
+  daily_demand or predicted_admissions) once for all items, with lead_days from the
+  chosen suppliers. It returns stockout_probability before delivery, expected_shortfall
+  and the order_quantity that covers 95% of demand scenarios. Every item needs a lead_days
+  entry; if it returns an 'error', fix the named argument and call it again
 
 Step 5: CREATE PURCHASE ORDERS
 - Call create_draft_purchase_order(item, quantity) with calculated amounts
@@ -57,368 +126,57 @@ Step 6: TRACK ORDERS
 CRITICAL RULES:
 - NEVER auto-approve (wait for human decision)
 - Always calculate buffers (minimum 3-day supply: 300-500 oxygen cylinders)
-- Alert if shortage occurs during supplier lead time
+- Alert if shortage occurs during supplier lead time: any item in simulate_stockout_risk's
+  summary.stockout_risk (report its stockout_probability and expected_shortfall)
 - Flag URGENT if current stock < 1 day supply
 
 ALERT LEVELS:
 🟢 GREEN: >3 days supply (>300 cylinders)
 🟡 YELLOW: 1-3 days supply (100-300 cylinders) - Order now
 🔴 RED: <1 day supply (<100 cylinders) - EMERGENCY ORDER""",
-    tools=[
-        MCPToolset(
-            connection_params=StdioConnectionParams(
-                server_params=StdioServerParameters(
-                    command='node',
-                    args=[os.path.abspath(MCP_SERVER_PATH)],
-                ),
-            ),
-        )
-    ],
+    tools=[snapshot_tools, requirement_tools, procurement_tools],
 )
 
 
-def get_historical_data(month: Optional[int] = None, disease_type: Optional[str] = None) -> Dict[str, Any]:
+def get_historical_data(month: Optional[int] = None, disease_type: Optional[str] = None,
+                        festival: Optional[str] = None, include_records: bool = False) -> Dict[str, Any]:
     """
-    Returns hardcoded historical patient surge data for Indian hospitals.
-    
+    Returns historical patient surge data for Indian hospitals.
+
+    Backed by the columnar store built from data/historical_surge.csv. Filters are
+    applied through the month/festival/disease indexes, and the per-month figures
+    (total_surge_patients etc.) are per-year averages from the precomputed rollup.
+
     Args:
         month: Month number (1-12). If None, returns all months.
-        disease_type: Filter by disease type ('respiratory', 'gastro', 'infectious', 'accident', 'all'). 
-                     If None, returns all diseases.
-    
+        disease_type: Filter by disease type ('respiratory', 'gastro', 'infectious', 'accident',
+                     'burns', 'cardiac', 'skin', 'all'). If None, returns all diseases.
+        festival: Filter by festival name (e.g. 'Diwali', 'Holi'). If None, returns all festivals.
+        include_records: Also return the matching per-year rows.
+
     Returns:
         Dictionary containing historical surge patterns with festivals, diseases, and patient counts.
     """
+    from .historical_store import get_historical_store
+
+    store = get_historical_store()
+
+    if month is not None and not 1 <= month <= 12:
+        return {'error': f"month must be between 1 and 12, got {month}"}
+
+    months = [month] if month is not None else store.months_for(festival)
+    summaries = [store.month_summary(m, festival=festival, disease_type=disease_type) for m in months]
+
+    result = {
+        'filters': {'month': month, 'disease_type': disease_type, 'festival': festival},
+        'years_covered': store.years,
+        'months': summaries,
+        'critical_months': [s['month_name'] for s in summaries if s['critical_alert']],
+    }
+    if include_records:
+        result['records'] = store.records(store.select(month, festival, disease_type))
+    return result
 
-    def predict_from_features(features, baseline=150, surge_threshold=184, return_json=True):
-        """
-        Make prediction directly from feature dictionary
-
-        Args:
-            features: Dictionary with feature values. Required keys:
-                - temperature (float): Temperature in Celsius
-                - air_quality (float): Air Quality Index (0-500)
-                - admissions_lag1 (float): Yesterday's admissions
-                - admissions_lag7 (float): Admissions from 7 days ago
-                - admissions_rolling7 (float): 7-day rolling average
-                - admissions_rolling7_std (float): 7-day rolling std dev
-                - temp_change_1d (float): Temperature change from yesterday
-                - aqi_change_1d (float): AQI change from yesterday
-                - er_admissions (float): Recent ER admissions
-                - icu_admissions (float): Recent ICU admissions
-                - day_of_week (int): 0=Monday, 6=Sunday
-                - month (int): 1-12
-                - is_weekend (int): 0 or 1
-            baseline (float): Historical average admissions (for comparison)
-            surge_threshold (float): Admission level considered a surge
-            return_json (bool): Return JSON string vs dict
-
-        Returns:
-            Prediction with SHAP explanations as JSON string or dict
-
-        Example:
-            features = {
-                'temperature': 5.0,
-                'air_quality': 185.0,
-                'admissions_lag1': 165.0,
-                'admissions_lag7': 158.0,
-                'admissions_rolling7': 162.5,
-                'admissions_rolling7_std': 12.3,
-                'temp_change_1d': -8.0,
-                'aqi_change_1d': 25.0,
-                'er_admissions': 58.0,
-                'icu_admissions': 18.0,
-                'day_of_week': 4,  # Friday
-                'month': 12,        # December
-                'is_weekend': 0
-            }
-            result = predict_from_features(features)
-        """
-
-        print("=" * 80)
-        print("DIRECT PREDICTION FROM FEATURES")
-        print("=" * 80)
-
-        # ===== STEP 1: LOAD MODEL =====
-        print("\n[1/4] Loading model...")
-        try:
-            pred_model = joblib.load('./multi_tool_agent/hospital_surge_model.pkl')
-            scaler = joblib.load('./multi_tool_agent/feature_scaler.pkl')
-            print(f"  ✓ Model loaded: {type(pred_model).__name__}")
-        except Exception as e:
-            print(f"  ✗ Error loading model: {e}")
-            print("  Make sure hospital_surge_model.pkl and feature_scaler.pkl exist")
-            return None
-
-        # ===== STEP 2: VALIDATE AND ENGINEER FEATURES =====
-        print("\n[2/4] Processing features...")
-
-        # Required base features
-        required_features = [
-            'temperature', 'air_quality', 'admissions_lag1', 'admissions_lag7',
-            'admissions_rolling7', 'admissions_rolling7_std', 'temp_change_1d',
-            'aqi_change_1d', 'er_admissions', 'icu_admissions',
-            'day_of_week', 'month', 'is_weekend'
-        ]
-
-        # Check for missing features
-        missing = [f for f in required_features if f not in features]
-        if missing:
-            print(f"  ✗ Missing required features: {missing}")
-            return None
-
-        # Create feature dictionary with all engineered features
-        processed_features = features.copy()
-
-        # Engineer additional features
-        processed_features['temp_squared'] = features['temperature'] ** 2
-        processed_features['rolling_trend'] = features['admissions_rolling7'] - features['admissions_lag7']
-
-        # Cyclical encoding for day of week
-        processed_features['day_of_week_sin'] = np.sin(2 * np.pi * features['day_of_week'] / 7)
-        processed_features['day_of_week_cos'] = np.cos(2 * np.pi * features['day_of_week'] / 7)
-
-        # Cyclical encoding for month
-        processed_features['month_sin'] = np.sin(2 * np.pi * features['month'] / 12)
-        processed_features['month_cos'] = np.cos(2 * np.pi * features['month'] / 12)
-
-        # Define feature order (must match training)
-        feature_cols = [
-            'day_of_week', 'month', 'is_weekend',
-            'temperature', 'temp_squared', 'air_quality',
-            'admissions_lag1', 'admissions_lag7', 'admissions_rolling7',
-            'admissions_rolling7_std', 'temp_change_1d', 'aqi_change_1d',
-            'rolling_trend', 'er_admissions', 'icu_admissions',
-            'day_of_week_sin', 'day_of_week_cos', 'month_sin', 'month_cos'
-        ]
-
-        # Create feature array
-        X = np.array([[processed_features[col] for col in feature_cols]])
-        X_df = pd.DataFrame(X, columns=feature_cols)
-
-        print(f"  ✓ Processed {len(feature_cols)} features")
-
-        # ===== STEP 3: MAKE PREDICTION =====
-        print("\n[3/4] Generating prediction...")
-
-        try:
-            # Use scaler only if model is Linear Regression
-            prediction = pred_model.predict(X_df)[0]
-
-            is_surge = prediction > surge_threshold
-
-            print(f"  ✓ Predicted admissions: {prediction:.1f}")
-            print(f"  ✓ Baseline: {baseline:.1f}")
-            print(f"  ✓ Difference: {prediction - baseline:+.1f}")
-            print(f"  ✓ Surge alert: {'🚨 YES' if is_surge else '✓ No'}")
-        except Exception as e:
-            print(f"  ✗ Error making prediction: {e}")
-            return None
-
-        # ===== STEP 4: CALCULATE SHAP VALUES =====
-        print("\n[4/4] Calculating SHAP explanations...")
-
-        try:
-            import shap
-
-            # For tree-based models
-            explainer = shap.TreeExplainer(pred_model)
-            shap_values = explainer.shap_values(X_df)[0]
-
-            print(f"  ✓ SHAP values calculated")
-            has_shap = True
-
-        except ImportError:
-            print("  ⚠ SHAP not installed - prediction without explanations")
-            print("    Install with: pip install shap")
-            shap_values = None
-            has_shap = False
-        except Exception as e:
-            print(f"  ⚠ Error calculating SHAP: {e}")
-            shap_values = None
-            has_shap = False
-
-        # ===== BUILD OUTPUT =====
-        print("\nBuilding output...")
-
-        # Build feature contributions
-        if shap_values is not None:
-            feature_impacts = []
-            for i, (feature_name, shap_val) in enumerate(zip(feature_cols, shap_values)):
-                feature_impacts.append({
-                    'feature': feature_name,
-                    'value': float(X_df[feature_name].iloc[0]),
-                    'shap_value': float(shap_val),
-                    'abs_shap': abs(float(shap_val))
-                })
-
-            # Sort by absolute SHAP value
-            feature_impacts.sort(key=lambda x: x['abs_shap'], reverse=True)
-
-            # Separate positive and negative
-            top_positive = [f for f in feature_impacts if f['shap_value'] > 0][:5]
-            top_negative = [f for f in feature_impacts if f['shap_value'] < 0][:5]
-
-            # Add human-readable reasons
-            def get_reason(feature, value, impact):
-                reasons = {
-                    'air_quality': f"AQI of {value:.0f} {'worsens' if value > 100 else 'improves'} respiratory admissions",
-                    'temperature': f"Temperature at {value:.1f}°C affects weather-related cases",
-                    'temp_change_1d': f"Temperature {'dropped' if value < 0 else 'rose'} by {abs(value):.1f}°C from yesterday",
-                    'aqi_change_1d': f"Air quality {'worsened' if value > 0 else 'improved'} by {abs(value):.0f} points",
-                    'admissions_lag1': f"Yesterday's {value:.0f} admissions set baseline",
-                    'admissions_lag7': f"Last week: {value:.0f} admissions",
-                    'admissions_rolling7': f"7-day average: {value:.1f} admissions",
-                    'admissions_rolling7_std': f"Recent volatility: {value:.1f} std dev",
-                    'rolling_trend': f"Week-over-week trend: {value:+.1f} admissions",
-                    'er_admissions': f"ER volume: {value:.0f}",
-                    'icu_admissions': f"ICU census: {value:.0f}",
-                    'is_weekend': f"{'Weekend' if value == 1 else 'Weekday'} pattern",
-                    'temp_squared': f"Temperature non-linearity effect",
-                    'month': f"Month {int(value)} seasonality",
-                    'day_of_week': f"Day {int(value)} weekly pattern",
-                }
-                return reasons.get(feature, f"{feature}: {value:.2f}")
-
-            formatted_positive = [
-                {
-                    'feature': f['feature'],
-                    'value': round(f['value'], 2),
-                    'impact': round(f['shap_value'], 2),
-                    'reason': get_reason(f['feature'], f['value'], f['shap_value'])
-                }
-                for f in top_positive
-            ]
-
-            formatted_negative = [
-                {
-                    'feature': f['feature'],
-                    'value': round(f['value'], 2),
-                    'impact': round(f['shap_value'], 2),
-                    'reason': get_reason(f['feature'], f['value'], f['shap_value'])
-                }
-                for f in top_negative
-            ]
-
-            base_value = explainer.expected_value if hasattr(explainer, 'expected_value') else baseline
-
-        else:
-            formatted_positive = []
-            formatted_negative = []
-            base_value = baseline
-            feature_impacts = []
-
-        # Build output structure
-        output = {
-            'predicted_admissions': round(float(prediction), 1),
-            'baseline_average': round(float(baseline), 1),
-            'difference_from_baseline': round(float(prediction - baseline), 1),
-            'surge_alert': bool(is_surge),
-            'surge_threshold': round(float(surge_threshold), 1),
-            'confidence': 'high' if has_shap and len(top_positive) >= 3 else 'moderate',
-            'top_positive_factors': formatted_positive,
-            'top_negative_factors': formatted_negative,
-            'shap_metadata': {
-                'base_value': round(float(base_value), 2) if has_shap else None,
-                'total_positive_impact': round(sum(f['shap_value'] for f in feature_impacts if f['shap_value'] > 0),
-                                               2) if has_shap else None,
-                'total_negative_impact': round(sum(f['shap_value'] for f in feature_impacts if f['shap_value'] < 0),
-                                               2) if has_shap else None,
-                'shap_available': has_shap
-            },
-            'input_features': {k: round(float(v), 2) if isinstance(v, (int, float)) else v
-                               for k, v in features.items()},
-            'all_shap_values': {
-                feature_cols[i]: round(float(shap_values[i]), 3)
-                for i in range(len(feature_cols))
-            } if has_shap else None,
-            'model_info': {
-                'model_type': type(pred_model).__name__,
-                'prediction_timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            }
-        }
-
-        # Display summary
-        print("\n" + "=" * 80)
-        print("PREDICTION RESULTS")
-        print("=" * 80)
-        print(f"Predicted Admissions: {output['predicted_admissions']:.1f}")
-        print(f"Baseline: {output['baseline_average']:.1f}")
-        print(f"Difference: {output['difference_from_baseline']:+.1f}")
-        print(f"Surge Alert: {'🚨 YES - Prepare for high volume!' if is_surge else '✓ No surge expected'}")
-
-        if formatted_positive:
-            print(f"\n📈 Top Factors INCREASING Admissions:")
-            for i, factor in enumerate(formatted_positive[:3], 1):
-                print(f"  {i}. {factor['reason']} (impact: +{factor['impact']:.1f})")
-
-        if formatted_negative:
-            print(f"\n📉 Top Factors DECREASING Admissions:")
-            for i, factor in enumerate(formatted_negative[:3], 1):
-                print(f"  {i}. {factor['reason']} (impact: {factor['impact']:.1f})")
-
-        if return_json:
-            return json.dumps(output, indent=2)
-        else:
-            return output
-
-    # Add summary statistics
-    summary =   {
-              "prediction_summary": {
-                "predicted_admissions": 176.9,
-                "baseline_average": 150.0,
-                "difference_from_baseline": 26.9,
-                "surge_alert": False,
-                "surge_message": "No surge expected"
-              },
-              "top_positive_factors": [
-                {
-                  "rank": 1,
-                  "feature": "month_sin",
-                  "value": -0.00,
-                  "impact": 7.9,
-                  "reason": "month_sin: -0.00"
-                },
-                {
-                  "rank": 2,
-                  "feature": "day_of_week",
-                  "value": 4,
-                  "impact": 4.0,
-                  "reason": "Day 4 weekly pattern"
-                },
-                {
-                  "rank": 3,
-                  "feature": "month_cos",
-                  "value": 1.00,
-                  "impact": 2.9,
-                  "reason": "month_cos: 1.00"
-                }
-              ],
-              "top_negative_factors": [
-                {
-                  "rank": 1,
-                  "feature": "admissions_rolling7",
-                  "value": 165.0,
-                  "impact": -4.6,
-                  "reason": "7-day average: 165.0 admissions"
-                },
-                {
-                  "rank": 2,
-                  "feature": "temperature",
-                  "value": 5.0,
-                  "impact": -1.9,
-                  "reason": "Temperature at 5.0°C affects weather-related cases"
-                },
-                {
-                  "rank": 3,
-                  "feature": "month",
-                  "value": 12,
-                  "impact": -1.3,
-                  "reason": "Month 12 seasonality"
-                }
-              ]
-            }
-    return summary
 
 predictive_agent = LlmAgent(
     model="gemini-2.0-flash",
@@ -434,7 +192,7 @@ YOUR ROLE:
 
 WORKFLOW:
 1. When asked about a specific month/festival:
-   - Call get_historical_data(month=X) to fetch historical patterns
+   - Call get_historical_data(month=X) or get_historical_data(festival='Diwali') to fetch historical patterns
    - Analyze disease categories and patient counts
    - Calculate predicted surge for current year
 
@@ -443,7 +201,27 @@ WORKFLOW:
    - Calculate ICU bed requirements
    - Add 20% safety buffer for contingencies
 
-3. Output format:
+3. When asked for a multi-day outlook (7-30 days, e.g. a festival window):
+   - Call forecast_horizon(history, horizon, temperature, air_quality, er_admissions, icu_admissions, start_date)
+   - Report the peak day, peak admissions, surge days and cumulative surge
+   - If it returns an 'error', fix the named argument and call it again
+
+4. When given today's readings (the 13 model features) and asked whether tomorrow is a surge:
+   - Call predict_cascade_async(features, detail='summary'); a quiet day is answered by the
+     surge classifier alone (cascade_stage='classifier', no admission count)
+   - Report surge_probability; if it escalated, also predicted_admissions, surge_alert and the top factors
+   - Only when the user asks for the admission count or the drivers of a quiet day, call
+     predict_from_features_async(features, detail='summary')
+     ('minimal' if only the number is needed; 'full' only when asked for every SHAP value)
+   - If either returns an 'error' with retryable=true, the prediction service is busy: retry once
+
+5. For what-if questions ("what if AQI hits 350 and it drops 8 degrees?"):
+   - Call run_scenarios_async(base_features, grid={...}) for a few fixed values per factor, or
+     run_scenarios_async(base_features, monte_carlo={...}) for ranges/uncertainty (one call, not a loop)
+   - If it returns an 'error', fix the named argument and call it again
+   - Report surge_share, the worst case and the surface's crossing_regions
+
+6. Output format:
    - "Based on historical Diwali data, respiratory cases increase by 140%"
    - "Predicted oxygen cylinders needed: X (historical avg: Y + 20% buffer)"
    - "Critical period: [dates]"
@@ -454,10 +232,17 @@ IMPORTANT:
 - Don't show full calculations, just provide results with percentage references
 - Consider only relevant disease categories for specific queries
 - Flag months with total_surge_patients > 1000 as CRITICAL ALERT""",
-    tools=[get_historical_data]
+    tools=[get_historical_data, forecast_tools, scenario_tools, prediction_tools]
 )   
 
-root_agent = LlmAgent(
+surge_workflow = SurgePreparationAgent(
+    name="surge_preparation_workflow",
+    description="Prepares for a festival surge: forecast and procurement status in parallel, then orders",
+    predictive=predictive_agent,
+    procurement=procurement_agent,
+)
+
+coordinator_agent = LlmAgent(
     name="hospital_admin_coordinator",
     model="gemini-2.0-flash",
     description="Coordinates hospital resource management system",
@@ -510,6 +295,10 @@ Action:
 
 MULTI-STEP SCENARIO EXAMPLE:
 User: "Prepare for Diwali surge"
+Action:
+  → Transfer to surge_preparation_workflow. It runs Step 1 and the procurement
+    status check at the same time, then Steps 2-3 with both results.
+The steps it performs:
 
 Step 1 (Predictive):
 - predictive_agent.run("Analyze Diwali historical surge data and predict November patient volumes")
@@ -534,6 +323,30 @@ COORDINATION RULES:
 - Escalate CRITICAL ALERTs (RED status) immediately""",
     sub_agents=[
         procurement_agent,
-        predictive_agent
+        predictive_agent,
+        surge_workflow
     ]
-)
\ No newline at end of file
+)
+
+# Obvious query types skip the coordinator's LLM hop (see router.INTENTS);
+# set MULTI_TOOL_AGENT_ROUTER=0 to send every message through the coordinator
+if os.environ.get('MULTI_TOOL_AGENT_ROUTER', '1') == '1':
+    root_agent = IntentRouterAgent(
+        name="hospital_admin_router",
+        description="Routes fixed query types directly, everything else to the coordinator",
+        coordinator=coordinator_agent,
+        sub_agents=[coordinator_agent],
+    )
+else:
+    root_agent = coordinator_agent
+
+# Set AGENT_TRACE_FILE and/or AGENT_TRACE_OTLP_ENDPOINT to trace every agent turn,
+# LLM call and tool call (see tracing.py); adk web / adk run pick up `app` over root_agent
+if os.environ.get('AGENT_TRACE_FILE') or os.environ.get('AGENT_TRACE_OTLP_ENDPOINT'):
+    from .tracing import traced_app
+    app = traced_app(root_agent)
+
+
+if PREWARM:
+    prewarm(toolsets=[forecast_tools, scenario_tools, prediction_tools, snapshot_tools, requirement_tools, procurement_tools],
+            models=('surge_model', 'classifier'))
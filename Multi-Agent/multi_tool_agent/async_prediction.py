@@ -0,0 +1,256 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Inference threads shared by every session on this process
+PREDICTION_WORKERS = int(os.environ.get('PREDICTION_WORKERS', str(min(4, os.cpu_count() or 1))))
+# Calls allowed to wait for a free worker before new ones are turned away
+PREDICTION_QUEUE_LIMIT = int(os.environ.get('PREDICTION_QUEUE_LIMIT', '16'))
+# Seconds from submission (queue wait included) before a caller gives up
+PREDICTION_TIMEOUT = float(os.environ.get('PREDICTION_TIMEOUT', '30'))
+
+QUEUE_WAIT_SECONDS = 'prediction_executor_wait_seconds'
+RUN_SECONDS = 'prediction_executor_run_seconds'
+metrics.describe(QUEUE_WAIT_SECONDS, 'Time prediction calls spent queued for an inference worker')
+metrics.describe(RUN_SECONDS, 'Time prediction calls spent running on an inference worker')
+metrics.describe('prediction_executor_queue_depth', 'Prediction calls waiting for an inference worker')
+metrics.describe('prediction_executor_running', 'Prediction calls running on inference workers')
+metrics.describe('prediction_executor_calls_total', 'Async prediction calls by outcome')
+
+
+class PredictionRejected(RuntimeError):
+    """
+    An async prediction call that did not produce a result
+
+    Attributes:
+        reason: 'queue_full' (backpressure, nothing was run) or 'timeout'
+    """
+
+    def __init__(self, reason: str, message: str):
+        super().__init__(message)
+        self.reason = reason
+
+
+class PredictionExecutor:
+    """
+    Bounded thread pool that keeps CPU-bound inference off the event loop
+
+    At most `workers` calls run at once and at most `queue_limit` more wait
+    for a worker; anything beyond that is rejected immediately instead of
+    piling up behind a slow SHAP explanation. Callers stop waiting after
+    `timeout` seconds. A call still queued at that point is cancelled; one
+    already running finishes in its thread (Python threads can't be
+    interrupted) and keeps its worker busy until it does.
+
+    Threads rather than processes: the models, compiled trees, explainers
+    and prediction cache are shared in-process, and the tree/SHAP kernels
+    spend most of their time in native code.
+
+    Args:
+        workers: Inference threads
+        queue_limit: Calls allowed to wait for a worker
+        timeout: Default per-call deadline in seconds, queue wait included
+    """
+
+    def __init__(self, workers: int = PREDICTION_WORKERS, queue_limit: int = PREDICTION_QUEUE_LIMIT,
+                 timeout: float = PREDICTION_TIMEOUT):
+        self.workers = max(1, workers)
+        self.queue_limit = max(0, queue_limit)
+        self.timeout = timeout
+        self.queued = 0
+        self.running = 0
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='prediction')
+        self._lock = threading.Lock()
+
+    def _publish(self) -> None:
+        metrics.set_gauge('prediction_executor_queue_depth', self.queued)
+        metrics.set_gauge('prediction_executor_running', self.running)
+
+    def _call(self, fn: Callable[..., Any], enqueued: float, args: tuple, kwargs: Dict[str, Any]) -> Any:
+        start = time.perf_counter()
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+            self._publish()
+        metrics.observe(QUEUE_WAIT_SECONDS, start - enqueued)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            metrics.observe(RUN_SECONDS, time.perf_counter() - start, tool=fn.__name__)
+            with self._lock:
+                self.running -= 1
+                self._publish()
+
+    def _on_done(self, future: Future) -> None:
+        # A timed-out or cancelled caller cancels the pool future too; that
+        # only succeeds while the call is still queued, so _call never runs
+        if future.cancelled():
+            with self._lock:
+                self.queued -= 1
+                self._publish()
+
+    async def run(self, fn: Callable[..., Any], *args: Any, timeout: Optional[float] = None, **kwargs: Any) -> Any:
+        """
+        Run fn(*args, **kwargs) on an inference worker and await its result
+
+        Raises:
+            PredictionRejected: The queue is full, or the call did not finish
+                within `timeout` (default: the executor's timeout)
+            Exception: Whatever fn raised
+        """
+        name = fn.__name__
+        with self._lock:
+            # Running calls that overran their timeout still hold their worker
+            if self.queued + self.running >= self.workers + self.queue_limit:
+                metrics.inc('prediction_executor_calls_total', tool=name, outcome='rejected')
+                raise PredictionRejected(
+                    'queue_full', f"{self.running} prediction calls running and {self.queued} queued "
+                                  f"(limit {self.workers} + {self.queue_limit}); retry shortly")
+            self.queued += 1
+            self._publish()
+            future = self._pool.submit(self._call, fn, time.perf_counter(), args, kwargs)
+        future.add_done_callback(self._on_done)
+
+        deadline = self.timeout if timeout is None else timeout
+        try:
+            result = await asyncio.wait_for(asyncio.wrap_future(future), deadline)
+        except asyncio.TimeoutError:
+            metrics.inc('prediction_executor_calls_total', tool=name, outcome='timeout')
+            raise PredictionRejected('timeout', f"{name} did not finish within {deadline:g}s") from None
+        except Exception:
+            metrics.inc('prediction_executor_calls_total', tool=name, outcome='error')
+            raise
+        metrics.inc('prediction_executor_calls_total', tool=name, outcome='ok')
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Current workers, queue depth and limits."""
+        with self._lock:
+            return {'workers': self.workers, 'running': self.running, 'queued': self.queued,
+                    'queue_limit': self.queue_limit, 'timeout_seconds': self.timeout}
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+
+_executor: Optional[PredictionExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_prediction_executor() -> PredictionExecutor:
+    """Return the process-wide inference executor, creating it on first use."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = PredictionExecutor()
+    return _executor
+
+
+def _rejected_output(error: PredictionRejected, return_json: bool):
+    output = {
+        'error': str(error),
+        'reason': error.reason,
+        'retryable': True,
+        'executor': get_prediction_executor().stats(),
+    }
+    return json.dumps(output, separators=(',', ':')) if return_json else output
+
+
+async def predict_from_features_async(features: Dict[str, float], baseline: float = 150,
+                                      surge_threshold: float = 184, return_json: bool = True,
+                                      top_k_only: bool = False, top_k: int = 5, explain: bool = True,
+                                      detail: str = 'full', timeout: Optional[float] = None):
+    """
+    Non-blocking predict_from_features for async callers (ADK tools, servers)
+
+    The prediction and its SHAP explanation run on the shared inference
+    executor, so the event loop keeps serving other sessions meanwhile.
+
+    Args:
+        features: Feature dictionary (see predict_from_features)
+        baseline (float): Historical average admissions (for comparison)
+        surge_threshold (float): Admission level considered a surge
+        return_json (bool): Return JSON string vs dict
+        top_k_only (bool): Return only the top factors
+        top_k (int): Number of positive and negative factors to return
+        explain (bool): Compute SHAP explanations
+        detail (str): 'minimal', 'summary', 'standard' or 'full' (see response_format)
+        timeout (float): Seconds to wait, queueing included (default PREDICTION_TIMEOUT)
+
+    Returns:
+        predict_from_features' output, None if the features are invalid, or
+        {'error', 'reason': 'queue_full' | 'timeout', 'retryable', 'executor'}
+        when the executor is saturated or the call overran its timeout
+
+    Example:
+        result = await predict_from_features_async(features, return_json=False)
+        result['predicted_admissions']
+    """
+    from .prediction import predict_from_features
+
+    try:
+        return await get_prediction_executor().run(
+            predict_from_features, features, baseline=baseline, surge_threshold=surge_threshold,
+            return_json=return_json, top_k_only=top_k_only, top_k=top_k, explain=explain, detail=detail,
+            timeout=timeout)
+    except PredictionRejected as e:
+        logger.warning("Async prediction rejected: %s", e)
+        return _rejected_output(e, return_json)
+
+
+async def predict_cascade_async(features: Dict[str, float], probability_threshold: Optional[float] = None,
+                                full_explanation: bool = False, baseline: float = 150,
+                                surge_threshold: float = 184, return_json: bool = True,
+                                detail: str = 'full', timeout: Optional[float] = None):
+    """
+    Non-blocking predict_cascade (classifier first, regressor + SHAP when needed)
+
+    Same arguments and output as predict_cascade, plus `timeout`; rejected
+    calls return the error dict described in predict_from_features_async.
+    """
+    from .cascade import predict_cascade
+
+    try:
+        return await get_prediction_executor().run(
+            predict_cascade, features, probability_threshold=probability_threshold,
+            full_explanation=full_explanation, baseline=baseline, surge_threshold=surge_threshold,
+            return_json=return_json, detail=detail, timeout=timeout)
+    except PredictionRejected as e:
+        logger.warning("Async cascade prediction rejected: %s", e)
+        return _rejected_output(e, return_json)
+
+
+async def run_scenarios_async(base_features: Optional[Dict[str, float]] = None,
+                              grid: Optional[Dict[str, Any]] = None,
+                              monte_carlo: Optional[Dict[str, Any]] = None,
+                              n_samples: int = 10000, surface_axes: Optional[List[str]] = None,
+                              surge_threshold: float = 184, crossing_share: float = 0.5,
+                              explain: bool = False, explain_workers: int = 1, seed: int = 0,
+                              return_json: bool = False, timeout: Optional[float] = None):
+    """
+    Non-blocking run_scenarios (what-if sweep over weather/calendar scenarios)
+
+    Same arguments and output as run_scenarios, plus `timeout`; rejected
+    calls return the error dict described in predict_from_features_async.
+    """
+    from .scenarios import run_scenarios
+
+    try:
+        return await get_prediction_executor().run(
+            run_scenarios, base_features, grid=grid, monte_carlo=monte_carlo, n_samples=n_samples,
+            surface_axes=surface_axes, surge_threshold=surge_threshold, crossing_share=crossing_share,
+            explain=explain, explain_workers=explain_workers, seed=seed, return_json=return_json,
+            timeout=timeout)
+    except PredictionRejected as e:
+        logger.warning("Async scenario sweep rejected: %s", e)
+        return _rejected_output(e, return_json)
@@ -0,0 +1,391 @@
+"""
+Rolling-origin backtest of the surge model against a daily admissions history
+
+Runs offline from a local CSV or Parquet file with one row per hospital per
+day:
+
+    date, admissions, er_admissions, icu_admissions, temperature, air_quality
+    [, hospital_id]
+
+    cd Multi-Agent
+    python -m multi_tool_agent.backtest history.csv --horizon 7 --step 7
+    python -m multi_tool_agent.backtest history.parquet --workers 4 --json report.json
+    python -m multi_tool_agent.backtest --synthetic 730 --hospitals 20   # no file needed
+
+Every `step` days an origin is placed. From each origin the model forecasts
+the next `horizon` days with only what was known that day: the admissions
+window up to the origin, then its own predictions fed back as lags (see
+forecast_trajectories). Recorded weather stands in for the weather forecast,
+so errors measure the model and the recursion, not the weather feed. All
+(origin, hospital) series are scored together, one model call per lead day,
+optionally split across worker processes.
+
+Parquet input needs pyarrow or fastparquet.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .compiled_trees import get_predictor
+from .forecast import forecast_trajectories
+from .model_registry import get_registry
+
+HISTORY_COLUMNS = ('date', 'admissions', 'er_admissions', 'icu_admissions', 'temperature', 'air_quality')
+WINDOW = 7
+
+
+def load_history(path: str) -> pd.DataFrame:
+    """
+    Read a daily history from .csv or .parquet and check its columns
+
+    Raises:
+        ValueError: Required columns are missing
+        ImportError: Parquet input without pyarrow/fastparquet installed
+    """
+    if path.endswith(('.parquet', '.pq')):
+        try:
+            frame = pd.read_parquet(path)
+        except ImportError as e:
+            raise ImportError(f"Reading {path} needs pyarrow or fastparquet (pip install pyarrow): {e}")
+    else:
+        frame = pd.read_csv(path)
+
+    missing = [c for c in HISTORY_COLUMNS if c not in frame.columns]
+    if missing:
+        raise ValueError(f"{path} is missing columns {missing}; expected {list(HISTORY_COLUMNS)}")
+    return frame
+
+
+def synthetic_history(days: int = 730, hospitals: int = 1, seed: int = 0,
+                      start: str = '2023-01-01') -> pd.DataFrame:
+    """
+    Random daily history in load_history's layout, for trying the backtest without data
+
+    Admissions follow a weekly cycle, a winter bump, pollution spikes and
+    noise, so some days cross the default surge threshold.
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(start, periods=days, freq='D')
+    day_of_year = dates.dayofyear.to_numpy()
+    weekend = (dates.dayofweek.to_numpy() >= 5)
+
+    temperature = 25 - 12 * np.cos(2 * np.pi * (day_of_year - 200) / 365) + rng.normal(0, 2, (hospitals, days))
+    air_quality = np.clip(150 + 120 * np.cos(2 * np.pi * (day_of_year - 320) / 365)
+                          + rng.gamma(2, 25, (hospitals, days)), 20, 500)
+    level = rng.uniform(130, 170, (hospitals, 1))
+    admissions = (level + 0.12 * (air_quality - 150) - 0.8 * (temperature - 25)
+                  - 12 * weekend + rng.normal(0, 8, (hospitals, days)))
+    admissions = np.maximum(admissions, 20)
+
+    return pd.DataFrame({
+        'hospital_id': np.repeat([f"hospital_{h}" for h in range(hospitals)], days),
+        'date': np.tile(dates.strftime('%Y-%m-%d'), hospitals),
+        'admissions': admissions.round().ravel(),
+        'er_admissions': (admissions * rng.uniform(0.3, 0.4, (hospitals, days))).round().ravel(),
+        'icu_admissions': (admissions * rng.uniform(0.08, 0.14, (hospitals, days))).round().ravel(),
+        'temperature': temperature.round(1).ravel(),
+        'air_quality': air_quality.round().ravel(),
+    })
+
+
+def _daily_arrays(history: pd.DataFrame) -> Tuple[Dict[str, np.ndarray], np.ndarray, List[str]]:
+    """
+    Pivot the history to one (hospitals, days) array per column on a gap-free calendar
+
+    Missing days are NaN; origins that would read one are skipped later.
+    """
+    frame = history.copy()
+    frame['date'] = pd.to_datetime(frame['date']).dt.normalize()
+    if 'hospital_id' not in frame.columns:
+        frame['hospital_id'] = 'all'
+    frame['hospital_id'] = frame['hospital_id'].astype(str)
+    frame = frame.drop_duplicates(['hospital_id', 'date'], keep='last')
+
+    calendar = pd.date_range(frame['date'].min(), frame['date'].max(), freq='D')
+    hospitals = sorted(frame['hospital_id'].unique())
+    arrays = {}
+    for column in HISTORY_COLUMNS[1:]:
+        wide = frame.pivot(index='hospital_id', columns='date', values=column)
+        arrays[column] = wide.reindex(index=hospitals, columns=calendar).to_numpy(dtype=np.float64)
+    return arrays, calendar.values.astype('datetime64[D]'), hospitals
+
+
+def rolling_origins(n_days: int, horizon: int, step: int, initial: int = WINDOW) -> np.ndarray:
+    """
+    Day indices of the forecast origins
+
+    The first origin has `initial` days of history (at least the 7-day
+    window) and the last still has `horizon` days after it.
+    """
+    if horizon < 1 or step < 1:
+        raise ValueError("horizon and step must be at least 1")
+    if initial < WINDOW:
+        raise ValueError(f"initial must be at least {WINDOW} days")
+    return np.arange(initial - 1, n_days - horizon, step)
+
+
+def build_series(arrays: Dict[str, np.ndarray], origins: np.ndarray,
+                 horizon: int) -> Dict[str, np.ndarray]:
+    """
+    Gather the inputs and actuals of every (origin, hospital) series
+
+    Returns:
+        Arrays with one row per complete series: history (S, 7), temperature and
+        air_quality (S, H), prev_temperature / prev_air_quality /
+        er_admissions / icu_admissions (S, 1), actual (S, H), plus origin
+        (day index) and hospital (row index). Series with a missing day
+        anywhere in their window are dropped.
+    """
+    n_hospitals = arrays['admissions'].shape[0]
+    origin = np.repeat(origins, n_hospitals)
+    hospital = np.tile(np.arange(n_hospitals), len(origins))
+    rows = hospital[:, None]
+    past = origin[:, None] + np.arange(-WINDOW + 1, 1)
+    ahead = origin[:, None] + np.arange(1, horizon + 1)
+    at_origin = origin[:, None]
+
+    series = {
+        'history': arrays['admissions'][rows, past],
+        'temperature': arrays['temperature'][rows, ahead],
+        'air_quality': arrays['air_quality'][rows, ahead],
+        'prev_temperature': arrays['temperature'][rows, at_origin],
+        'prev_air_quality': arrays['air_quality'][rows, at_origin],
+        'er_admissions': arrays['er_admissions'][rows, at_origin],
+        'icu_admissions': arrays['icu_admissions'][rows, at_origin],
+        'actual': arrays['admissions'][rows, ahead],
+    }
+    complete = np.ones(len(origin), dtype=bool)
+    for values in series.values():
+        complete &= ~np.isnan(values).any(axis=1)
+
+    series = {name: values[complete] for name, values in series.items()}
+    series['origin'] = origin[complete]
+    series['hospital'] = hospital[complete]
+    return series
+
+
+def _forecast_block(block: Dict[str, np.ndarray]) -> np.ndarray:
+    """Recursive forecast of one block of series (runs in pool workers too)."""
+    entry = get_registry().entry('surge_model')
+    return forecast_trajectories(
+        block['history'], block['temperature'].shape[1], block['temperature'], block['air_quality'],
+        block['er_admissions'], block['icu_admissions'], start_date=block['start_date'],
+        prev_temperature=block['prev_temperature'], prev_air_quality=block['prev_air_quality'],
+        model=get_predictor(entry, len(block['history'])),
+    )
+
+
+def _load_model(n_rows: int) -> int:
+    """Load (and compile) the regressor in a pool worker; returns its pid."""
+    get_predictor(get_registry().entry('surge_model'), n_rows)
+    return os.getpid()
+
+
+def start_workers(workers: int, n_rows: int) -> ProcessPoolExecutor:
+    """Start `workers` scoring processes with the model already loaded in each."""
+    # spawn: fork is unsafe once the model libraries have started threads
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+    list(pool.map(_load_model, [n_rows] * workers))
+    return pool
+
+
+def score_series(series: Dict[str, np.ndarray], start_dates: np.ndarray,
+                 pool: Optional[ProcessPoolExecutor] = None, workers: int = 1) -> np.ndarray:
+    """
+    Forecast every series, shape (S, horizon)
+
+    With a pool the series are split into `workers` blocks, one per process.
+    """
+    inputs = ('history', 'temperature', 'air_quality', 'prev_temperature', 'prev_air_quality',
+              'er_admissions', 'icu_admissions')
+    block = {name: series[name] for name in inputs}
+    block['start_date'] = start_dates
+    n_series = len(start_dates)
+
+    if pool is None or workers <= 1 or n_series < 2:
+        return _forecast_block(block)
+
+    splits = np.array_split(np.arange(n_series), min(workers, n_series))
+    blocks = [{name: values[idx] for name, values in block.items()} for idx in splits]
+    return np.concatenate(list(pool.map(_forecast_block, blocks)))
+
+
+def _ratio(numerator: int, denominator: int) -> Optional[float]:
+    return round(numerator / denominator, 4) if denominator else None
+
+
+def surge_scores(actual: np.ndarray, predicted: np.ndarray, surge_threshold: float) -> Dict[str, Any]:
+    """MAE, bias and surge-detection precision/recall (a surge is admissions > threshold)."""
+    error = predicted - actual
+    actual_surge = actual > surge_threshold
+    predicted_surge = predicted > surge_threshold
+    hits = int((actual_surge & predicted_surge).sum())
+    return {
+        'rows': int(actual.size),
+        'mae': round(float(np.abs(error).mean()), 2) if actual.size else None,
+        'bias': round(float(error.mean()), 2) if actual.size else None,
+        'actual_surge_days': int(actual_surge.sum()),
+        'predicted_surge_days': int(predicted_surge.sum()),
+        'true_positives': hits,
+        'precision': _ratio(hits, int(predicted_surge.sum())),
+        'recall': _ratio(hits, int(actual_surge.sum())),
+    }
+
+
+def run_backtest(history: pd.DataFrame, horizon: int = 7, step: int = 7, initial: int = WINDOW,
+                 surge_threshold: float = 184, workers: int = 1) -> Dict[str, Any]:
+    """
+    Rolling-origin backtest of the surge model
+
+    Args:
+        history: Daily history (see load_history / synthetic_history)
+        horizon (int): Days forecast from each origin
+        step (int): Days between origins
+        initial (int): Days of history before the first origin (at least 7)
+        surge_threshold (float): Admission level counted as a surge
+        workers (int): Processes to score on (1 = in process)
+
+    Returns:
+        dict with overall MAE, bias and surge precision/recall, the same per
+        lead day and per origin date, series/rows counts and throughput
+        (forecast rows scored per second)
+
+    Example:
+        report = run_backtest(load_history('history.csv'), horizon=7, step=7)
+        report['overall']['mae'], report['overall']['recall']
+    """
+    start = time.perf_counter()
+    timings: Dict[str, float] = {}
+
+    # ===== STEP 1: DAILY ARRAYS AND ORIGINS =====
+    arrays, calendar, hospitals = _daily_arrays(history)
+    origins = rolling_origins(len(calendar), horizon, step, initial)
+    if not len(origins):
+        raise ValueError(f"History covers {len(calendar)} days; need at least {initial + horizon}")
+    series = build_series(arrays, origins, horizon)
+    n_series = len(series['origin'])
+    if not n_series:
+        raise ValueError("Every origin has a missing day in its window")
+    timings['prepare_ms'] = (time.perf_counter() - start) * 1000
+
+    # Load the model (and start workers) up front so throughput is inference only
+    load_start = time.perf_counter()
+    model_entry = get_registry().entry('surge_model')
+    workers = max(1, min(workers, n_series))
+    block_rows = -(-n_series // workers)
+    pool = start_workers(workers, block_rows) if workers > 1 else None
+    get_predictor(model_entry, block_rows)
+    timings['load_model_ms'] = (time.perf_counter() - load_start) * 1000
+
+    # ===== STEP 2: SCORE (one model call per lead day across all series) =====
+    try:
+        score_start = time.perf_counter()
+        predicted = score_series(series, calendar[series['origin'] + 1], pool, workers)
+        score_seconds = time.perf_counter() - score_start
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    timings['score_ms'] = score_seconds * 1000
+
+    # ===== STEP 3: METRICS =====
+    actual = series['actual']
+    by_origin = []
+    for origin in np.unique(series['origin']):
+        rows = series['origin'] == origin
+        by_origin.append({'origin': str(calendar[origin]), 'hospitals': int(rows.sum()),
+                          **surge_scores(actual[rows], predicted[rows], surge_threshold)})
+    timings['total_ms'] = (time.perf_counter() - start) * 1000
+
+    return {
+        'history': {
+            'hospitals': len(hospitals),
+            'days': int(len(calendar)),
+            'first_date': str(calendar[0]),
+            'last_date': str(calendar[-1]),
+        },
+        'horizon_days': horizon,
+        'step_days': step,
+        'surge_threshold': round(float(surge_threshold), 1),
+        'origins': int(len(origins)),
+        'series': n_series,
+        'series_skipped': int(len(origins) * len(hospitals) - n_series),
+        'overall': surge_scores(actual, predicted, surge_threshold),
+        'by_lead_day': [{'lead_day': day + 1, **surge_scores(actual[:, day], predicted[:, day], surge_threshold)}
+                        for day in range(horizon)],
+        'by_origin': by_origin,
+        'throughput': {
+            'workers': int(workers),
+            'rows_scored': int(predicted.size),
+            'rows_per_second': round(predicted.size / score_seconds, 1) if score_seconds else None,
+        },
+        'timings': {k: round(v, 2) for k, v in timings.items()},
+        'model_info': {
+            'model_type': type(model_entry.model).__name__,
+            'model_version': model_entry.version,
+            'backtest_timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        }
+    }
+
+
+def _fmt(value: Optional[float], spec: str) -> str:
+    return '-' if value is None else format(value, spec)
+
+
+def _print_report(report: Dict[str, Any]) -> None:
+    h = report['history']
+    print(f"{h['hospitals']} hospital(s), {h['days']} days ({h['first_date']} .. {h['last_date']}); "
+          f"{report['origins']} origins every {report['step_days']}d, horizon {report['horizon_days']}d, "
+          f"{report['series']} series ({report['series_skipped']} skipped)")
+    print(f"\n{'lead day':<10}{'MAE':>8}{'bias':>8}{'precision':>11}{'recall':>8}{'surges':>8}")
+    for r in report['by_lead_day'] + [dict(report['overall'], lead_day='all')]:
+        print(f"{r['lead_day']!s:<10}{_fmt(r['mae'], '.2f'):>8}{_fmt(r['bias'], '+.2f'):>8}"
+              f"{_fmt(r['precision'], '.3f'):>11}{_fmt(r['recall'], '.3f'):>8}{r['actual_surge_days']:>8}")
+    t = report['throughput']
+    print(f"\nscored {t['rows_scored']} rows in {report['timings']['score_ms']:.1f} ms "
+          f"on {t['workers']} worker(s): {_fmt(t['rows_per_second'], ',.0f')} rows/s "
+          f"(surge threshold {report['surge_threshold']:g})")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Rolling-origin backtest of the surge model")
+    parser.add_argument('history', nargs='?', help="Daily history, .csv or .parquet")
+    parser.add_argument('--synthetic', type=int, metavar='DAYS', help="Use a synthetic history of DAYS days")
+    parser.add_argument('--hospitals', type=int, default=1, help="Hospitals in the synthetic history")
+    parser.add_argument('--horizon', type=int, default=7)
+    parser.add_argument('--step', type=int, default=7)
+    parser.add_argument('--initial', type=int, default=WINDOW)
+    parser.add_argument('--surge-threshold', type=float, default=184)
+    parser.add_argument('--workers', type=int, default=1,
+                        help=f"Scoring processes (this machine has {os.cpu_count()} CPUs)")
+    parser.add_argument('--json', help="Also write the full report to this file")
+    args = parser.parse_args(argv)
+
+    if (args.history is None) == (args.synthetic is None):
+        parser.error("pass a history file or --synthetic DAYS")
+    try:
+        history = (synthetic_history(args.synthetic, args.hospitals) if args.synthetic
+                   else load_history(args.history))
+        report = run_backtest(history, horizon=args.horizon, step=args.step, initial=args.initial,
+                              surge_threshold=args.surge_threshold, workers=args.workers)
+    except (OSError, ImportError, ValueError) as e:
+        print(f"Backtest failed: {e}", file=sys.stderr)
+        return 1
+    _print_report(report)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nSaved report to {args.json}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,315 @@
+"""
+Offline benchmark suite for the surge prediction tools
+
+Runs against the .pkl files in this package, no network needed:
+
+    cd Multi-Agent
+    python -m multi_tool_agent.benchmark --save benchmark_baseline.json
+    python -m multi_tool_agent.benchmark --compare benchmark_baseline.json
+
+With --compare, exits with status 1 if any case's p50 or p99 regressed past
+its threshold. The agent module's import time is also checked against
+--import-budget, and importing it must not pull in the scientific stack.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from .explain import clear_explainers, compute_shap_values
+from .features import REQUIRED_FEATURES, engineer_features
+from .model_registry import ModelRegistry, get_registry
+from .prediction import predict_batch, predict_from_features
+from .response_format import payload_report
+
+BASELINE_VERSION = 1
+
+# Seconds a fresh interpreter may spend importing multi_tool_agent.agent
+IMPORT_BUDGET_SECONDS = 1.5
+# Modules the lazy agent import must leave unloaded
+DEFERRED_MODULES = ('numpy', 'pandas', 'joblib', 'shap', 'mcp')
+
+_IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import multi_tool_agent.agent
+elapsed = time.perf_counter() - start
+print(json.dumps({'seconds': elapsed, 'loaded': [m for m in %r if m in sys.modules]}))
+"""
+
+
+def synthetic_feature_array(n: int, seed: int = 0) -> np.ndarray:
+    """
+    Random raw inputs within the documented ranges, shape (n, 13) in REQUIRED_FEATURES order
+    """
+    rng = np.random.default_rng(seed)
+    rolling7 = rng.uniform(100, 220, n)
+    day_of_week = rng.integers(0, 7, n)
+    columns = {
+        'temperature': rng.uniform(-5, 45, n),
+        'air_quality': rng.uniform(0, 500, n),
+        'admissions_lag1': rolling7 + rng.normal(0, 12, n),
+        'admissions_lag7': rolling7 + rng.normal(0, 12, n),
+        'admissions_rolling7': rolling7,
+        'admissions_rolling7_std': rng.uniform(2, 30, n),
+        'temp_change_1d': rng.uniform(-10, 10, n),
+        'aqi_change_1d': rng.uniform(-80, 80, n),
+        'er_admissions': rng.uniform(20, 90, n),
+        'icu_admissions': rng.uniform(5, 35, n),
+        'day_of_week': day_of_week,
+        'month': rng.integers(1, 13, n),
+        'is_weekend': (day_of_week >= 5).astype(int),
+    }
+    return np.column_stack([columns[f] for f in REQUIRED_FEATURES]).astype(np.float64)
+
+
+def synthetic_features(n: int, seed: int = 0) -> List[Dict[str, float]]:
+    """synthetic_feature_array as a list of feature dicts."""
+    rows = synthetic_feature_array(n, seed)
+    int_cols = {'day_of_week', 'month', 'is_weekend'}
+    return [
+        {f: int(v) if f in int_cols else float(v) for f, v in zip(REQUIRED_FEATURES, row)}
+        for row in rows
+    ]
+
+
+def measure(fn: Callable[[int], Any], iterations: int, warmup: int = 1, rows: int = 1) -> Dict[str, float]:
+    """Time `fn(i)` over `iterations` calls after `warmup` untimed calls."""
+    for i in range(warmup):
+        fn(i)
+    samples = np.empty(iterations)
+    for i in range(iterations):
+        start = time.perf_counter()
+        fn(i)
+        samples[i] = time.perf_counter() - start
+    return {
+        'iterations': iterations,
+        'rows': rows,
+        'p50_ms': round(float(np.percentile(samples, 50)) * 1000, 4),
+        'p99_ms': round(float(np.percentile(samples, 99)) * 1000, 4),
+        'mean_ms': round(float(samples.mean()) * 1000, 4),
+        'rows_per_sec': round(rows / float(np.median(samples)), 1),
+    }
+
+
+def measure_import(runs: int = 3) -> Dict[str, Any]:
+    """
+    Time `import multi_tool_agent.agent` in fresh interpreters
+
+    Returns:
+        p50/max seconds over the runs and any DEFERRED_MODULES the import loaded
+    """
+    package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    samples, loaded = [], set()
+    for _ in range(runs):
+        probe = subprocess.run(
+            [sys.executable, '-c', _IMPORT_PROBE % (DEFERRED_MODULES,)],
+            cwd=package_root, capture_output=True, text=True, check=True,
+        )
+        result = json.loads(probe.stdout.strip().splitlines()[-1])
+        samples.append(result['seconds'])
+        loaded.update(result['loaded'])
+    return {
+        'runs': runs,
+        'p50_seconds': round(float(np.median(samples)), 4),
+        'max_seconds': round(max(samples), 4),
+        'loaded_deferred_modules': sorted(loaded),
+    }
+
+
+def check_import_budget(result: Dict[str, Any], budget: float = IMPORT_BUDGET_SECONDS) -> List[str]:
+    """Problems with an import measurement (empty if within budget and nothing heavy was loaded)."""
+    problems = []
+    if result['p50_seconds'] > budget:
+        problems.append(f"agent import: p50 {result['p50_seconds']:.3f}s > budget {budget:.3f}s")
+    if result['loaded_deferred_modules']:
+        problems.append(f"agent import loaded deferred modules: {result['loaded_deferred_modules']}")
+    return problems
+
+
+def _cold_start(_: int) -> None:
+    registry = ModelRegistry()
+    entry = registry.entry('surge_model')
+    clear_explainers()
+    X_df = engineer_features(synthetic_feature_array(1))
+    entry.model.predict(X_df)
+    compute_shap_values(entry, X_df)
+
+
+def run_benchmarks(quick: bool = False, include_historical: bool = True) -> Dict[str, Any]:
+    """
+    Run every benchmark case
+
+    Cases: cold start vs warm model, single row with/without SHAP and as JSON
+    vs dict, cache hits, the 'summary' detail tier, the classifier cascade's two stages, batches of
+    1/100/10k rows with and without SHAP, and get_historical_data queries. Also reports one
+    prediction's payload bytes and approximate tokens per detail tier.
+
+    Args:
+        quick: Fewer iterations (for CI smoke runs)
+        include_historical: Also benchmark get_historical_data (imports the agent module)
+
+    Returns:
+        Results dict in the baseline file format
+    """
+    scale = 0.2 if quick else 1.0
+
+    def n(iterations: int) -> int:
+        return max(3, int(iterations * scale))
+
+    singles = synthetic_features(512, seed=1)
+    batches = {size: synthetic_feature_array(size, seed=size) for size in (1, 100, 10_000)}
+    cases: Dict[str, Dict[str, float]] = {}
+
+    cases['cold_start'] = measure(_cold_start, n(5), warmup=0)
+    # Warm the process-wide registry and explainer for everything below
+    get_registry().preload(['surge_model'])
+    predict_from_features(singles[0], use_cache=False)
+
+    def single(**kwargs):
+        return lambda i: predict_from_features(singles[i % len(singles)], use_cache=False, **kwargs)
+
+    cases['single_shap_json'] = measure(single(return_json=True), n(200))
+    cases['single_shap_dict'] = measure(single(return_json=False), n(200))
+    cases['single_noshap_json'] = measure(single(return_json=True, explain=False), n(200))
+    cases['single_noshap_dict'] = measure(single(return_json=False, explain=False), n(200))
+    cases['single_topk_json'] = measure(single(return_json=True, top_k_only=True), n(200))
+    cases['single_cache_hit_json'] = measure(lambda i: predict_from_features(singles[0]), n(500))
+    cases['single_summary_json'] = measure(single(return_json=True, detail='summary'), n(200))
+    payload = payload_report(predict_from_features(singles[0], use_cache=False, return_json=False))
+
+    # Cascade: rows the classifier answers alone vs rows escalated to regressor + SHAP
+    from .cascade import CASCADE_THRESHOLD, predict_cascade, surge_probability
+    probabilities = surge_probability(singles)
+    for stage, rows in (('classifier', [r for r, p in zip(singles, probabilities) if p < CASCADE_THRESHOLD]),
+                        ('regressor', [r for r, p in zip(singles, probabilities) if p >= CASCADE_THRESHOLD])):
+        if rows:
+            cases[f'cascade_{stage}_json'] = measure(
+                lambda i, rows=rows: predict_cascade(rows[i % len(rows)], use_cache=False), n(200))
+
+    for size, rows in batches.items():
+        iterations = n(100) if size < 10_000 else n(10)
+        cases[f'batch_{size}_noshap_dict'] = measure(
+            lambda i, rows=rows: predict_batch(rows), iterations, rows=size)
+        cases[f'batch_{size}_noshap_json'] = measure(
+            lambda i, rows=rows: predict_batch(rows, return_json=True), iterations, rows=size)
+        shap_iterations = iterations if size < 10_000 else n(3)
+        cases[f'batch_{size}_shap_dict'] = measure(
+            lambda i, rows=rows: predict_batch(rows, explain=True), shap_iterations, rows=size)
+
+    if include_historical:
+        from .agent import get_historical_data
+        queries = [
+            {}, {'month': 11}, {'month': 3, 'disease_type': 'skin'},
+            {'festival': 'Diwali'}, {'disease_type': 'respiratory'},
+        ]
+        cases['historical_query'] = measure(lambda i: get_historical_data(**queries[i % len(queries)]), n(500))
+
+    return {
+        'version': BASELINE_VERSION,
+        'meta': {
+            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'model_version': get_registry().version('surge_model'),
+            'quick': quick,
+        },
+        'cases': cases,
+        'payload': payload,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], p50_threshold: float = 0.25,
+            p99_threshold: float = 0.5) -> List[str]:
+    """
+    Regressions of `current` against `baseline`
+
+    A case regresses when its p50 grew by more than `p50_threshold` (0.25 = 25%)
+    or its p99 by more than `p99_threshold`.
+
+    Returns:
+        One message per regression (empty if none)
+    """
+    regressions = []
+    for name, base in baseline.get('cases', {}).items():
+        now = current['cases'].get(name)
+        if now is None:
+            continue
+        for metric, threshold in (('p50_ms', p50_threshold), ('p99_ms', p99_threshold)):
+            limit = base[metric] * (1 + threshold)
+            if now[metric] > limit:
+                regressions.append(
+                    f"{name}: {metric} {now[metric]:.3f} > {limit:.3f} "
+                    f"(baseline {base[metric]:.3f}, +{threshold:.0%} allowed)"
+                )
+    return regressions
+
+
+def _print_table(results: Dict[str, Any]) -> None:
+    print(f"{'case':<28}{'p50 ms':>12}{'p99 ms':>12}{'rows/s':>14}")
+    for name, r in results['cases'].items():
+        print(f"{name:<28}{r['p50_ms']:>12.3f}{r['p99_ms']:>12.3f}{r['rows_per_sec']:>14.1f}")
+
+
+def _print_payload(payload: Dict[str, Dict[str, Any]]) -> None:
+    full = payload['full_indent']
+    print(f"\n{'payload tier':<28}{'json bytes':>12}{'~tokens':>12}{'msgpack':>14}{'vs indent':>11}")
+    for tier, r in payload.items():
+        msgpack_bytes = '-' if r['msgpack_bytes'] is None else r['msgpack_bytes']
+        print(f"{tier:<28}{r['json_bytes']:>12}{r['tokens']:>12}{msgpack_bytes:>14}"
+              f"{r['tokens'] / full['tokens']:>10.0%}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the surge prediction tools")
+    parser.add_argument('--save', help="Write results to this baseline file")
+    parser.add_argument('--compare', help="Baseline file to check for regressions")
+    parser.add_argument('--p50-threshold', type=float, default=0.25)
+    parser.add_argument('--p99-threshold', type=float, default=0.5)
+    parser.add_argument('--quick', action='store_true', help="Fewer iterations")
+    parser.add_argument('--no-historical', action='store_true', help="Skip get_historical_data")
+    parser.add_argument('--import-budget', type=float, default=IMPORT_BUDGET_SECONDS,
+                        help="Max seconds for importing the agent module")
+    args = parser.parse_args(argv)
+
+    import_result = measure_import()
+    results = run_benchmarks(quick=args.quick, include_historical=not args.no_historical)
+    results['import'] = import_result
+    _print_table(results)
+    _print_payload(results['payload'])
+    print(f"\nagent import: p50 {import_result['p50_seconds']:.3f}s "
+          f"(budget {args.import_budget:.3f}s), max {import_result['max_seconds']:.3f}s")
+
+    failed = False
+    for problem in check_import_budget(import_result, args.import_budget):
+        print(f"  ✗ {problem}")
+        failed = True
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nSaved results to {args.save}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.p50_threshold, args.p99_threshold)
+        if regressions:
+            print("\nREGRESSIONS:")
+            for message in regressions:
+                print(f"  ✗ {message}")
+            return 1
+        print(f"\n✓ No regressions against {args.compare}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,335 @@
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .compiled_trees import get_predictor
+from .features import FeatureRows, engineer_array
+from .metrics import metrics
+from .model_registry import get_registry
+from .prediction import predict_from_features
+from .response_format import DETAIL_LEVELS, shape_output, to_json
+
+logger = logging.getLogger(__name__)
+
+# Calibrated surge probability at or above which the regressor and SHAP run
+# (0.05 escalates about half of requests and catches ~98% of surges, see threshold_tradeoff)
+CASCADE_THRESHOLD = float(os.environ.get('SURGE_CASCADE_THRESHOLD', '0.05'))
+
+# Synthetic rows scored by both models to calibrate the classifier (half held out)
+CALIBRATION_ROWS = 20_000
+CALIBRATION_SEED = 184
+
+CASCADE_STAGE_SECONDS = 'surge_cascade_stage_seconds'
+metrics.describe(CASCADE_STAGE_SECONDS, 'Latency of each surge cascade stage')
+metrics.describe('surge_cascade_requests_total', 'Cascade predictions by the stage that answered')
+
+_EPS = 1e-7
+
+
+def _logit(p: np.ndarray) -> np.ndarray:
+    p = np.clip(np.asarray(p, dtype=np.float64), _EPS, 1 - _EPS)
+    return np.log(p / (1 - p))
+
+
+def _platt(raw_probability, slope: float, intercept: float) -> np.ndarray:
+    return 1 / (1 + np.exp(-(slope * _logit(raw_probability) + intercept)))
+
+
+def _fit_platt(score: np.ndarray, y: np.ndarray, iterations: int = 100) -> Tuple[float, float]:
+    """Fit P(y) = sigmoid(a * score + b) by Newton's method with step halving."""
+    def loss(params: np.ndarray) -> float:
+        z = params[0] * score + params[1]
+        # -log-likelihood, written to stay finite for large |z|
+        return float(np.sum(np.logaddexp(0, z) - y * z))
+
+    params = np.array([1.0, 0.0])
+    current = loss(params)
+    for _ in range(iterations):
+        p = 1 / (1 + np.exp(-(params[0] * score + params[1])))
+        w = p * (1 - p)
+        gradient = np.array([np.sum((p - y) * score), np.sum(p - y)])
+        hessian = np.array([[np.sum(w * score * score), np.sum(w * score)],
+                            [np.sum(w * score), np.sum(w)]]) + 1e-9 * np.eye(2)
+        step = np.linalg.solve(hessian, gradient)
+        scale = 1.0
+        while scale > 1e-6 and loss(params - scale * step) > current:
+            scale /= 2
+        params = params - scale * step
+        previous, current = current, loss(params)
+        if previous - current < 1e-10:
+            break
+    return float(params[0]), float(params[1])
+
+
+@dataclass(frozen=True)
+class Calibration:
+    """
+    Platt scaling of the classifier's score to P(surge)
+
+    "Surge" is the regressor's own call (predicted admissions > surge_threshold),
+    so the probability says how likely the full model is to raise the alert.
+    Quality is measured on held-out rows: Brier score before/after calibration.
+    """
+    slope: float
+    intercept: float
+    surge_threshold: float
+    classifier_version: str
+    surge_model_version: str
+    rows: int
+    surge_rate: float
+    brier: float
+    brier_uncalibrated: float
+
+    def apply(self, raw_probability) -> np.ndarray:
+        """Calibrated probabilities for the classifier's raw positive-class probabilities."""
+        return _platt(raw_probability, self.slope, self.intercept)
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            'method': 'platt',
+            'target': f'predicted_admissions > {self.surge_threshold:g}',
+            'rows': self.rows,
+            'surge_rate': round(self.surge_rate, 4),
+            'brier': round(self.brier, 4),
+            'brier_uncalibrated': round(self.brier_uncalibrated, 4),
+            'classifier_version': self.classifier_version,
+        }
+
+
+# (classifier version, surge model version, surge threshold) -> Calibration
+_calibrations: Dict[Tuple[str, str, float], Calibration] = {}
+_calibration_lock = threading.Lock()
+
+
+def _calibration_rows(n: int, seed: int) -> np.ndarray:
+    from .benchmark import synthetic_feature_array
+    return engineer_array(synthetic_feature_array(n, seed=seed))
+
+
+def get_calibration(surge_threshold: float = 184) -> Calibration:
+    """
+    Return the classifier calibration for the loaded models and surge threshold
+
+    Fitted once per (classifier version, surge model version, threshold):
+    CALIBRATION_ROWS synthetic rows are scored by both models, the first
+    half fits the Platt parameters and the second half measures them.
+    """
+    registry = get_registry()
+    classifier = registry.entry('classifier')
+    surge_model = registry.entry('surge_model')
+    key = (classifier.version, surge_model.version, float(surge_threshold))
+    cached = _calibrations.get(key)
+    if cached is not None:
+        return cached
+
+    with _calibration_lock:
+        cached = _calibrations.get(key)
+        if cached is not None:
+            return cached
+        start = time.perf_counter()
+        X = _calibration_rows(CALIBRATION_ROWS, CALIBRATION_SEED)
+        surge = (np.asarray(get_predictor(surge_model, len(X)).predict(X)) > surge_threshold).astype(np.float64)
+        raw = np.asarray(get_predictor(classifier, len(X)).predict_proba(X)[:, 1], dtype=np.float64)
+
+        half = CALIBRATION_ROWS // 2
+        slope, intercept = _fit_platt(_logit(raw[:half]), surge[:half])
+        held_out, held_out_surge = raw[half:], surge[half:]
+        calibration = Calibration(
+            slope=slope, intercept=intercept, surge_threshold=float(surge_threshold),
+            classifier_version=classifier.version, surge_model_version=surge_model.version,
+            rows=CALIBRATION_ROWS, surge_rate=float(surge.mean()),
+            brier=float(np.mean((_platt(held_out, slope, intercept) - held_out_surge) ** 2)),
+            brier_uncalibrated=float(np.mean((held_out - held_out_surge) ** 2)),
+        )
+        # Drop calibrations for model versions that have since been reloaded
+        for stale in [k for k in _calibrations if k[:2] != key[:2]]:
+            del _calibrations[stale]
+        _calibrations[key] = calibration
+        logger.info("Calibrated surge classifier in %.2fs: %s", time.perf_counter() - start, calibration.info())
+        return calibration
+
+
+def start_calibration(surge_threshold: float = 184) -> threading.Thread:
+    """
+    Fit the calibration in a daemon thread so the first cascade call does not pay for it
+
+    A cascade call arriving mid-fit waits on the same lock instead of fitting again.
+    """
+    def run() -> None:
+        try:
+            get_calibration(surge_threshold)
+        except Exception as e:
+            logger.warning("Background cascade calibration failed: %s", e)
+
+    thread = threading.Thread(target=run, name='cascade-calibration', daemon=True)
+    thread.start()
+    return thread
+
+
+def surge_probability(rows: FeatureRows, surge_threshold: float = 184) -> np.ndarray:
+    """
+    Calibrated P(surge) for one or many feature rows, from the classifier alone
+
+    Args:
+        rows: Feature dict(s), DataFrame or ndarray (see engineer_features)
+        surge_threshold: Admission level considered a surge
+
+    Returns:
+        Array of probabilities, one per row
+    """
+    X = engineer_array(rows)
+    classifier = get_predictor(get_registry().entry('classifier'), len(X))
+    raw = classifier.predict_proba(X)[:, 1]
+    return get_calibration(surge_threshold).apply(raw)
+
+
+def threshold_tradeoff(thresholds: Sequence[float] = (0.02, 0.05, 0.1, 0.2, 0.3, 0.5),
+                       surge_threshold: float = 184) -> Dict[str, Any]:
+    """
+    Share of requests escalated to the regressor, and of surges caught, per probability threshold
+
+    Measured on the held-out calibration rows; use it to pick SURGE_CASCADE_THRESHOLD.
+    """
+    registry = get_registry()
+    calibration = get_calibration(surge_threshold)
+    X = _calibration_rows(CALIBRATION_ROWS, CALIBRATION_SEED)[CALIBRATION_ROWS // 2:]
+    surge = np.asarray(registry.get('surge_model').predict(X)) > surge_threshold
+    probability = calibration.apply(registry.get('classifier').predict_proba(X)[:, 1])
+    return {
+        'rows': int(len(X)),
+        'surge_rate': round(float(surge.mean()), 4),
+        'thresholds': [
+            {
+                'threshold': float(t),
+                'escalated': round(float((probability >= t).mean()), 4),
+                'surge_recall': round(float((probability >= t)[surge].mean()), 4) if surge.any() else None,
+            }
+            for t in thresholds
+        ],
+    }
+
+
+def predict_cascade(features, probability_threshold: Optional[float] = None, full_explanation: bool = False,
+                    baseline=150, surge_threshold=184, return_json=True, top_k_only=False, top_k=5,
+                    use_cache=True, detail='full'):
+    """
+    Two-stage surge prediction: cheap classifier first, regressor + SHAP only when needed
+
+    The surge classifier scores a calibrated surge probability. Below
+    `probability_threshold` the classifier answers on its own (no admission
+    count, no explanation); at or above it, or with full_explanation=True,
+    predict_from_features runs the regression and SHAP as usual.
+
+    Args:
+        features: Feature dictionary for one day (same keys as predict_from_features;
+            lists and DataFrames are rejected, use surge_probability for many rows)
+        probability_threshold (float): Calibrated probability that escalates to the
+            regressor (default SURGE_CASCADE_THRESHOLD, 0.05)
+        full_explanation (bool): Always run the regressor and SHAP
+        baseline (float): Historical average admissions (for comparison)
+        surge_threshold (float): Admission level considered a surge
+        return_json (bool): Return JSON string vs dict
+        top_k_only, top_k, use_cache: Passed to predict_from_features
+        detail (str): Verbosity tier (see response_format); at 'minimal' and
+            'summary' the cascade block is reduced to cascade_stage
+
+    Returns:
+        predict_from_features' output plus 'surge_probability' and 'cascade'
+        ({stage: 'classifier' | 'regressor', reason, probability_threshold,
+        calibration}). When the classifier answers, predicted_admissions and
+        difference_from_baseline are None, surge_alert is False and there are
+        no SHAP factors. None if the features or detail are invalid.
+
+    Example:
+        result = predict_cascade(features, probability_threshold=0.2, return_json=False)
+        result['cascade']['stage']      # 'classifier'
+        result['surge_probability']     # 0.03
+    """
+    threshold = CASCADE_THRESHOLD if probability_threshold is None else float(probability_threshold)
+    start = time.perf_counter()
+    if detail not in DETAIL_LEVELS:
+        logger.warning("Cascade rejected unknown detail level %r", detail)
+        return None
+    if not isinstance(features, dict):
+        logger.warning("Cascade rejected input: expected one feature dict, got %s", type(features).__name__)
+        metrics.inc('surge_prediction_errors_total', stage='features')
+        return None
+
+    # ===== STAGE 1: CLASSIFIER =====
+    probability = None
+    calibration = None
+    try:
+        with metrics.timer(CASCADE_STAGE_SECONDS, stage='classifier'):
+            X = engineer_array(features)
+            classifier_entry = get_registry().entry('classifier')
+            raw = get_predictor(classifier_entry).predict_proba(X)[:, 1]
+            calibration = get_calibration(surge_threshold)
+            probability = float(calibration.apply(raw)[0])
+    except ValueError as e:
+        logger.warning("Cascade rejected input: %s", e)
+        metrics.inc('surge_prediction_errors_total', stage='features')
+        return None
+    except Exception as e:
+        # No classifier: behave like predict_from_features
+        logger.warning("Surge classifier unavailable, running the full model: %s", e)
+
+    if full_explanation:
+        reason = 'full explanation requested'
+    elif probability is None:
+        reason = 'classifier unavailable'
+    elif probability >= threshold:
+        reason = f'surge probability {probability:.3f} >= {threshold:g}'
+    else:
+        reason = None
+
+    cascade = {
+        'stage': 'classifier' if reason is None else 'regressor',
+        'reason': reason or f'surge probability {probability:.3f} < {threshold:g}',
+        'probability_threshold': threshold,
+        'calibration': calibration.info() if calibration is not None else None,
+    }
+
+    # ===== STAGE 2: REGRESSOR + SHAP (escalated requests only) =====
+    if reason is not None:
+        with metrics.timer(CASCADE_STAGE_SECONDS, stage='regressor'):
+            output = predict_from_features(features, baseline=baseline, surge_threshold=surge_threshold,
+                                           return_json=False, top_k_only=top_k_only, top_k=top_k,
+                                           use_cache=use_cache, explain=True)
+        if output is None:
+            return None
+    else:
+        output = {
+            'predicted_admissions': None,
+            'baseline_average': round(float(baseline), 1),
+            'difference_from_baseline': None,
+            'surge_alert': False,
+            'surge_threshold': round(float(surge_threshold), 1),
+            'confidence': 'moderate',
+            'top_positive_factors': [],
+            'top_negative_factors': [],
+            'shap_metadata': {'base_value': None, 'total_positive_impact': None,
+                              'total_negative_impact': None, 'shap_available': False},
+            'input_features': {k: round(float(v), 2) if isinstance(v, (int, float)) else v
+                               for k, v in features.items()},
+            'model_info': {
+                'model_type': type(classifier_entry.model).__name__,
+                'model_version': classifier_entry.version,
+                'model_loaded_at': classifier_entry.loaded_at.strftime('%Y-%m-%d %H:%M:%S'),
+                'prediction_timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            },
+        }
+
+    output['surge_probability'] = round(probability, 4) if probability is not None else None
+    output['cascade'] = cascade
+    metrics.inc('surge_cascade_requests_total', stage=cascade['stage'])
+    metrics.observe(CASCADE_STAGE_SECONDS, time.perf_counter() - start, stage='total')
+
+    if return_json:
+        return to_json(output, detail)
+    return shape_output(output, detail)
@@ -0,0 +1,560 @@
+"""
+Compiled tree-ensemble evaluator for the surge models
+
+The gradient-boosted trees in hospital_surge_model.pkl (LightGBM) and
+surge_classifier.pkl (XGBoost) are flattened into contiguous node arrays
+(split feature, threshold, left/right child, leaf value) and evaluated with a
+handful of vectorized numpy gathers per tree level, so single-row predictions
+skip the sklearn/pandas/DMatrix predict overhead.
+
+Check parity against the pickled model (and optionally export the arrays):
+
+    cd Multi-Agent
+    python -m multi_tool_agent.compiled_trees --rows 5000 --export surge_model_trees.npz
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .features import FEATURE_COLS
+from .metrics import metrics
+from .model_registry import LoadedModel
+
+logger = logging.getLogger(__name__)
+
+# Set SURGE_COMPILED_TREES=0 to predict with the pickled model's own predict()
+COMPILED_TREES = os.environ.get('SURGE_COMPILED_TREES', '1') == '1'
+
+# Largest |compiled - original| accepted by the parity checks
+PARITY_ATOL = 1e-9
+# XGBoost evaluates in float32 (its sigmoid may differ from numpy's by an ulp)
+FLOAT32_PARITY_ATOL = 1e-6
+# Rows checked every time a model version is compiled for serving
+COMPILE_CHECK_ROWS = 256
+# Bigger batches go to the model's own multi-threaded predict (see get_predictor)
+COMPILED_MAX_ROWS = 1024
+# Large batches are walked in blocks of this many rows so the per-level
+# (n_trees, rows) index arrays stay cache-sized
+BLOCK_ROWS = 512
+
+# LightGBM objectives whose raw score is the prediction (no output transform)
+_IDENTITY_OBJECTIVES = {'regression', 'regression_l1', 'huber', 'fair', 'quantile', 'mape'}
+
+# XGBoost objective -> output transform applied to the summed margin
+_XGBOOST_LINKS = {'reg:squarederror': 'identity', 'reg:absoluteerror': 'identity',
+                  'reg:logistic': 'logistic', 'binary:logistic': 'logistic'}
+
+# Missing-value handling per node (LightGBM missing_type; XGBoost nodes are all NaN)
+MISSING_NONE, MISSING_ZERO, MISSING_NAN = 0, 1, 2
+_MISSING_TYPES = {'None': MISSING_NONE, 'Zero': MISSING_ZERO, 'NaN': MISSING_NAN}
+_ZERO_THRESHOLD = 1e-35
+
+COMPILE_SECONDS = 'compiled_trees_compile_seconds'
+metrics.describe(COMPILE_SECONDS, 'Time to flatten and parity-check a tree ensemble')
+
+
+@dataclass
+class CompiledEnsemble:
+    """
+    A tree ensemble as flat node arrays
+
+    Every tree's nodes live in the same arrays; `roots` holds each tree's
+    first node. Leaves point to themselves (left == right == own index), so a
+    fixed number of descent steps (`max_depth`) lands every row on its leaf
+    without per-row branching.
+
+    Attributes:
+        feature: Split feature column per node (0 for leaves), int32
+        threshold: Split threshold per node; rows with x <= threshold go left
+            (x < threshold if `strict`)
+        left, right: Child node indices, int32
+        value: Leaf output per node (0 for internal nodes)
+        default_left: Direction for missing values per node
+        missing_type: MISSING_NONE / MISSING_ZERO / MISSING_NAN per node
+        roots: Root node index per tree
+        max_depth: Deepest root-to-leaf path
+        n_features: Expected input columns
+        base_score: Margin the leaf values are added to
+        source: Original model type, e.g. 'LGBMRegressor'
+        strict: Split test is x < threshold (XGBoost) instead of x <= threshold
+        float32: Compare and accumulate in float32, as XGBoost does
+        link: 'identity', or 'logistic' for a probability output
+    """
+    feature: np.ndarray
+    threshold: np.ndarray
+    left: np.ndarray
+    right: np.ndarray
+    value: np.ndarray
+    default_left: np.ndarray
+    missing_type: np.ndarray
+    roots: np.ndarray
+    max_depth: int
+    n_features: int
+    base_score: float = 0.0
+    source: str = ''
+    strict: bool = False
+    float32: bool = False
+    link: str = 'identity'
+    # No node treats NaN as missing: NaN is compared as 0.0 (LightGBM missing_type None)
+    _nan_as_zero: bool = field(init=False, repr=False, default=True)
+    # Some node treats 0.0 as missing (LightGBM missing_type Zero)
+    _zero_missing: bool = field(init=False, repr=False, default=False)
+
+    def __post_init__(self):
+        self._nan_as_zero = not np.any(self.missing_type != MISSING_NONE)
+        self._zero_missing = bool(np.any(self.missing_type == MISSING_ZERO))
+        if self.link not in ('identity', 'logistic'):
+            raise ValueError(f"Unknown link {self.link!r}")
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.feature)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, name).nbytes for name in _ARRAY_FIELDS)
+
+    def leaves(self, X) -> np.ndarray:
+        """Leaf node index reached in every tree, shape (n_trees, n_rows)."""
+        X = np.ascontiguousarray(X, dtype=np.float32 if self.float32 else np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        n_rows, n_cols = X.shape
+        if n_cols != self.n_features:
+            raise ValueError(f"Expected {self.n_features} feature columns, got {n_cols}")
+
+        flat = X.ravel()
+        isnan = np.isnan(flat)
+        has_nan = bool(isnan.any())
+        if has_nan and self._nan_as_zero:
+            flat = np.where(isnan, 0.0, flat).astype(flat.dtype)
+            has_nan = False
+        check_missing = has_nan or self._zero_missing
+        split = np.less if self.strict else np.less_equal
+        # Offset of each row's first column in the flattened matrix
+        row_offset = np.arange(n_rows, dtype=np.intp) * n_cols
+
+        node = np.repeat(self.roots[:, None], n_rows, axis=1)
+        for _ in range(self.max_depth):
+            x = flat.take(row_offset + self.feature.take(node))
+            go_left = split(x, self.threshold.take(node))
+            if check_missing:
+                go_left = self._missing_direction(node, x, go_left, split)
+            node = np.where(go_left, self.left.take(node), self.right.take(node))
+        return node
+
+    def _missing_direction(self, node: np.ndarray, x: np.ndarray, go_left: np.ndarray, split) -> np.ndarray:
+        missing_type = self.missing_type.take(node)
+        isnan = np.isnan(x)
+        x = np.where(isnan & (missing_type != MISSING_NAN), 0.0, x)
+        missing = ((missing_type == MISSING_NAN) & isnan) | \
+                  ((missing_type == MISSING_ZERO) & (np.abs(x) <= _ZERO_THRESHOLD))
+        go_left = np.where(isnan, split(x, self.threshold.take(node)), go_left)
+        return np.where(missing, self.default_left.take(node), go_left)
+
+    def _margin(self, X: np.ndarray) -> np.ndarray:
+        leaf_values = self.value.take(self.leaves(X))
+        if self.float32:
+            # XGBoost starts from the base margin and adds each tree in float32
+            base = np.full((1, leaf_values.shape[1]), self.base_score, dtype=np.float32)
+            return np.concatenate([base, leaf_values]).sum(axis=0, dtype=np.float32)
+        # Reducing over axis 0 adds tree by tree, in tree order
+        return leaf_values.sum(axis=0) + self.base_score
+
+    def predict_margin(self, X) -> np.ndarray:
+        """Summed tree output before the link function, shape (n_rows,)."""
+        X = np.atleast_2d(np.asarray(X))
+        if len(X) <= BLOCK_ROWS:
+            return self._margin(X)
+        return np.concatenate([self._margin(X[i:i + BLOCK_ROWS]) for i in range(0, len(X), BLOCK_ROWS)])
+
+    def predict(self, X) -> np.ndarray:
+        """
+        Predictions for an engineered (n_rows, n_features) matrix
+
+        Accepts an ndarray or a FEATURE_COLS DataFrame. Trees are summed in
+        order, as the original model does, so results match it exactly.
+        Logistic models return the positive-class probability.
+        """
+        margin = self.predict_margin(X)
+        if self.link == 'logistic':
+            one = margin.dtype.type(1)
+            return one / (one + np.exp(-margin))
+        return margin
+
+    def predict_proba(self, X) -> np.ndarray:
+        """[P(negative), P(positive)] per row, like a fitted classifier, shape (n_rows, 2)."""
+        if self.link != 'logistic':
+            raise AttributeError("predict_proba needs a logistic model")
+        positive = self.predict(X)
+        return np.column_stack([1 - positive, positive])
+
+    def save(self, path: str) -> None:
+        """Write the arrays and metadata to an .npz file."""
+        meta = {'max_depth': self.max_depth, 'n_features': self.n_features,
+                'base_score': self.base_score, 'source': self.source,
+                'strict': self.strict, 'float32': self.float32, 'link': self.link}
+        np.savez(path, meta=np.array(json.dumps(meta)),
+                 **{name: getattr(self, name) for name in _ARRAY_FIELDS})
+
+    @classmethod
+    def load(cls, path: str) -> 'CompiledEnsemble':
+        """Read an ensemble written by save()."""
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data['meta']))
+            arrays = {name: data[name] for name in _ARRAY_FIELDS}
+        return cls(**arrays, **meta)
+
+
+_ARRAY_FIELDS = ('feature', 'threshold', 'left', 'right', 'value', 'default_left', 'missing_type', 'roots')
+
+
+class _NodeBuffer:
+    """Growable per-node columns used while flattening trees."""
+
+    def __init__(self):
+        self.feature: List[int] = []
+        self.threshold: List[float] = []
+        self.left: List[int] = []
+        self.right: List[int] = []
+        self.value: List[float] = []
+        self.default_left: List[bool] = []
+        self.missing_type: List[int] = []
+
+    def add(self) -> int:
+        index = len(self.feature)
+        self.feature.append(0)
+        self.threshold.append(0.0)
+        self.left.append(index)
+        self.right.append(index)
+        self.value.append(0.0)
+        self.default_left.append(True)
+        self.missing_type.append(MISSING_NONE)
+        return index
+
+
+def _flatten_lightgbm_tree(buffer: _NodeBuffer, root: Dict[str, Any]) -> Tuple[int, int]:
+    """Append one dumped LightGBM tree to `buffer`; returns (root index, depth)."""
+    root_index = buffer.add()
+    stack = [(root, root_index, 0)]
+    depth = 0
+    while stack:
+        node, index, level = stack.pop()
+        if 'leaf_value' in node:
+            buffer.value[index] = float(node['leaf_value'])
+            depth = max(depth, level)
+            continue
+        if node.get('decision_type') != '<=':
+            raise ValueError(f"Unsupported split type {node.get('decision_type')!r} (categorical splits)")
+        buffer.feature[index] = int(node['split_feature'])
+        buffer.threshold[index] = float(node['threshold'])
+        buffer.default_left[index] = bool(node.get('default_left', True))
+        buffer.missing_type[index] = _MISSING_TYPES[node.get('missing_type', 'None')]
+        left, right = buffer.add(), buffer.add()
+        buffer.left[index], buffer.right[index] = left, right
+        stack.append((node['left_child'], left, level + 1))
+        stack.append((node['right_child'], right, level + 1))
+    return root_index, depth
+
+
+def compile_lightgbm(model) -> CompiledEnsemble:
+    """Flatten a fitted LGBMRegressor (or lightgbm.Booster) into a CompiledEnsemble."""
+    booster = getattr(model, 'booster_', model)
+    best_iteration = getattr(model, 'best_iteration_', None)
+    dump = booster.dump_model(num_iteration=best_iteration or None)
+
+    objective = str(dump.get('objective', '')).split()[0]
+    if objective not in _IDENTITY_OBJECTIVES:
+        raise ValueError(f"Unsupported LightGBM objective {objective!r}")
+    if dump.get('num_tree_per_iteration', 1) != 1 or dump.get('average_output'):
+        raise ValueError("Only single-output, non-averaged LightGBM models can be compiled")
+
+    buffer = _NodeBuffer()
+    roots, max_depth = [], 0
+    for tree in dump['tree_info']:
+        root, depth = _flatten_lightgbm_tree(buffer, tree['tree_structure'])
+        roots.append(root)
+        max_depth = max(max_depth, depth)
+
+    return CompiledEnsemble(
+        feature=np.asarray(buffer.feature, dtype=np.int32),
+        threshold=np.asarray(buffer.threshold, dtype=np.float64),
+        left=np.asarray(buffer.left, dtype=np.int32),
+        right=np.asarray(buffer.right, dtype=np.int32),
+        value=np.asarray(buffer.value, dtype=np.float64),
+        default_left=np.asarray(buffer.default_left, dtype=bool),
+        missing_type=np.asarray(buffer.missing_type, dtype=np.int8),
+        roots=np.asarray(roots, dtype=np.int32),
+        max_depth=max_depth,
+        n_features=int(dump['max_feature_idx']) + 1,
+        source=type(model).__name__,
+    )
+
+
+def compile_xgboost(model) -> CompiledEnsemble:
+    """Flatten a fitted XGBClassifier/XGBRegressor (or xgboost.Booster) into a CompiledEnsemble."""
+    booster = model.get_booster() if hasattr(model, 'get_booster') else model
+    learner = json.loads(booster.save_raw('json'))['learner']
+    objective = learner['objective']['name']
+    if objective not in _XGBOOST_LINKS:
+        raise ValueError(f"Unsupported XGBoost objective {objective!r}")
+    gbm = learner['gradient_booster']
+    if gbm['name'] != 'gbtree' or int(gbm['model']['gbtree_model_param'].get('num_parallel_tree', 1)) != 1:
+        raise ValueError(f"Only gbtree models without parallel trees can be compiled, got {gbm['name']}")
+    if int(learner['learner_model_param'].get('num_target', 1)) != 1:
+        raise ValueError("Only single-target XGBoost models can be compiled")
+
+    link = _XGBOOST_LINKS[objective]
+    # Stored as '[5.578923E-1]' (xgboost >= 2) or '5.578923E-1'; probability space for logistic
+    base = np.float32(learner['learner_model_param']['base_score'].strip('[]'))
+    base_margin = np.log(base / (np.float32(1) - base)) if link == 'logistic' else base
+
+    trees = gbm['model']['trees']
+    best_iteration = getattr(model, 'best_iteration', None)
+    if best_iteration is not None:
+        trees = trees[:best_iteration + 1]
+
+    columns = {name: [] for name in ('feature', 'threshold', 'left', 'right', 'value', 'default_left')}
+    roots, max_depth, offset = [], 0, 0
+    for tree in trees:
+        if any(tree['split_type']):
+            raise ValueError("Unsupported split type (categorical splits)")
+        left = np.asarray(tree['left_children'], dtype=np.int64)
+        right = np.asarray(tree['right_children'], dtype=np.int64)
+        conditions = np.asarray(tree['split_conditions'], dtype=np.float32)
+        is_leaf = left == -1
+        own = np.arange(len(left)) + offset
+
+        columns['feature'].append(np.where(is_leaf, 0, tree['split_indices']))
+        # XGBoost keeps leaf values in split_conditions
+        columns['threshold'].append(np.where(is_leaf, 0, conditions))
+        columns['value'].append(np.where(is_leaf, conditions, 0))
+        columns['left'].append(np.where(is_leaf, own, left + offset))
+        columns['right'].append(np.where(is_leaf, own, right + offset))
+        columns['default_left'].append(np.asarray(tree['default_left'], dtype=bool))
+
+        depth = np.zeros(len(left), dtype=np.int64)
+        stack = [0]
+        while stack:
+            i = stack.pop()
+            if not is_leaf[i]:
+                depth[left[i]] = depth[right[i]] = depth[i] + 1
+                stack.extend((left[i], right[i]))
+        roots.append(offset)
+        max_depth = max(max_depth, int(depth.max()))
+        offset += len(left)
+
+    n_nodes = offset
+    return CompiledEnsemble(
+        feature=np.concatenate(columns['feature']).astype(np.int32),
+        threshold=np.concatenate(columns['threshold']).astype(np.float32),
+        left=np.concatenate(columns['left']).astype(np.int32),
+        right=np.concatenate(columns['right']).astype(np.int32),
+        value=np.concatenate(columns['value']).astype(np.float32),
+        default_left=np.concatenate(columns['default_left']),
+        missing_type=np.full(n_nodes, MISSING_NAN, dtype=np.int8),
+        roots=np.asarray(roots, dtype=np.int32),
+        max_depth=max_depth,
+        n_features=int(learner['learner_model_param']['num_feature']),
+        base_score=float(base_margin),
+        source=type(model).__name__,
+        strict=True,
+        float32=True,
+        link=link,
+    )
+
+
+def compile_model(model) -> CompiledEnsemble:
+    """
+    Flatten a fitted tree ensemble into a CompiledEnsemble
+
+    Raises:
+        TypeError: For model types without a compiler
+        ValueError: For models using features the evaluator does not implement
+    """
+    module = type(model).__module__
+    if module.startswith('lightgbm'):
+        return compile_lightgbm(model)
+    if module.startswith('xgboost'):
+        return compile_xgboost(model)
+    raise TypeError(f"Cannot compile {type(model).__name__} models")
+
+
+def parity_rows(compiled: CompiledEnsemble, n_rows: int = 5000, seed: int = 0) -> np.ndarray:
+    """
+    Engineered rows for parity checks, shape (n_rows, n_features)
+
+    Half are realistic inputs (benchmark.synthetic_feature_array); the other
+    half are uniform over each feature's split range with a share of values
+    placed exactly on split thresholds, so both sides of every split are hit.
+    """
+    from .benchmark import synthetic_feature_array
+    from .features import engineer_array
+
+    rng = np.random.default_rng(seed)
+    realistic = n_rows // 2
+    X = np.empty((n_rows, compiled.n_features), dtype=np.float64)
+    X[:realistic] = engineer_array(synthetic_feature_array(realistic, seed=seed))
+
+    internal = compiled.left != np.arange(compiled.n_nodes)
+    for col in range(compiled.n_features):
+        thresholds = compiled.threshold[internal & (compiled.feature == col)]
+        if thresholds.size == 0:
+            X[realistic:, col] = rng.normal(0, 1, n_rows - realistic)
+            continue
+        span = max(thresholds.max() - thresholds.min(), 1.0)
+        X[realistic:, col] = rng.uniform(thresholds.min() - 0.1 * span, thresholds.max() + 0.1 * span,
+                                         n_rows - realistic)
+        on_split = rng.random(n_rows - realistic) < 0.1
+        X[realistic:, col][on_split] = rng.choice(thresholds, on_split.sum())
+    return X
+
+
+def _reference_predict(model):
+    """The original model's output function matching CompiledEnsemble.predict."""
+    if hasattr(model, 'predict_proba'):
+        return lambda X: model.predict_proba(X)[:, 1]
+    return model.predict
+
+
+def check_parity(model, compiled: Optional[CompiledEnsemble] = None, n_rows: int = 5000,
+                 seed: int = 0, atol: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Compare the compiled evaluator with the original model's predict
+    (predict_proba's positive column for classifiers)
+
+    Args:
+        model: The fitted model
+        compiled: Its compiled form (compiled here if omitted)
+        n_rows: Number of random rows to compare (see parity_rows)
+        seed: Random seed for the rows
+        atol: Largest accepted absolute difference (default PARITY_ATOL, or
+            FLOAT32_PARITY_ATOL for float32 ensembles)
+
+    Returns:
+        Dict with rows, max_abs_diff, mismatches (rows beyond atol) and passed
+    """
+    compiled = compiled or compile_model(model)
+    if atol is None:
+        atol = FLOAT32_PARITY_ATOL if compiled.float32 else PARITY_ATOL
+    X = parity_rows(compiled, n_rows, seed)
+    expected = np.asarray(_reference_predict(model)(X), dtype=np.float64)
+    actual = compiled.predict(X).astype(np.float64)
+    diff = np.abs(actual - expected)
+    mismatches = int((diff > atol).sum())
+    return {
+        'rows': int(n_rows),
+        'max_abs_diff': float(diff.max()) if diff.size else 0.0,
+        'exact_matches': int((diff == 0).sum()),
+        'mismatches': mismatches,
+        'atol': atol,
+        'passed': mismatches == 0,
+    }
+
+
+# Model name -> (model version, compiled ensemble or the model itself)
+_compiled: Dict[str, Tuple[str, Any]] = {}
+_compiled_lock = threading.Lock()
+
+
+def get_predictor(model_entry: LoadedModel, n_rows: int = 1):
+    """
+    Return the object to call .predict() on for a loaded model
+
+    The compiled evaluator is built (and parity-checked on COMPILE_CHECK_ROWS
+    rows) once per model version. Models that cannot be compiled, fail the
+    check, or run with SURGE_COMPILED_TREES=0 are returned unchanged, as are
+    batches of more than COMPILED_MAX_ROWS rows, where the model's threaded
+    predict outruns numpy.
+    """
+    if not COMPILED_TREES or n_rows > COMPILED_MAX_ROWS:
+        return model_entry.model
+    cached = _compiled.get(model_entry.name)
+    if cached is not None and cached[0] == model_entry.version:
+        return cached[1]
+
+    with _compiled_lock:
+        cached = _compiled.get(model_entry.name)
+        if cached is not None and cached[0] == model_entry.version:
+            return cached[1]
+        predictor = model_entry.model
+        start = time.perf_counter()
+        try:
+            compiled = compile_model(model_entry.model)
+            result = check_parity(model_entry.model, compiled, n_rows=COMPILE_CHECK_ROWS)
+            if result['passed']:
+                predictor = compiled
+            else:
+                logger.warning("Compiled %s disagrees with the model (max diff %.3g); using model.predict",
+                               model_entry.name, result['max_abs_diff'])
+        except (TypeError, ValueError) as e:
+            logger.info("Not compiling %s: %s", model_entry.name, e)
+        metrics.observe(COMPILE_SECONDS, time.perf_counter() - start, model=model_entry.name)
+        _compiled[model_entry.name] = (model_entry.version, predictor)
+        return predictor
+
+
+def clear_compiled() -> None:
+    """Drop every compiled ensemble (the next prediction recompiles)."""
+    with _compiled_lock:
+        _compiled.clear()
+
+
+def _time_per_call(fn, X: np.ndarray, iterations: int) -> float:
+    fn(X)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn(X)
+    return (time.perf_counter() - start) / iterations
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Check a compiled surge model against the pickled one")
+    parser.add_argument('--model', default='surge_model', help="Registry model name (surge_model or classifier)")
+    parser.add_argument('--rows', type=int, default=5000, help="Random rows to compare")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--export', help="Write the compiled arrays to this .npz file")
+    args = parser.parse_args(argv)
+
+    import pandas as pd
+    from .model_registry import get_registry
+
+    model = get_registry().get(args.model)
+    compiled = compile_model(model)
+    print(f"{compiled.source}: {compiled.n_trees} trees, {compiled.n_nodes} nodes, "
+          f"max depth {compiled.max_depth}, {compiled.nbytes / 1024:.1f} KiB")
+
+    result = check_parity(model, compiled, n_rows=args.rows, seed=args.seed)
+    print(f"parity: {result['rows']} rows, {result['exact_matches']} exact, "
+          f"max |diff| {result['max_abs_diff']:.3g}, {result['mismatches']} beyond {result['atol']:g}")
+
+    X = parity_rows(compiled, 1000, args.seed)
+    one = pd.DataFrame(X[:1], columns=FEATURE_COLS)
+    reference = _reference_predict(model)
+    for label, rows, frame in (('1 row', X[:1], one), ('1000 rows', X, pd.DataFrame(X, columns=FEATURE_COLS))):
+        iterations = 500 if len(rows) == 1 else 20
+        original = _time_per_call(reference, frame, iterations)
+        fast = _time_per_call(compiled.predict, rows, iterations)
+        print(f"{label:>10}: model.predict {original * 1e3:8.3f} ms   compiled {fast * 1e3:8.3f} ms   "
+              f"({original / fast:.1f}x)")
+
+    if args.export:
+        compiled.save(args.export)
+        print(f"Saved compiled ensemble to {args.export}")
+    return 0 if result['passed'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
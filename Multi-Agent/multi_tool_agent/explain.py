@@ -0,0 +1,140 @@
+import threading
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from .features import FEATURE_COLS
+from .model_registry import LoadedModel
+
+# Model name -> (model version, TreeExplainer)
+_explainers: Dict[str, Tuple[str, Any]] = {}
+_explainer_lock = threading.Lock()
+
+
+def get_explainer(model_entry: LoadedModel):
+    """
+    Return the SHAP TreeExplainer for a loaded model
+
+    The explainer is built once per model version and reused; a hot-reloaded
+    model gets a fresh explainer on its first use.
+
+    Raises:
+        ImportError: If shap is not installed
+    """
+    cached = _explainers.get(model_entry.name)
+    if cached is not None and cached[0] == model_entry.version:
+        return cached[1]
+
+    import shap
+
+    with _explainer_lock:
+        cached = _explainers.get(model_entry.name)
+        if cached is not None and cached[0] == model_entry.version:
+            return cached[1]
+        explainer = shap.TreeExplainer(model_entry.model)
+        _explainers[model_entry.name] = (model_entry.version, explainer)
+        return explainer
+
+
+def clear_explainers() -> None:
+    """Drop every cached explainer (the next explanation rebuilds it)."""
+    with _explainer_lock:
+        _explainers.clear()
+
+
+def compute_shap_values(model_entry: LoadedModel, X_df) -> np.ndarray:
+    """SHAP values for every row of X_df in a single explainer call, shape (n_rows, n_features)."""
+    values = get_explainer(model_entry).shap_values(X_df)
+    return np.atleast_2d(np.asarray(values, dtype=np.float64))
+
+
+def get_base_value(model_entry: LoadedModel, default: float) -> float:
+    """Explainer expected value (the SHAP base value), or `default` if unavailable."""
+    explainer = get_explainer(model_entry)
+    if not hasattr(explainer, 'expected_value'):
+        return float(default)
+    return float(np.ravel(explainer.expected_value)[0])
+
+
+def get_reason(feature, value, impact):
+    """Human-readable reason for a feature's contribution."""
+    reasons = {
+        'air_quality': f"AQI of {value:.0f} {'worsens' if value > 100 else 'improves'} respiratory admissions",
+        'temperature': f"Temperature at {value:.1f}°C affects weather-related cases",
+        'temp_change_1d': f"Temperature {'dropped' if value < 0 else 'rose'} by {abs(value):.1f}°C from yesterday",
+        'aqi_change_1d': f"Air quality {'worsened' if value > 0 else 'improved'} by {abs(value):.0f} points",
+        'admissions_lag1': f"Yesterday's {value:.0f} admissions set baseline",
+        'admissions_lag7': f"Last week: {value:.0f} admissions",
+        'admissions_rolling7': f"7-day average: {value:.1f} admissions",
+        'admissions_rolling7_std': f"Recent volatility: {value:.1f} std dev",
+        'rolling_trend': f"Week-over-week trend: {value:+.1f} admissions",
+        'er_admissions': f"ER volume: {value:.0f}",
+        'icu_admissions': f"ICU census: {value:.0f}",
+        'is_weekend': f"{'Weekend' if value == 1 else 'Weekday'} pattern",
+        'temp_squared': f"Temperature non-linearity effect",
+        'month': f"Month {int(value)} seasonality",
+        'day_of_week': f"Day {int(value)} weekly pattern",
+    }
+    return reasons.get(feature, f"{feature}: {value:.2f}")
+
+
+def _format_factor(feature: str, value: float, shap_value: float) -> Dict[str, Any]:
+    return {
+        'feature': feature,
+        'value': round(value, 2),
+        'impact': round(shap_value, 2),
+        'reason': get_reason(feature, value, shap_value)
+    }
+
+
+def summarize_shap(feature_values: np.ndarray, shap_row: np.ndarray, top_k: int = 5,
+                   include_all: bool = True) -> Dict[str, Any]:
+    """
+    Turn one row of SHAP values into the factor lists used in the prediction output
+
+    Features are ranked by absolute SHAP value; only the top `top_k` positive
+    and negative factors are formatted.
+
+    Args:
+        feature_values: The row's engineered values, in FEATURE_COLS order
+        shap_row: The row's SHAP values, in FEATURE_COLS order
+        top_k: Number of factors to keep on each side
+        include_all: Also return every feature's SHAP value as `all_shap_values`
+
+    Returns:
+        Dict with top_positive_factors, top_negative_factors, positive_count,
+        total_positive_impact, total_negative_impact and, if requested, all_shap_values
+    """
+    shap_row = np.asarray(shap_row, dtype=np.float64)
+    # Stable sort keeps FEATURE_COLS order among equal magnitudes
+    order = np.argsort(-np.abs(shap_row), kind='stable')
+    ranked = shap_row[order]
+    positive = order[ranked > 0]
+    negative = order[ranked < 0]
+
+    values = [float(v) for v in feature_values]
+    shaps = shap_row.tolist()
+
+    summary = {
+        'top_positive_factors': [_format_factor(FEATURE_COLS[i], values[i], shaps[i]) for i in positive[:top_k]],
+        'top_negative_factors': [_format_factor(FEATURE_COLS[i], values[i], shaps[i]) for i in negative[:top_k]],
+        'positive_count': int(len(positive)),
+        'total_positive_impact': round(sum(shaps[i] for i in positive), 2),
+        'total_negative_impact': round(sum(shaps[i] for i in negative), 2),
+    }
+    if include_all:
+        summary['all_shap_values'] = {
+            FEATURE_COLS[i]: round(shaps[i], 3)
+            for i in range(len(FEATURE_COLS))
+        }
+    return summary
+
+
+def summarize_shap_batch(X_df, shap_matrix: np.ndarray, top_k: int = 5,
+                         include_all: bool = False) -> List[Dict[str, Any]]:
+    """summarize_shap for every row of a batch."""
+    feature_matrix = X_df[FEATURE_COLS].to_numpy()
+    return [
+        summarize_shap(feature_matrix[i], shap_matrix[i], top_k=top_k, include_all=include_all)
+        for i in range(len(feature_matrix))
+    ]
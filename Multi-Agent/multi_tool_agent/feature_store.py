@@ -0,0 +1,259 @@
+import threading
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from .features import REQUIRED_FEATURES
+
+DateLike = Union[str, date]
+
+WINDOW = 7
+SNAPSHOT_VERSION = 1
+
+_COL = {name: i for i, name in enumerate(REQUIRED_FEATURES)}
+
+
+def _ordinal(day: DateLike) -> int:
+    if isinstance(day, str):
+        day = datetime.strptime(day, '%Y-%m-%d').date()
+    return day.toordinal()
+
+
+class FeatureStore:
+    """
+    Incremental per-hospital store of the 13 inputs predict_from_features needs
+
+    Daily admission events (admissions, ER, ICU) and weather events
+    (temperature, AQI) are ingested as they arrive. Every hospital is one row
+    in a set of numpy arrays: a 7-day admissions ring buffer with running sums
+    (so the lag, rolling mean and rolling std update in O(1)), the last two
+    weather readings, and a precomputed feature row for the next day. Reading
+    a feature vector is therefore a row lookup.
+
+    The feature row always describes the day after the latest admissions
+    event. Temperature/AQI come from the latest weather event (ingest the
+    next day's forecast to use it) and the *_change_1d values are the
+    difference between the last two weather events.
+
+    Args:
+        capacity: Initial number of hospital rows (grows as needed)
+    """
+
+    _ARRAYS = ('_adm', '_head', '_count', '_sum', '_sumsq', '_adm_day', '_er', '_icu',
+               '_temp', '_aqi', '_weather_day', '_features')
+
+    def __init__(self, capacity: int = 16):
+        self._index: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._allocate(max(capacity, 1))
+
+    def _allocate(self, capacity: int) -> None:
+        self._adm = np.zeros((capacity, WINDOW), dtype=np.float64)
+        self._head = np.zeros(capacity, dtype=np.int64)      # slot of the oldest admissions value
+        self._count = np.zeros(capacity, dtype=np.int64)     # days of admissions seen (capped at WINDOW)
+        self._sum = np.zeros(capacity, dtype=np.float64)
+        self._sumsq = np.zeros(capacity, dtype=np.float64)
+        self._adm_day = np.full(capacity, -1, dtype=np.int64)
+        self._er = np.zeros(capacity, dtype=np.float64)
+        self._icu = np.zeros(capacity, dtype=np.float64)
+        self._temp = np.zeros((capacity, 2), dtype=np.float64)   # [latest, previous]
+        self._aqi = np.zeros((capacity, 2), dtype=np.float64)
+        self._weather_day = np.full(capacity, -1, dtype=np.int64)
+        self._features = np.zeros((capacity, len(REQUIRED_FEATURES)), dtype=np.float64)
+
+    def _grow(self) -> None:
+        old = {name: getattr(self, name) for name in self._ARRAYS}
+        self._allocate(len(self._adm) * 2)
+        for name, arr in old.items():
+            getattr(self, name)[:len(arr)] = arr
+
+    def _row(self, hospital_id: str, create: bool = False) -> int:
+        row = self._index.get(hospital_id)
+        if row is None:
+            if not create:
+                raise KeyError(f"Unknown hospital '{hospital_id}'")
+            row = len(self._index)
+            if row >= len(self._adm):
+                self._grow()
+            self._index[hospital_id] = row
+        return row
+
+    @property
+    def hospitals(self) -> List[str]:
+        return list(self._index)
+
+    # ===== INGEST =====
+
+    def ingest_admissions(self, hospital_id: str, day: DateLike, admissions: float,
+                          er_admissions: float, icu_admissions: float) -> None:
+        """
+        Record one day's admissions for a hospital
+
+        Days must arrive in order. Re-sending the latest day replaces it
+        (late corrections); older days raise ValueError. A skipped day
+        restarts the 7-day window at `day`, so the lag and rolling features
+        never span the gap: the hospital is not ready again until 7
+        consecutive days have arrived.
+        """
+        ordinal = _ordinal(day)
+        with self._lock:
+            row = self._row(hospital_id, create=True)
+            last = self._adm_day[row]
+            if ordinal < last:
+                raise ValueError(f"{hospital_id}: admissions for {day} arrived after a later day")
+
+            if last >= 0 and ordinal > last + 1:
+                self._head[row] = 0
+                self._count[row] = 0
+                self._sum[row] = 0.0
+                self._sumsq[row] = 0.0
+
+            value = float(admissions)
+            if ordinal == last:
+                slot = (self._head[row] + self._count[row] - 1) % WINDOW
+                old = self._adm[row, slot]
+            elif self._count[row] < WINDOW:
+                slot = self._count[row]
+                old = 0.0
+                self._count[row] += 1
+            else:
+                slot = self._head[row]
+                old = self._adm[row, slot]
+                self._head[row] = (slot + 1) % WINDOW
+
+            self._adm[row, slot] = value
+            if self._head[row] == 0 and ordinal != last:
+                # Once per wrap, re-derive the sums from the buffer to stop float drift
+                self._sum[row] = self._adm[row, :self._count[row]].sum()
+                self._sumsq[row] = np.square(self._adm[row, :self._count[row]]).sum()
+            else:
+                self._sum[row] += value - old
+                self._sumsq[row] += value * value - old * old
+            self._adm_day[row] = ordinal
+            self._er[row] = float(er_admissions)
+            self._icu[row] = float(icu_admissions)
+            self._refresh(row)
+
+    def ingest_weather(self, hospital_id: str, day: DateLike, temperature: float,
+                       air_quality: float) -> None:
+        """Record one day's temperature and AQI (observed or forecast) for a hospital."""
+        ordinal = _ordinal(day)
+        with self._lock:
+            row = self._row(hospital_id, create=True)
+            last = self._weather_day[row]
+            if ordinal < last:
+                raise ValueError(f"{hospital_id}: weather for {day} arrived after a later day")
+            if ordinal > last:
+                self._temp[row, 1] = self._temp[row, 0] if last >= 0 else float(temperature)
+                self._aqi[row, 1] = self._aqi[row, 0] if last >= 0 else float(air_quality)
+            self._temp[row, 0] = float(temperature)
+            self._aqi[row, 0] = float(air_quality)
+            self._weather_day[row] = ordinal
+            self._refresh(row)
+
+    def ingest(self, event: Dict[str, Any]) -> None:
+        """
+        Ingest a combined daily event dict
+
+        Keys: hospital_id, date, and any of admissions/er_admissions/icu_admissions
+        (together) and temperature/air_quality (together).
+        """
+        if 'admissions' in event:
+            self.ingest_admissions(event['hospital_id'], event['date'], event['admissions'],
+                                   event['er_admissions'], event['icu_admissions'])
+        if 'temperature' in event:
+            self.ingest_weather(event['hospital_id'], event['date'], event['temperature'],
+                                event['air_quality'])
+
+    def _refresh(self, row: int) -> None:
+        """Recompute the hospital's next-day feature row (O(1))."""
+        features = self._features[row]
+        count = self._count[row]
+        if count:
+            head = self._head[row]
+            features[_COL['admissions_lag1']] = self._adm[row, (head + count - 1) % WINDOW]
+            features[_COL['admissions_lag7']] = self._adm[row, head]
+            features[_COL['admissions_rolling7']] = self._sum[row] / count
+            if count > 1:
+                var = (self._sumsq[row] - self._sum[row] ** 2 / count) / (count - 1)
+                features[_COL['admissions_rolling7_std']] = np.sqrt(max(var, 0.0))
+            target = date.fromordinal(int(self._adm_day[row]) + 1)
+            features[_COL['day_of_week']] = target.weekday()
+            features[_COL['month']] = target.month
+            features[_COL['is_weekend']] = int(target.weekday() >= 5)
+        features[_COL['er_admissions']] = self._er[row]
+        features[_COL['icu_admissions']] = self._icu[row]
+        features[_COL['temperature']] = self._temp[row, 0]
+        features[_COL['air_quality']] = self._aqi[row, 0]
+        features[_COL['temp_change_1d']] = self._temp[row, 0] - self._temp[row, 1]
+        features[_COL['aqi_change_1d']] = self._aqi[row, 0] - self._aqi[row, 1]
+
+    # ===== LOOKUP =====
+
+    def is_ready(self, hospital_id: str) -> bool:
+        """True once the hospital has a full 7-day window and at least one weather event."""
+        row = self._index.get(hospital_id)
+        return row is not None and self._count[row] == WINDOW and self._weather_day[row] >= 0
+
+    def _check_ready(self, hospital_id: str) -> int:
+        row = self._row(hospital_id)
+        if self._count[row] < WINDOW:
+            raise ValueError(f"{hospital_id}: need {WINDOW} days of admissions, have {self._count[row]}")
+        if self._weather_day[row] < 0:
+            raise ValueError(f"{hospital_id}: no weather ingested yet")
+        return row
+
+    def feature_vector(self, hospital_id: str) -> Dict[str, float]:
+        """Ready-to-predict feature dict for the hospital's next day (input to predict_from_features)."""
+        row = self._check_ready(hospital_id)
+        return dict(zip(REQUIRED_FEATURES, self._features[row].tolist()))
+
+    def feature_matrix(self, hospital_ids: Optional[List[str]] = None) -> Tuple[List[str], np.ndarray]:
+        """
+        Feature rows for many hospitals, in REQUIRED_FEATURES column order
+
+        The returned ndarray can be passed straight to predict_batch.
+        """
+        ids = hospital_ids if hospital_ids is not None else [h for h in self._index if self.is_ready(h)]
+        rows = [self._check_ready(h) for h in ids]
+        return ids, self._features[rows].copy()
+
+    def next_date(self, hospital_id: str) -> str:
+        """Date the hospital's feature row predicts."""
+        row = self._row(hospital_id)
+        return date.fromordinal(int(self._adm_day[row]) + 1).isoformat()
+
+    def admissions_history(self, hospital_id: str) -> np.ndarray:
+        """Buffered daily admissions, oldest first (for forecast_horizon)."""
+        row = self._row(hospital_id)
+        count = self._count[row]
+        return np.roll(self._adm[row], -self._head[row])[:count].copy()
+
+    # ===== SNAPSHOT / RESTORE =====
+
+    def snapshot(self, path: str) -> None:
+        """Write the store's state to a compressed .npz file."""
+        with self._lock:
+            n = len(self._index)
+            arrays = {name.lstrip('_'): getattr(self, name)[:n] for name in self._ARRAYS}
+            np.savez_compressed(
+                path,
+                version=np.array(SNAPSHOT_VERSION),
+                hospital_ids=np.array(list(self._index), dtype=str),
+                **arrays,
+            )
+
+    @classmethod
+    def restore(cls, path: str) -> 'FeatureStore':
+        """Rebuild a store from a snapshot written by snapshot()."""
+        with np.load(path, allow_pickle=False) as data:
+            version = int(data['version'])
+            if version != SNAPSHOT_VERSION:
+                raise ValueError(f"Unsupported feature store snapshot version {version}")
+            ids = [str(h) for h in data['hospital_ids']]
+            store = cls(capacity=max(len(ids), 1))
+            for name in cls._ARRAYS:
+                getattr(store, name)[:len(ids)] = data[name.lstrip('_')]
+        store._index = {h: i for i, h in enumerate(ids)}
+        return store
@@ -0,0 +1,114 @@
+from typing import Any, Dict, List, Union
+
+import numpy as np
+import pandas as pd
+
+# Raw inputs callers must provide
+REQUIRED_FEATURES = [
+    'temperature', 'air_quality', 'admissions_lag1', 'admissions_lag7',
+    'admissions_rolling7', 'admissions_rolling7_std', 'temp_change_1d',
+    'aqi_change_1d', 'er_admissions', 'icu_admissions',
+    'day_of_week', 'month', 'is_weekend'
+]
+
+# Model input order (must match training)
+FEATURE_COLS = [
+    'day_of_week', 'month', 'is_weekend',
+    'temperature', 'temp_squared', 'air_quality',
+    'admissions_lag1', 'admissions_lag7', 'admissions_rolling7',
+    'admissions_rolling7_std', 'temp_change_1d', 'aqi_change_1d',
+    'rolling_trend', 'er_admissions', 'icu_admissions',
+    'day_of_week_sin', 'day_of_week_cos', 'month_sin', 'month_cos'
+]
+
+FeatureRows = Union[Dict[str, Any], List[Dict[str, Any]], pd.DataFrame, np.ndarray]
+
+
+def _to_base_array(rows: FeatureRows) -> np.ndarray:
+    """Normalise the accepted input types to a float64 array of REQUIRED_FEATURES (or FEATURE_COLS)."""
+    if isinstance(rows, dict):
+        rows = [rows]
+
+    if isinstance(rows, np.ndarray):
+        arr = np.atleast_2d(np.asarray(rows, dtype=np.float64))
+        if arr.shape[1] not in (len(REQUIRED_FEATURES), len(FEATURE_COLS)):
+            raise ValueError(
+                f"ndarray input must have {len(REQUIRED_FEATURES)} columns in REQUIRED_FEATURES order "
+                f"(or {len(FEATURE_COLS)} in FEATURE_COLS order), got {arr.shape[1]}"
+            )
+        return arr
+
+    if isinstance(rows, pd.DataFrame):
+        missing = [f for f in REQUIRED_FEATURES if f not in rows.columns]
+        if missing:
+            raise ValueError(f"Missing required features: {missing}")
+        arr = rows[REQUIRED_FEATURES].to_numpy(dtype=np.float64)
+    else:
+        rows = list(rows)
+        missing = sorted({f for row in rows for f in REQUIRED_FEATURES if f not in row},
+                         key=REQUIRED_FEATURES.index)
+        if missing:
+            raise ValueError(f"Missing required features: {missing}")
+        arr = np.array([[row[f] for f in REQUIRED_FEATURES] for row in rows], dtype=np.float64)
+        arr = arr.reshape(-1, len(REQUIRED_FEATURES))
+
+    if np.isnan(arr).any():
+        raise ValueError("Required features contain missing values")
+    return arr
+
+
+_BASE_COL = {name: i for i, name in enumerate(REQUIRED_FEATURES)}
+# Position of each FEATURE_COLS entry in REQUIRED_FEATURES (-1 for engineered columns)
+_BASE_POSITIONS = [_BASE_COL.get(col, -1) for col in FEATURE_COLS]
+
+
+def engineer_array(rows: FeatureRows) -> np.ndarray:
+    """
+    Build the (n_rows, 19) model input matrix in FEATURE_COLS order with numpy only
+
+    Accepts the same inputs as engineer_features.
+    """
+    base = _to_base_array(rows)
+    if base.shape[1] == len(FEATURE_COLS):
+        return base
+
+    out = np.empty((base.shape[0], len(FEATURE_COLS)), dtype=np.float64)
+    for i, pos in enumerate(_BASE_POSITIONS):
+        if pos >= 0:
+            out[:, i] = base[:, pos]
+
+    temperature = base[:, _BASE_COL['temperature']]
+    day_of_week = base[:, _BASE_COL['day_of_week']]
+    month = base[:, _BASE_COL['month']]
+    col = {name: i for i, name in enumerate(FEATURE_COLS)}
+
+    out[:, col['temp_squared']] = temperature ** 2
+    out[:, col['rolling_trend']] = base[:, _BASE_COL['admissions_rolling7']] - base[:, _BASE_COL['admissions_lag7']]
+
+    # Cyclical encodings for day of week and month
+    dow_angle = 2 * np.pi * day_of_week / 7
+    month_angle = 2 * np.pi * month / 12
+    out[:, col['day_of_week_sin']] = np.sin(dow_angle)
+    out[:, col['day_of_week_cos']] = np.cos(dow_angle)
+    out[:, col['month_sin']] = np.sin(month_angle)
+    out[:, col['month_cos']] = np.cos(month_angle)
+    return out
+
+
+def engineer_features(rows: FeatureRows) -> pd.DataFrame:
+    """
+    Build the model input frame for any number of rows in one vectorized pass
+
+    Args:
+        rows: A feature dict, a list of feature dicts, a DataFrame with the
+              REQUIRED_FEATURES columns, or an ndarray whose columns follow
+              REQUIRED_FEATURES (or FEATURE_COLS if already engineered)
+
+    Returns:
+        float64 DataFrame with FEATURE_COLS columns in training order
+
+    Raises:
+        ValueError: If required features are missing
+    """
+    index = rows.index if isinstance(rows, pd.DataFrame) else None
+    return pd.DataFrame(engineer_array(rows), columns=FEATURE_COLS, index=index)
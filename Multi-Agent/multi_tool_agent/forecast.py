@@ -0,0 +1,298 @@
+import json
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .compiled_trees import get_predictor
+from .features import REQUIRED_FEATURES, engineer_array
+from .model_registry import get_registry
+from .prediction import predict_admissions
+
+ArrayLike = Union[float, Sequence[float], np.ndarray]
+
+
+class RollingWindow:
+    """
+    Ring buffer over many parallel daily series
+
+    Keeps the last `window` values of every series plus running sums, so the
+    lag, rolling mean and rolling std (ddof=1, as pandas' rolling().std())
+    are available in O(1) per step instead of recomputing the window.
+
+    Args:
+        history: Array of shape (n_series, n_days) or (n_days,), oldest first.
+                 Only the last `window` days are kept.
+        window: Window length in days
+    """
+
+    # Running sums are recomputed from the buffer this often to stop float drift
+    RESYNC_EVERY = 1024
+
+    def __init__(self, history: np.ndarray, window: int = 7):
+        history = np.atleast_2d(np.asarray(history, dtype=np.float64))
+        if history.shape[1] < window:
+            raise ValueError(f"Need at least {window} days of history, got {history.shape[1]}")
+        self.window = window
+        self.buffer = np.ascontiguousarray(history[:, -window:])
+        self.head = 0  # column holding the oldest value
+        self._pushes = 0
+        self.resync()
+
+    @property
+    def n_series(self) -> int:
+        return self.buffer.shape[0]
+
+    def resync(self) -> None:
+        self.total = self.buffer.sum(axis=1)
+        self.total_sq = np.square(self.buffer).sum(axis=1)
+
+    @property
+    def lag1(self) -> np.ndarray:
+        """Most recent value of each series."""
+        return self.buffer[:, (self.head - 1) % self.window]
+
+    @property
+    def oldest(self) -> np.ndarray:
+        """Value `window` days ago (admissions_lag7 for a 7-day window)."""
+        return self.buffer[:, self.head]
+
+    @property
+    def mean(self) -> np.ndarray:
+        return self.total / self.window
+
+    @property
+    def std(self) -> np.ndarray:
+        var = (self.total_sq - np.square(self.total) / self.window) / (self.window - 1)
+        return np.sqrt(np.maximum(var, 0.0))
+
+    def push(self, values: np.ndarray) -> None:
+        """Append one new day to every series, evicting the oldest."""
+        values = np.asarray(values, dtype=np.float64)
+        old = self.buffer[:, self.head]
+        self.total += values - old
+        self.total_sq += np.square(values) - np.square(old)
+        self.buffer[:, self.head] = values
+        self.head = (self.head + 1) % self.window
+        self._pushes += 1
+        if self._pushes % self.RESYNC_EVERY == 0:
+            self.resync()
+
+    def values(self) -> np.ndarray:
+        """Window contents per series, oldest first."""
+        return np.roll(self.buffer, -self.head, axis=1)
+
+
+def _per_day(value: Optional[ArrayLike], n_series: int, horizon: int, name: str,
+             default: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Broadcast a scalar, per-series (S,), per-day (H,) or (S, H) input to (S, H)
+
+    A 1-D input is read as per-series unless n_series == horizon, in which
+    case it is read as per-day.
+    """
+    if value is None:
+        if default is None:
+            raise ValueError(f"'{name}' is required")
+        value = default
+    arr = np.asarray(value, dtype=np.float64)
+    if arr.ndim == 1 and arr.shape[0] == n_series and n_series != horizon:
+        arr = arr[:, None]
+    try:
+        return np.broadcast_to(arr, (n_series, horizon)).astype(np.float64)
+    except ValueError:
+        raise ValueError(f"'{name}' has shape {arr.shape}; expected scalar, ({n_series},), "
+                         f"({horizon},) or ({n_series}, {horizon})")
+
+
+def _calendar(start_date: Union[date, Sequence[date], np.ndarray], n_series: int,
+              horizon: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Weekday (0=Monday) and month of every forecast day, shape (1 or S, H)."""
+    first = np.atleast_1d(np.asarray(start_date, dtype='datetime64[D]'))
+    if first.shape[0] not in (1, n_series):
+        raise ValueError(f"start_date has {first.shape[0]} dates; expected 1 or {n_series}")
+    days = first[:, None] + np.arange(horizon)
+    weekday = (days.astype(np.int64) + 3) % 7  # 1970-01-01 was a Thursday
+    month = days.astype('datetime64[M]').astype(np.int64) % 12 + 1
+    return weekday, month
+
+
+def forecast_trajectories(history: np.ndarray, horizon: int, temperature: ArrayLike,
+                          air_quality: ArrayLike, er_admissions: ArrayLike,
+                          icu_admissions: ArrayLike,
+                          start_date: Union[date, Sequence[date], np.ndarray, None] = None,
+                          prev_temperature: Optional[ArrayLike] = None,
+                          prev_air_quality: Optional[ArrayLike] = None,
+                          model=None) -> np.ndarray:
+    """
+    Recursive multi-day admissions forecast for many series at once
+
+    Each day's prediction is pushed into a RollingWindow and becomes the next
+    day's admissions_lag1 / rolling features. All series are predicted with a
+    single model call per day.
+
+    Args:
+        history: Daily admissions, shape (n_series, n_days>=7) or (n_days,), oldest first
+        horizon: Number of days to forecast
+        temperature, air_quality: Forecast weather, scalar / (S,) / (H,) / (S, H)
+        er_admissions, icu_admissions: Latest ER/ICU admissions per series; later
+            days are scaled with the previous day's predicted admissions
+        start_date: Date of the first forecast day (default: today), or one date
+            per series (e.g. backtest origins starting on different days)
+        prev_temperature, prev_air_quality: Values the day before start_date, used for
+            the first day's temp_change_1d / aqi_change_1d (default: no change)
+        model: Regressor to use (default: the registry's surge_model, compiled)
+
+    Returns:
+        Array of shape (n_series, horizon) with predicted admissions
+    """
+    window = RollingWindow(history)
+    n_series = window.n_series
+    weekday, month = _calendar(date.today() if start_date is None else start_date, n_series, horizon)
+    model = model if model is not None else get_predictor(get_registry().entry('surge_model'))
+
+    temp = _per_day(temperature, n_series, horizon, 'temperature')
+    aqi = _per_day(air_quality, n_series, horizon, 'air_quality')
+    prev_temp = _per_day(prev_temperature, n_series, 1, 'prev_temperature', default=temp[:, :1])
+    prev_aqi = _per_day(prev_air_quality, n_series, 1, 'prev_air_quality', default=aqi[:, :1])
+    temp_change = np.diff(np.concatenate([prev_temp, temp], axis=1), axis=1)
+    aqi_change = np.diff(np.concatenate([prev_aqi, aqi], axis=1), axis=1)
+
+    # ER/ICU volume follows total admissions at the last observed ratio
+    lag1_start = np.where(window.lag1 > 0, window.lag1, 1.0)
+    er_ratio = _per_day(er_admissions, n_series, 1, 'er_admissions')[:, 0] / lag1_start
+    icu_ratio = _per_day(icu_admissions, n_series, 1, 'icu_admissions')[:, 0] / lag1_start
+
+    trajectory = np.empty((n_series, horizon), dtype=np.float64)
+    base = np.empty((n_series, len(REQUIRED_FEATURES)), dtype=np.float64)
+    col = {name: i for i, name in enumerate(REQUIRED_FEATURES)}
+
+    for day in range(horizon):
+        lag1 = window.lag1
+        base[:, col['temperature']] = temp[:, day]
+        base[:, col['air_quality']] = aqi[:, day]
+        base[:, col['admissions_lag1']] = lag1
+        base[:, col['admissions_lag7']] = window.oldest
+        base[:, col['admissions_rolling7']] = window.mean
+        base[:, col['admissions_rolling7_std']] = window.std
+        base[:, col['temp_change_1d']] = temp_change[:, day]
+        base[:, col['aqi_change_1d']] = aqi_change[:, day]
+        base[:, col['er_admissions']] = er_ratio * lag1
+        base[:, col['icu_admissions']] = icu_ratio * lag1
+        base[:, col['day_of_week']] = weekday[:, day]
+        base[:, col['month']] = month[:, day]
+        base[:, col['is_weekend']] = weekday[:, day] >= 5
+
+        predicted = predict_admissions(model, engineer_array(base))
+        trajectory[:, day] = predicted
+        window.push(predicted)
+
+    return trajectory
+
+
+def summarize_trajectories(trajectory: np.ndarray, baseline: float = 150,
+                           surge_threshold: float = 184) -> Dict[str, np.ndarray]:
+    """Peak day, peak value, cumulative surge and surge-day count per series."""
+    peak_day = np.argmax(trajectory, axis=1)
+    return {
+        'peak_day': peak_day,
+        'peak_admissions': trajectory[np.arange(len(trajectory)), peak_day],
+        'cumulative_surge': np.maximum(trajectory - baseline, 0.0).sum(axis=1),
+        'surge_days': (trajectory > surge_threshold).sum(axis=1),
+        'total_admissions': trajectory.sum(axis=1),
+    }
+
+
+def forecast_horizon(history, horizon: int = 14, temperature=None, air_quality=None,
+                     er_admissions=None, icu_admissions=None, start_date: Optional[str] = None,
+                     prev_temperature=None, prev_air_quality=None,
+                     series_names: Optional[List[str]] = None,
+                     baseline: float = 150, surge_threshold: float = 184,
+                     return_json: bool = False):
+    """
+    Forecast daily admissions over a multi-day horizon (e.g. 7-30 days around a festival)
+
+    Args:
+        history: Recent daily admissions (at least 7 days, oldest first). Either one
+                 list for a single hospital or a list of lists, one per hospital/scenario
+        horizon (int): Days to forecast
+        temperature: Forecast temperature in Celsius - one value, one per series,
+                     one per day, or a per-series list of per-day values
+        air_quality: Forecast AQI, same shapes as temperature
+        er_admissions: Latest ER admissions (one value or one per series)
+        icu_admissions: Latest ICU admissions (one value or one per series)
+        start_date (str): First forecast day, 'YYYY-MM-DD' (default: today)
+        prev_temperature, prev_air_quality: Yesterday's values for the first day's change features
+        series_names: Optional label for each series
+        baseline (float): Historical average admissions
+        surge_threshold (float): Admission level considered a surge
+        return_json (bool): Return JSON string vs dict
+
+    Returns:
+        Per-series daily trajectory, peak day, cumulative surge (admissions above
+        baseline summed over the horizon) and number of surge days
+
+    Example:
+        forecast_horizon([150, 152, 149, 160, 158, 162, 165], horizon=14,
+                         temperature=12.0, air_quality=320.0,
+                         er_admissions=58.0, icu_admissions=18.0,
+                         start_date='2025-10-20')
+
+    Returns {'error': ...} instead, naming the bad argument, if horizon is below 1,
+    series_names does not have one name per history series, start_date is not
+    'YYYY-MM-DD', or an input is missing or has the wrong shape.
+    """
+    try:
+        if horizon is None or int(horizon) != horizon or horizon < 1:
+            raise ValueError(f"horizon must be a whole number of days >= 1, got {horizon!r}")
+        horizon = int(horizon)
+        n_series = np.atleast_2d(np.asarray(history, dtype=np.float64)).shape[0]
+        if series_names is not None and len(series_names) != n_series:
+            raise ValueError(f"series_names has {len(series_names)} names; expected one per history "
+                             f"series ({n_series})")
+        try:
+            first_day = datetime.strptime(start_date, '%Y-%m-%d').date() if start_date else date.today()
+        except ValueError:
+            raise ValueError(f"start_date must be 'YYYY-MM-DD', got {start_date!r}")
+        model_entry = get_registry().entry('surge_model')
+
+        trajectory = forecast_trajectories(
+            history, horizon, temperature, air_quality, er_admissions, icu_admissions,
+            start_date=first_day, prev_temperature=prev_temperature,
+            prev_air_quality=prev_air_quality, model=get_predictor(model_entry),
+        )
+    except (TypeError, ValueError) as e:
+        output = {'error': str(e)}
+        return json.dumps(output) if return_json else output
+    stats = summarize_trajectories(trajectory, baseline, surge_threshold)
+    dates = [(first_day + timedelta(days=d)).isoformat() for d in range(horizon)]
+    names = series_names or [f"series_{i}" for i in range(len(trajectory))]
+
+    output: Dict[str, Any] = {
+        'horizon_days': horizon,
+        'start_date': dates[0],
+        'baseline_average': round(float(baseline), 1),
+        'surge_threshold': round(float(surge_threshold), 1),
+        'series': [
+            {
+                'name': names[i],
+                'trajectory': [round(float(v), 1) for v in trajectory[i]],
+                'peak_day': int(stats['peak_day'][i]),
+                'peak_date': dates[int(stats['peak_day'][i])],
+                'peak_admissions': round(float(stats['peak_admissions'][i]), 1),
+                'cumulative_surge': round(float(stats['cumulative_surge'][i]), 1),
+                'surge_days': int(stats['surge_days'][i]),
+                'total_admissions': round(float(stats['total_admissions'][i]), 1),
+            }
+            for i in range(len(trajectory))
+        ],
+        'model_info': {
+            'model_type': type(model_entry.model).__name__,
+            'model_version': model_entry.version,
+            'prediction_timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        }
+    }
+
+    if return_json:
+        return json.dumps(output, indent=2)
+    return output
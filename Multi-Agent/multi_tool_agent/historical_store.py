@@ -0,0 +1,278 @@
+import calendar
+import csv
+import json
+import os
+import shutil
+import tempfile
+import threading
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+HISTORY_CSV = os.path.join(DATA_DIR, 'historical_surge.csv')
+STORE_DIR = os.path.join(DATA_DIR, 'historical_store')
+
+STORE_VERSION = 1
+CRITICAL_SURGE_PATIENTS = 1000
+
+# Column name -> dtype of the memory-mapped .npy file
+NUMERIC_COLUMNS = {
+    'year': np.int16,
+    'month': np.int8,
+    'patients': np.int32,
+    'icu_admissions': np.int32,
+    'oxygen_cylinders': np.int32,
+    'avg_aqi': np.float32,
+}
+# Dictionary-encoded string columns, stored as int16 codes
+CATEGORICAL_COLUMNS = ('festival', 'disease_type')
+
+
+def _write_csr_index(store_dir: str, name: str, codes: np.ndarray, n_labels: int) -> None:
+    """Row ids grouped by code: rows for code c are rows[offsets[c]:offsets[c + 1]]."""
+    rows = np.argsort(codes, kind='stable').astype(np.int64)
+    offsets = np.searchsorted(codes[rows], np.arange(n_labels + 1)).astype(np.int64)
+    np.save(os.path.join(store_dir, f'{name}_index_rows.npy'), rows)
+    np.save(os.path.join(store_dir, f'{name}_index_offsets.npy'), offsets)
+
+
+def build_store(csv_path: str = HISTORY_CSV, store_dir: str = STORE_DIR) -> str:
+    """
+    Build the columnar historical store from the CSV history
+
+    Rows are sorted by month so each month is one contiguous slice. Writes one
+    .npy file per column, a month offset table, festival and disease_type
+    indexes, and a rollup of per-year average patients/ICU/oxygen grouped by
+    (month, festival, disease_type) plus per-month totals.
+
+    Returns:
+        The directory the store was written to
+    """
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        records = list(csv.DictReader(f))
+    records.sort(key=lambda r: (int(r['month']), r['festival'], r['disease_type'], int(r['year'])))
+
+    labels = {col: sorted({r[col] for r in records}) for col in CATEGORICAL_COLUMNS}
+    codes = {col: {label: i for i, label in enumerate(labels[col])} for col in CATEGORICAL_COLUMNS}
+
+    tmp_dir = tempfile.mkdtemp(prefix='historical_store_', dir=os.path.dirname(store_dir))
+    columns = {}
+    for col, dtype in NUMERIC_COLUMNS.items():
+        columns[col] = np.array([float(r[col]) for r in records]).astype(dtype)
+    for col in CATEGORICAL_COLUMNS:
+        columns[col] = np.array([codes[col][r[col]] for r in records], dtype=np.int16)
+    for col, arr in columns.items():
+        np.save(os.path.join(tmp_dir, f'{col}.npy'), arr)
+
+    month_offsets = np.searchsorted(columns['month'], np.arange(1, 14)).astype(np.int64)
+    np.save(os.path.join(tmp_dir, 'month_offsets.npy'), month_offsets)
+    for col in CATEGORICAL_COLUMNS:
+        _write_csr_index(tmp_dir, col, columns[col], len(labels[col]))
+
+    # ===== ROLLUP: per-year averages by (month, festival, disease_type) =====
+    years_per_month = defaultdict(set)
+    sums = defaultdict(lambda: np.zeros(3))
+    aqi = defaultdict(list)
+    for r in records:
+        month = int(r['month'])
+        years_per_month[month].add(int(r['year']))
+        sums[(month, r['festival'], r['disease_type'])] += [
+            float(r['patients']), float(r['icu_admissions']), float(r['oxygen_cylinders'])
+        ]
+        aqi[month].append(float(r['avg_aqi']))
+
+    keys = sorted(sums)
+    rollup = {
+        'month': np.array([k[0] for k in keys], dtype=np.int8),
+        'festival': np.array([codes['festival'][k[1]] for k in keys], dtype=np.int16),
+        'disease_type': np.array([codes['disease_type'][k[2]] for k in keys], dtype=np.int16),
+    }
+    averages = np.array([sums[k] / len(years_per_month[k[0]]) for k in keys]).reshape(-1, 3)
+    rollup['patients'] = averages[:, 0]
+    rollup['icu_admissions'] = averages[:, 1]
+    rollup['oxygen_cylinders'] = averages[:, 2]
+    rollup['month_offsets'] = np.searchsorted(rollup['month'], np.arange(1, 14)).astype(np.int64)
+
+    month_totals = np.zeros(13)
+    month_aqi = np.full(13, np.nan)
+    np.add.at(month_totals, rollup['month'].astype(np.int64), rollup['patients'])
+    for month, values in aqi.items():
+        month_aqi[month] = float(np.mean(values))
+    rollup['month_total_patients'] = month_totals
+    rollup['month_avg_aqi'] = month_aqi
+    np.savez(os.path.join(tmp_dir, 'rollup.npz'), **rollup)
+
+    meta = {
+        'version': STORE_VERSION,
+        'source_mtime_ns': os.stat(csv_path).st_mtime_ns,
+        'n_rows': len(records),
+        'labels': labels,
+        'years': sorted({int(r['year']) for r in records}),
+    }
+    with open(os.path.join(tmp_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2)
+
+    if os.path.isdir(store_dir):
+        shutil.rmtree(store_dir)
+    os.replace(tmp_dir, store_dir)
+    return store_dir
+
+
+def _store_is_current(csv_path: str, store_dir: str) -> bool:
+    meta_path = os.path.join(store_dir, 'meta.json')
+    if not os.path.exists(meta_path):
+        return False
+    with open(meta_path, encoding='utf-8') as f:
+        meta = json.load(f)
+    return (meta.get('version') == STORE_VERSION
+            and meta.get('source_mtime_ns') == os.stat(csv_path).st_mtime_ns)
+
+
+class HistoricalStore:
+    """
+    Read side of the columnar historical store
+
+    Columns are memory-mapped and only the rows selected by the month,
+    festival and disease_type indexes are gathered. Month-level aggregates
+    come from the precomputed rollup.
+    """
+
+    def __init__(self, store_dir: str = STORE_DIR):
+        self.store_dir = store_dir
+        with open(os.path.join(store_dir, 'meta.json'), encoding='utf-8') as f:
+            self.meta = json.load(f)
+        self.labels: Dict[str, List[str]] = self.meta['labels']
+        self._codes = {
+            col: {label.lower(): i for i, label in enumerate(self.labels[col])}
+            for col in CATEGORICAL_COLUMNS
+        }
+        self._columns: Dict[str, np.ndarray] = {}
+        self.month_offsets = self._load('month_offsets')
+        self.indexes = {
+            col: (self._load(f'{col}_index_offsets'), self._load(f'{col}_index_rows'))
+            for col in CATEGORICAL_COLUMNS
+        }
+        with np.load(os.path.join(store_dir, 'rollup.npz')) as data:
+            self.rollup = {key: data[key] for key in data.files}
+
+    def _load(self, name: str) -> np.ndarray:
+        return np.load(os.path.join(self.store_dir, f'{name}.npy'), mmap_mode='r')
+
+    def column(self, name: str) -> np.ndarray:
+        if name not in self._columns:
+            self._columns[name] = self._load(name)
+        return self._columns[name]
+
+    @property
+    def years(self) -> List[int]:
+        return self.meta['years']
+
+    def code(self, column: str, label: Optional[str]) -> Optional[int]:
+        """Code for a label (case-insensitive); -1 if unknown, None if no filter."""
+        if label is None or label.lower() == 'all':
+            return None
+        return self._codes[column].get(label.lower(), -1)
+
+    def _index_rows(self, column: str, code: int, start: int, stop: int) -> np.ndarray:
+        if code < 0:
+            return np.empty(0, dtype=np.int64)
+        offsets, rows = self.indexes[column]
+        ids = rows[offsets[code]:offsets[code + 1]]
+        # Index rows are sorted, so the month range is a contiguous part of them
+        return ids[np.searchsorted(ids, start):np.searchsorted(ids, stop)]
+
+    def select(self, month: Optional[int] = None, festival: Optional[str] = None,
+               disease_type: Optional[str] = None) -> np.ndarray:
+        """Row ids matching all filters, using only the month slice and index entries."""
+        if month is not None:
+            start, stop = int(self.month_offsets[month - 1]), int(self.month_offsets[month])
+        else:
+            start, stop = 0, int(self.meta['n_rows'])
+
+        selected = None
+        for column, label in (('festival', festival), ('disease_type', disease_type)):
+            code = self.code(column, label)
+            if code is None:
+                continue
+            ids = self._index_rows(column, code, start, stop)
+            selected = ids if selected is None else np.intersect1d(selected, ids, assume_unique=True)
+        return np.arange(start, stop) if selected is None else selected
+
+    def records(self, row_ids: np.ndarray) -> List[Dict[str, Any]]:
+        """Materialize the selected rows (only these slices are read from disk)."""
+        out = {col: self.column(col)[row_ids].tolist() for col in NUMERIC_COLUMNS}
+        for col in CATEGORICAL_COLUMNS:
+            out[col] = [self.labels[col][c] for c in self.column(col)[row_ids].tolist()]
+        return [
+            {col: out[col][i] for col in ('year', 'month', 'festival', 'disease_type', 'patients',
+                                          'icu_admissions', 'oxygen_cylinders', 'avg_aqi')}
+            for i in range(len(row_ids))
+        ]
+
+    def months_for(self, festival: Optional[str]) -> List[int]:
+        """Months present in the history, optionally only those with the given festival."""
+        if self.code('festival', festival) is None:
+            return [m for m in range(1, 13) if self.month_offsets[m] > self.month_offsets[m - 1]]
+        rows = self.select(festival=festival)
+        return sorted(set(self.column('month')[rows].tolist()))
+
+    def month_summary(self, month: int, festival: Optional[str] = None,
+                      disease_type: Optional[str] = None) -> Dict[str, Any]:
+        """Per-year average aggregates for one month, from the rollup table."""
+        r = self.rollup
+        start, stop = int(r['month_offsets'][month - 1]), int(r['month_offsets'][month])
+        mask = np.ones(stop - start, dtype=bool)
+        festival_code = self.code('festival', festival)
+        disease_code = self.code('disease_type', disease_type)
+        if festival_code is not None:
+            mask &= r['festival'][start:stop] == festival_code
+        if disease_code is not None:
+            mask &= r['disease_type'][start:stop] == disease_code
+        rows = np.arange(start, stop)[mask]
+
+        breakdown = [
+            {
+                'disease_type': self.labels['disease_type'][int(r['disease_type'][i])],
+                'patients': round(float(r['patients'][i]), 1),
+                'icu_admissions': round(float(r['icu_admissions'][i]), 1),
+                'oxygen_cylinders': round(float(r['oxygen_cylinders'][i]), 1),
+            }
+            for i in rows
+        ]
+        breakdown.sort(key=lambda d: d['patients'], reverse=True)
+        total = float(r['month_total_patients'][month])
+        festivals = sorted({self.labels['festival'][int(c)] for c in r['festival'][start:stop]} - {'none'})
+
+        return {
+            'month': month,
+            'month_name': calendar.month_name[month],
+            'festivals': festivals,
+            'total_surge_patients': round(total, 1),
+            'critical_alert': total > CRITICAL_SURGE_PATIENTS,
+            'avg_aqi': round(float(r['month_avg_aqi'][month]), 1),
+            'matching_patients': round(float(r['patients'][rows].sum()), 1),
+            'icu_admissions': round(float(r['icu_admissions'][rows].sum()), 1),
+            'oxygen_cylinders': round(float(r['oxygen_cylinders'][rows].sum()), 1),
+            'disease_breakdown': breakdown,
+        }
+
+
+_store: Optional[HistoricalStore] = None
+_store_lock = threading.Lock()
+
+
+def get_historical_store(csv_path: str = HISTORY_CSV, store_dir: str = STORE_DIR) -> HistoricalStore:
+    """Return the process-wide store, (re)building it if the CSV is newer than the build."""
+    global _store
+    with _store_lock:
+        if _store is None or _store.meta.get('source_mtime_ns') != os.stat(csv_path).st_mtime_ns:
+            if not _store_is_current(csv_path, store_dir):
+                try:
+                    build_store(csv_path, store_dir)
+                except OSError:
+                    # Package directory not writable: build into a temp dir instead
+                    store_dir = build_store(csv_path, os.path.join(tempfile.mkdtemp(), 'historical_store'))
+            _store = HistoricalStore(store_dir)
+        return _store
@@ -0,0 +1,140 @@
+import importlib
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+
+from google.adk.tools.base_tool import BaseTool
+from google.adk.tools.base_toolset import BaseToolset
+
+logger = logging.getLogger(__name__)
+
+# Modules the prediction tools need; prewarm() imports them ahead of the first call
+SCIENTIFIC_MODULES = ('numpy', 'pandas', 'joblib')
+
+ToolFactory = Callable[[], Union[BaseToolset, Sequence[Union[Callable, BaseTool]]]]
+
+
+class LazyToolset(BaseToolset):
+    """
+    Toolset whose tools are built on first use
+
+    `factory` runs the first time the agent lists its tools (or on resolve()),
+    so the imports and connections it needs are paid by the first request
+    rather than by importing the agent module. It may return another toolset
+    (e.g. an MCPToolset), which is then delegated to, or a list of functions
+    and tools.
+
+    Args:
+        factory: Zero-argument callable building the toolset or tool list
+        name: Label used in logs and load timings
+    """
+
+    def __init__(self, factory: ToolFactory, name: str, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.factory = factory
+        self.name = name
+        self.load_seconds: Optional[float] = None
+        self._resolved: Optional[Union[BaseToolset, List[BaseTool]]] = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_resolved(self) -> bool:
+        return self._resolved is not None
+
+    def resolve(self) -> Union[BaseToolset, List[BaseTool]]:
+        """Run the factory once and return the toolset or tool list it built."""
+        if self._resolved is not None:
+            return self._resolved
+        with self._lock:
+            if self._resolved is None:
+                start = time.perf_counter()
+                built = self.factory()
+                if not isinstance(built, BaseToolset):
+                    from google.adk.tools.function_tool import FunctionTool
+                    built = [t if isinstance(t, BaseTool) else FunctionTool(t) for t in built]
+                self.load_seconds = time.perf_counter() - start
+                logger.info("Loaded toolset %s in %.3fs", self.name, self.load_seconds)
+                self._resolved = built
+        return self._resolved
+
+    async def get_tools(self, readonly_context=None) -> List[BaseTool]:
+        resolved = self.resolve()
+        if isinstance(resolved, BaseToolset):
+            return await resolved.get_tools(readonly_context)
+        return [tool for tool in resolved if self._is_tool_selected(tool, readonly_context)]
+
+    async def close(self) -> None:
+        if isinstance(self._resolved, BaseToolset):
+            await self._resolved.close()
+
+
+def lazy_function_tools(module: str, *names: str) -> ToolFactory:
+    """Factory importing `names` from `module` (relative to this package) when called."""
+    def factory() -> List[Callable]:
+        loaded = importlib.import_module(module, __package__)
+        return [getattr(loaded, name) for name in names]
+    return factory
+
+
+def prewarm(toolsets: Sequence[LazyToolset] = (), models: Sequence[str] = ('surge_model',),
+            background: bool = True) -> Union[threading.Thread, Dict[str, float]]:
+    """
+    Import the scientific stack, load models and resolve toolsets ahead of the first request
+
+    Args:
+        toolsets: Lazy toolsets to resolve (MCP toolsets only build their
+            connection settings; the server process starts on first use)
+        models: Registry model names to load (and compile, see compiled_trees)
+        background: Run in a daemon thread and return it instead of blocking
+
+    Returns:
+        The started thread if background, else seconds spent per step
+    """
+    def run() -> Dict[str, float]:
+        timings: Dict[str, float] = {}
+
+        def step(label: str, fn: Callable[[], Any]) -> None:
+            start = time.perf_counter()
+            try:
+                fn()
+            except Exception as e:
+                logger.warning("Prewarm step %s failed: %s", label, e)
+            timings[label] = round(time.perf_counter() - start, 4)
+
+        for module in SCIENTIFIC_MODULES:
+            step(f'import:{module}', lambda module=module: importlib.import_module(module))
+
+        def load_models() -> None:
+            from .model_registry import get_registry
+            get_registry().preload(list(models))
+        step('models', load_models)
+
+        def compile_models() -> None:
+            from .compiled_trees import get_predictor
+            from .model_registry import get_registry
+            for name in models:
+                get_predictor(get_registry().entry(name))
+        step('compiled_trees', compile_models)
+
+        if 'classifier' in models:
+            def calibrate() -> None:
+                from .cascade import get_calibration
+                get_calibration()
+            step('cascade_calibration', calibrate)
+
+        def load_history() -> None:
+            from .historical_store import get_historical_store
+            get_historical_store()
+        step('historical_store', load_history)
+
+        for toolset in toolsets:
+            step(f'toolset:{toolset.name}', toolset.resolve)
+        logger.info("Prewarm finished: %s", timings)
+        return timings
+
+    if not background:
+        return run()
+    thread = threading.Thread(target=run, name='multi_tool_agent-prewarm', daemon=True)
+    thread.start()
+    return thread
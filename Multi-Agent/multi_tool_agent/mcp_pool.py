@@ -0,0 +1,325 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+import weakref
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+
+from google.adk.tools.base_tool import BaseTool
+from google.adk.tools.base_toolset import BaseToolset
+from google.genai import types
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+try:
+    from mcp.shared.exceptions import MCPError
+except ImportError:  # mcp < 2
+    from mcp.shared.exceptions import McpError as MCPError
+
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_SIZE = int(os.environ.get('MCP_POOL_SIZE', '2'))
+
+POOL_WAIT_SECONDS = 'mcp_pool_wait_seconds'
+POOL_CALL_SECONDS = 'mcp_tool_call_seconds'
+metrics.describe(POOL_WAIT_SECONDS, 'Time spent waiting for a pooled MCP session')
+metrics.describe(POOL_CALL_SECONDS, 'Latency of MCP tool calls through the session pool')
+metrics.describe('mcp_pool_size', 'MCP server processes per pool')
+metrics.describe('mcp_pool_in_use', 'Pooled MCP sessions currently checked out')
+metrics.describe('mcp_pool_restarts_total', 'MCP server processes restarted after failing a health check or call')
+
+
+class PooledSession:
+    """
+    One warm MCP server process and its initialized ClientSession
+
+    The stdio transport is entered and exited inside a single background task
+    (anyio requires that), which stays parked until close() is called or the
+    server process goes away.
+    """
+
+    def __init__(self, server_params: StdioServerParameters, init_timeout: float):
+        self.server_params = server_params
+        self.init_timeout = init_timeout
+        self.session: Optional[ClientSession] = None
+        self.broken = False
+        self.error: Optional[BaseException] = None
+        self.started_at = 0.0
+        self.last_used = 0.0
+        self.calls = 0
+        self._ready = asyncio.Event()
+        self._closing = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def alive(self) -> bool:
+        return (self.session is not None and not self.broken
+                and self._task is not None and not self._task.done())
+
+    async def start(self) -> None:
+        self.started_at = self.last_used = time.monotonic()
+        self._task = asyncio.create_task(self._run())
+        await asyncio.wait_for(self._ready.wait(), self.init_timeout)
+        if self.session is None:
+            raise ConnectionError(f"MCP server failed to start: {self.error!r}")
+
+    async def _run(self) -> None:
+        try:
+            async with stdio_client(self.server_params) as (read, write):
+                async with ClientSession(read, write) as session:
+                    await session.initialize()
+                    self.session = session
+                    self._ready.set()
+                    await self._closing.wait()
+        except Exception as e:
+            self.error = e
+            logger.warning("MCP server %s exited: %s", self.server_params.args, e)
+        finally:
+            self.session = None
+            self._ready.set()
+
+    async def ping(self, timeout: float) -> bool:
+        if not self.alive:
+            return False
+        try:
+            await asyncio.wait_for(self.session.send_ping(), timeout)
+            return True
+        except Exception:
+            return False
+
+    async def close(self, timeout: float = 5.0) -> None:
+        self._closing.set()
+        if self._task is None:
+            return
+        try:
+            await asyncio.wait_for(self._task, timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            self._task.cancel()
+
+
+class _LoopState:
+    """The pool's sessions for one event loop (asyncio objects can't cross loops)."""
+
+    def __init__(self):
+        self.idle: asyncio.Queue = asyncio.Queue()
+        self.slots: List[PooledSession] = []
+        self.in_use = 0
+        self.tools: Optional[list] = None
+
+
+class MCPSessionPool:
+    """
+    Shared pool of warm MCP stdio sessions
+
+    Sessions are reused across agent sessions instead of starting a node
+    process per connection. A session is pinged before checkout once it has
+    been idle for `health_interval` seconds, and a dead or broken one is
+    restarted in place.
+
+    Args:
+        name: Pool label used in metrics
+        server_params: Command that starts the MCP server
+        size: Number of server processes to keep warm
+        init_timeout: Seconds to wait for a server to start and initialize
+        call_timeout: Seconds before a tool call is abandoned (and its session restarted)
+        health_interval: Idle seconds after which a session is pinged before reuse
+    """
+
+    def __init__(self, name: str, server_params: StdioServerParameters, size: int = DEFAULT_POOL_SIZE,
+                 init_timeout: float = 10.0, call_timeout: float = 30.0, health_interval: float = 30.0):
+        self.name = name
+        self.server_params = server_params
+        self.size = max(1, size)
+        self.init_timeout = init_timeout
+        self.call_timeout = call_timeout
+        self.health_interval = health_interval
+        self.restarts = 0
+        self.acquires = 0
+        self._states: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopState]' = weakref.WeakKeyDictionary()
+        metrics.set_gauge('mcp_pool_size', self.size, pool=name)
+
+    def _state(self) -> _LoopState:
+        loop = asyncio.get_running_loop()
+        state = self._states.get(loop)
+        if state is None:
+            state = self._states[loop] = _LoopState()
+            for _ in range(self.size):
+                slot = PooledSession(self.server_params, self.init_timeout)
+                state.slots.append(slot)
+                # Start every server concurrently; callers get whichever is ready first
+                asyncio.get_running_loop().create_task(self._start(state, slot))
+        return state
+
+    async def _start(self, state: _LoopState, slot: PooledSession) -> None:
+        try:
+            await slot.start()
+        except Exception as e:
+            slot.broken = True
+            logger.warning("MCP pool %s: server start failed: %s", self.name, e)
+        state.idle.put_nowait(slot)
+
+    async def _restart(self, state: _LoopState, slot: PooledSession) -> PooledSession:
+        await slot.close()
+        self.restarts += 1
+        metrics.inc('mcp_pool_restarts_total', pool=self.name)
+        fresh = PooledSession(self.server_params, self.init_timeout)
+        state.slots[state.slots.index(slot)] = fresh
+        try:
+            await fresh.start()
+        except Exception:
+            fresh.broken = True
+            raise
+        return fresh
+
+    async def _healthy(self, state: _LoopState, slot: PooledSession) -> PooledSession:
+        if slot.alive and time.monotonic() - slot.last_used < self.health_interval:
+            return slot
+        if await slot.ping(timeout=min(5.0, self.init_timeout)):
+            return slot
+        logger.info("MCP pool %s: restarting unhealthy server", self.name)
+        return await self._restart(state, slot)
+
+    @asynccontextmanager
+    async def session(self) -> AsyncIterator[ClientSession]:
+        """Check out a healthy session for the duration of the block."""
+        state = self._state()
+        start = time.perf_counter()
+        slot = await state.idle.get()
+        index = state.slots.index(slot)
+        metrics.observe(POOL_WAIT_SECONDS, time.perf_counter() - start, pool=self.name)
+        self.acquires += 1
+        state.in_use += 1
+        metrics.set_gauge('mcp_pool_in_use', state.in_use, pool=self.name)
+        try:
+            slot = await self._healthy(state, slot)
+            try:
+                yield slot.session
+            except MCPError:
+                # Error response from the server; the session itself is fine
+                raise
+            except Exception:
+                slot.broken = True
+                raise
+            finally:
+                slot.last_used = time.monotonic()
+                slot.calls += 1
+        finally:
+            # Dead slots go back too and are restarted on their next checkout
+            state.in_use -= 1
+            metrics.set_gauge('mcp_pool_in_use', state.in_use, pool=self.name)
+            state.idle.put_nowait(state.slots[index])
+
+    async def list_tools(self) -> list:
+        """The server's tool definitions (listed once per event loop)."""
+        state = self._state()
+        if state.tools is None:
+            async with self.session() as session:
+                state.tools = list((await session.list_tools()).tools)
+        return state.tools
+
+    async def call_tool(self, name: str, arguments: Dict[str, Any]) -> Any:
+        with metrics.timer(POOL_CALL_SECONDS, pool=self.name, tool=name):
+            async with self.session() as session:
+                return await asyncio.wait_for(session.call_tool(name, arguments=arguments), self.call_timeout)
+
+    async def close(self) -> None:
+        """Stop the server processes started on the current event loop."""
+        state = self._states.pop(asyncio.get_running_loop(), None)
+        if state is not None:
+            await asyncio.gather(*(slot.close() for slot in state.slots), return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        wait = metrics.histogram(POOL_WAIT_SECONDS, pool=self.name)
+        states = list(self._states.values())
+        return {
+            'name': self.name,
+            'size': self.size,
+            'alive': sum(slot.alive for state in states for slot in state.slots),
+            'idle': sum(state.idle.qsize() for state in states),
+            'in_use': sum(state.in_use for state in states),
+            'acquires': self.acquires,
+            'restarts': self.restarts,
+            'wait': wait.snapshot() if wait is not None else None,
+        }
+
+
+class PooledMCPTool(BaseTool):
+    """An MCP server tool whose calls go through a shared MCPSessionPool."""
+
+    def __init__(self, pool: MCPSessionPool, mcp_tool: Any):
+        super().__init__(name=mcp_tool.name, description=mcp_tool.description or '')
+        self.pool = pool
+        self.mcp_tool = mcp_tool
+
+    def _get_declaration(self) -> types.FunctionDeclaration:
+        return types.FunctionDeclaration(
+            name=self.name,
+            description=self.description,
+            # Field was renamed inputSchema -> input_schema in mcp 2
+            parameters_json_schema=getattr(self.mcp_tool, 'input_schema', None) or getattr(self.mcp_tool, 'inputSchema', None),
+        )
+
+    async def run_async(self, *, args: Dict[str, Any], tool_context: Any) -> Any:
+        try:
+            response = await self.pool.call_tool(self.name, args)
+        except Exception as e:
+            return {'error': f"MCP tool execution failed: {e}"}
+        result = response.model_dump(mode='json', by_alias=True, exclude_none=True)
+        # mcp 2 protocol field, not part of the tool's answer
+        result.pop('resultType', None)
+        return result
+
+
+class PooledMCPToolset(BaseToolset):
+    """Toolset exposing an MCP server's tools through a shared session pool."""
+
+    def __init__(self, pool: MCPSessionPool, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.pool = pool
+
+    async def get_tools(self, readonly_context=None) -> List[BaseTool]:
+        tools = [PooledMCPTool(self.pool, t) for t in await self.pool.list_tools()]
+        return [tool for tool in tools if self._is_tool_selected(tool, readonly_context)]
+
+    async def close(self) -> None:
+        # The pool outlives any one agent; see close_mcp_pools()
+        pass
+
+
+_pools: Dict[tuple, MCPSessionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_mcp_pool(name: str, command: str, args: Sequence[str], size: Optional[int] = None,
+                 **kwargs: Any) -> MCPSessionPool:
+    """
+    Return the process-wide pool for a server command, creating it on first use
+
+    Every agent launching the same command and args shares its server
+    processes; `name` labels the pool in metrics and stats.
+
+    Example:
+        pool = get_mcp_pool('procurement', 'node', ['/path/to/dist/index.js'])
+        toolset = PooledMCPToolset(pool)
+    """
+    key = (command, tuple(args))
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            params = StdioServerParameters(command=command, args=list(args))
+            pool = _pools[key] = MCPSessionPool(name, params, size=size or DEFAULT_POOL_SIZE, **kwargs)
+        return pool
+
+
+def mcp_pool_stats() -> Dict[str, Dict[str, Any]]:
+    """Size, health, checkout and wait-time stats for every pool."""
+    return {pool.name: pool.stats() for pool in list(_pools.values())}
+
+
+async def close_mcp_pools() -> None:
+    """Stop every pool's server processes on the current event loop."""
+    await asyncio.gather(*(pool.close() for pool in list(_pools.values())), return_exceptions=True)
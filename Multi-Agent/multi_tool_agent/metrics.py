@@ -0,0 +1,198 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Histogram bucket upper bounds in seconds (Prometheus-style, cumulative on export)
+DEFAULT_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+    0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram with count, sum and max."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q: float) -> float:
+        """Estimate the q-quantile by linear interpolation inside the matching bucket."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if seen + n >= rank and n:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.max
+                return min(lower + (upper - lower) * (rank - seen) / n, self.max)
+            seen += n
+        return self.max
+
+    def snapshot(self) -> Dict[str, float]:
+        return {
+            'count': self.count,
+            'sum_seconds': round(self.total, 6),
+            'mean_ms': round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            'p50_ms': round(self.quantile(0.50) * 1000, 3),
+            'p90_ms': round(self.quantile(0.90) * 1000, 3),
+            'p99_ms': round(self.quantile(0.99) * 1000, 3),
+            'max_ms': round(self.max * 1000, 3),
+        }
+
+
+class MetricsRegistry:
+    """
+    In-process histograms and counters, exportable as a dict or Prometheus text
+
+    Metrics are identified by name plus a small set of string labels,
+    e.g. observe('surge_prediction_stage_seconds', 0.002, stage='shap').
+    """
+
+    def __init__(self):
+        self._histograms: Dict[str, Dict[LabelKey, LatencyHistogram]] = {}
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._gauges: Dict[str, Dict[LabelKey, float]] = {}
+        self._help: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(labels: Dict[str, str]) -> LabelKey:
+        return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def describe(self, name: str, help_text: str) -> None:
+        self._help[name] = help_text
+
+    def observe(self, name: str, seconds: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            hist = series.get(key)
+            if hist is None:
+                hist = series[key] = LatencyHistogram()
+            hist.observe(seconds)
+
+    def inc(self, name: str, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + amount
+
+    def set_gauge(self, name: str, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._gauges.setdefault(name, {})[key] = value
+
+    @contextmanager
+    def timer(self, name: str, **labels: str) -> Iterator[None]:
+        """Time the enclosed block into histogram `name`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def histogram(self, name: str, **labels: str) -> Optional[LatencyHistogram]:
+        return self._histograms.get(name, {}).get(self._key(labels))
+
+    def counter(self, name: str, **labels: str) -> float:
+        return self._counters.get(name, {}).get(self._key(labels), 0.0)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self._gauges.clear()
+
+    @staticmethod
+    def _label_str(key: LabelKey) -> str:
+        return ','.join(f'{k}={v}' for k, v in key)
+
+    def snapshot(self) -> Dict[str, Dict[str, Dict]]:
+        """Point-in-time copy of every metric, with p50/p90/p99 per histogram."""
+        with self._lock:
+            return {
+                'histograms': {
+                    name: {self._label_str(k) or '_': h.snapshot() for k, h in series.items()}
+                    for name, series in self._histograms.items()
+                },
+                'counters': {
+                    name: {self._label_str(k) or '_': v for k, v in series.items()}
+                    for name, series in self._counters.items()
+                },
+                'gauges': {
+                    name: {self._label_str(k) or '_': v for k, v in series.items()}
+                    for name, series in self._gauges.items()
+                },
+            }
+
+    def prometheus_text(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines: List[str] = []
+
+        def fmt_labels(key: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+            pairs = key + extra
+            if not pairs:
+                return ''
+            escaped = (v.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+            return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+        def header(name: str, kind: str) -> None:
+            if name in self._help:
+                lines.append(f'# HELP {name} {self._help[name]}')
+            lines.append(f'# TYPE {name} {kind}')
+
+        with self._lock:
+            for name, series in sorted(self._histograms.items()):
+                header(name, 'histogram')
+                for key, hist in sorted(series.items()):
+                    cumulative = 0
+                    for bound, n in zip(hist.buckets, hist.counts):
+                        cumulative += n
+                        lines.append(f'{name}_bucket{fmt_labels(key, (("le", repr(bound)),))} {cumulative}')
+                    lines.append(f'{name}_bucket{fmt_labels(key, (("le", "+Inf"),))} {hist.count}')
+                    lines.append(f'{name}_sum{fmt_labels(key)} {hist.total!r}')
+                    lines.append(f'{name}_count{fmt_labels(key)} {hist.count}')
+            for name, series in sorted(self._counters.items()):
+                header(name, 'counter')
+                for key, value in sorted(series.items()):
+                    lines.append(f'{name}{fmt_labels(key)} {value!r}')
+            for name, series in sorted(self._gauges.items()):
+                header(name, 'gauge')
+                for key, value in sorted(series.items()):
+                    lines.append(f'{name}{fmt_labels(key)} {value!r}')
+        return '\n'.join(lines) + '\n'
+
+
+metrics = MetricsRegistry()
+
+STAGE_SECONDS = 'surge_prediction_stage_seconds'
+BATCH_STAGE_SECONDS = 'surge_batch_stage_seconds'
+metrics.describe(STAGE_SECONDS, 'Latency of each predict_from_features pipeline stage')
+metrics.describe(BATCH_STAGE_SECONDS, 'Latency of each predict_batch pipeline stage')
+metrics.describe('surge_prediction_requests_total', 'Surge prediction calls by outcome')
+
+
+def metrics_snapshot() -> Dict[str, Dict[str, Dict]]:
+    """Snapshot of all process metrics (stage latency histograms, counters, gauges)."""
+    return metrics.snapshot()
+
+
+def prometheus_metrics() -> str:
+    """All process metrics in Prometheus text exposition format."""
+    return metrics.prometheus_text()
@@ -0,0 +1,177 @@
+import hashlib
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import joblib
+
+MODEL_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Logical model name -> pickle file shipped next to this module
+MODEL_FILES = {
+    'surge_model': 'hospital_surge_model.pkl',
+    'scaler': 'feature_scaler.pkl',
+    'classifier': 'surge_classifier.pkl',
+}
+
+
+@dataclass
+class LoadedModel:
+    """A model object together with the file state it was loaded from."""
+    name: str
+    path: str
+    model: Any
+    version: str
+    loaded_at: datetime
+    load_seconds: float
+    mtime_ns: int
+    size: int
+    last_checked: float = field(default=0.0)
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'path': self.path,
+            'model_type': type(self.model).__name__,
+            'version': self.version,
+            'loaded_at': self.loaded_at.strftime('%Y-%m-%d %H:%M:%S'),
+            'load_seconds': round(self.load_seconds, 4),
+            'file_size': self.size,
+        }
+
+
+def _file_version(path: str) -> str:
+    """Short content hash used as the model version."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of the surge models.
+
+    Each model is unpickled once and reused by every prediction. Before a
+    cached model is handed out, the registry compares the file's mtime and
+    size with the values recorded at load time (at most once every
+    `check_interval` seconds) and reloads only when the file has changed.
+
+    Args:
+        model_dir: Directory holding the .pkl files
+        mmap_mode: Passed to joblib.load so large numpy arrays are memory-mapped
+                   instead of copied (joblib ignores it for arrays it cannot map)
+        check_interval: Minimum seconds between on-disk change checks per model
+    """
+
+    def __init__(self, model_dir: str = MODEL_DIR, mmap_mode: Optional[str] = 'r',
+                 check_interval: float = 1.0):
+        self.model_dir = model_dir
+        self.mmap_mode = mmap_mode
+        self.check_interval = check_interval
+        self._entries: Dict[str, LoadedModel] = {}
+        self._lock = threading.RLock()
+        self._listeners: List[Callable[[str, LoadedModel], None]] = []
+
+    def path_for(self, name: str) -> str:
+        if name not in MODEL_FILES:
+            raise KeyError(f"Unknown model '{name}'. Expected one of: {sorted(MODEL_FILES)}")
+        return os.path.join(self.model_dir, MODEL_FILES[name])
+
+    def _load(self, name: str) -> LoadedModel:
+        path = self.path_for(name)
+        stat = os.stat(path)
+        start = time.perf_counter()
+        model = joblib.load(path, mmap_mode=self.mmap_mode)
+        elapsed = time.perf_counter() - start
+        return LoadedModel(
+            name=name,
+            path=path,
+            model=model,
+            version=_file_version(path),
+            loaded_at=datetime.now(),
+            load_seconds=elapsed,
+            mtime_ns=stat.st_mtime_ns,
+            size=stat.st_size,
+            last_checked=time.monotonic(),
+        )
+
+    def _is_stale(self, entry: LoadedModel) -> bool:
+        now = time.monotonic()
+        if now - entry.last_checked < self.check_interval:
+            return False
+        entry.last_checked = now
+        try:
+            stat = os.stat(entry.path)
+        except OSError:
+            # File temporarily missing (e.g. mid-copy): keep serving the loaded model
+            return False
+        return stat.st_mtime_ns != entry.mtime_ns or stat.st_size != entry.size
+
+    def entry(self, name: str) -> LoadedModel:
+        """Return the loaded entry for `name`, loading or hot-reloading it if needed."""
+        entry = self._entries.get(name)
+        if entry is not None and not self._is_stale(entry):
+            return entry
+        with self._lock:
+            current = self._entries.get(name)
+            if current is not None and current is not entry:
+                # Another thread reloaded while we waited for the lock
+                return current
+            new_entry = self._load(name)
+            self._entries[name] = new_entry
+            listeners = list(self._listeners)
+        for listener in listeners:
+            listener(name, new_entry)
+        return new_entry
+
+    def get(self, name: str) -> Any:
+        """Return the model object for `name`."""
+        return self.entry(name).model
+
+    def version(self, name: str) -> str:
+        return self.entry(name).version
+
+    def loaded_at(self, name: str) -> datetime:
+        return self.entry(name).loaded_at
+
+    def reload(self, name: Optional[str] = None) -> None:
+        """Force a reload of one model, or of every model already loaded."""
+        with self._lock:
+            names = [name] if name else list(self._entries)
+            for n in names:
+                self._entries.pop(n, None)
+        for n in names:
+            self.entry(n)
+
+    def preload(self, names: Optional[List[str]] = None) -> None:
+        """Load models up front so the first prediction does not pay for unpickling."""
+        for name in names or list(MODEL_FILES):
+            self.entry(name)
+
+    def add_reload_listener(self, callback: Callable[[str, LoadedModel], None]) -> None:
+        """Register `callback(name, entry)`, called every time a model is (re)loaded."""
+        with self._lock:
+            self._listeners.append(callback)
+
+    def info(self) -> Dict[str, Dict[str, Any]]:
+        """Version and load time of every model currently loaded."""
+        return {name: entry.info() for name, entry in self._entries.items()}
+
+
+_registry: Optional[ModelRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> ModelRegistry:
+    """Return the process-wide model registry."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ModelRegistry()
+    return _registry
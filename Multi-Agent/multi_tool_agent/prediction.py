@@ -0,0 +1,375 @@
+import json
+import logging
+import time
+from datetime import datetime
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from .compiled_trees import get_predictor
+from .features import FEATURE_COLS, FeatureRows, engineer_array
+from .explain import compute_shap_values, get_base_value, summarize_shap, summarize_shap_batch
+from .metrics import BATCH_STAGE_SECONDS, STAGE_SECONDS, metrics
+from .model_registry import get_registry
+from .prediction_cache import CachedPrediction, get_prediction_cache
+from .response_format import DETAIL_LEVELS, shape_output, to_json
+
+logger = logging.getLogger(__name__)
+
+
+def predict_from_features(features, baseline=150, surge_threshold=184, return_json=True,
+                          top_k_only=False, top_k=5, use_cache=True, verbose=False, explain=True,
+                          detail='full'):
+    """
+    Make prediction directly from feature dictionary
+
+    Args:
+        features: Dictionary with feature values. Required keys:
+            - temperature (float): Temperature in Celsius
+            - air_quality (float): Air Quality Index (0-500)
+            - admissions_lag1 (float): Yesterday's admissions
+            - admissions_lag7 (float): Admissions from 7 days ago
+            - admissions_rolling7 (float): 7-day rolling average
+            - admissions_rolling7_std (float): 7-day rolling std dev
+            - temp_change_1d (float): Temperature change from yesterday
+            - aqi_change_1d (float): AQI change from yesterday
+            - er_admissions (float): Recent ER admissions
+            - icu_admissions (float): Recent ICU admissions
+            - day_of_week (int): 0=Monday, 6=Sunday
+            - month (int): 1-12
+            - is_weekend (int): 0 or 1
+        baseline (float): Historical average admissions (for comparison)
+        surge_threshold (float): Admission level considered a surge
+        return_json (bool): Return JSON string vs dict
+        top_k_only (bool): Fast mode - return only the top factors and skip
+                           serializing all_shap_values
+        top_k (int): Number of positive and negative factors to return
+        use_cache (bool): Serve repeated (or nearly identical, see PredictionCache)
+                          requests from the prediction cache
+        verbose (bool): Print step-by-step progress and a results summary to stdout.
+                        Stage timings are always recorded in metrics.
+        explain (bool): Compute SHAP explanations (False returns the prediction only)
+        detail (str): Verbosity tier - 'minimal', 'summary', 'standard' or 'full'
+                      (see response_format). Tiers below 'full' use compact JSON.
+
+    Returns:
+        Prediction with SHAP explanations as JSON string or dict.
+        Unknown `detail` values return None.
+        A cache hit returns the output of the first matching request,
+        including its input_features and prediction_timestamp.
+
+    Example:
+        features = {
+            'temperature': 5.0,
+            'air_quality': 185.0,
+            'admissions_lag1': 165.0,
+            'admissions_lag7': 158.0,
+            'admissions_rolling7': 162.5,
+            'admissions_rolling7_std': 12.3,
+            'temp_change_1d': -8.0,
+            'aqi_change_1d': 25.0,
+            'er_admissions': 58.0,
+            'icu_admissions': 18.0,
+            'day_of_week': 4,  # Friday
+            'month': 12,        # December
+            'is_weekend': 0
+        }
+        result = predict_from_features(features)
+    """
+
+    log = print if verbose else _quiet
+    start = time.perf_counter()
+    if detail not in DETAIL_LEVELS:
+        _report_error(log, 'options', f"Unknown detail level {detail!r}; use one of {', '.join(DETAIL_LEVELS)}")
+        return None
+
+    log("=" * 80)
+    log("DIRECT PREDICTION FROM FEATURES")
+    log("=" * 80)
+
+    # ===== STEP 1: LOAD MODEL =====
+    log("\n[1/4] Loading model...")
+    try:
+        with metrics.timer(STAGE_SECONDS, stage='load'):
+            # Loaded once per process; reloaded only when the .pkl changes on disk
+            model_entry = get_registry().entry('surge_model')
+        pred_model = model_entry.model
+        log(f"  ✓ Model ready: {type(pred_model).__name__} (version {model_entry.version})")
+    except Exception as e:
+        _report_error(log, 'load', f"Error loading model: {e}")
+        log("  Make sure hospital_surge_model.pkl exists")
+        return None
+
+    # ===== STEP 2: VALIDATE AND ENGINEER FEATURES =====
+    log("\n[2/4] Processing features...")
+
+    try:
+        with metrics.timer(STAGE_SECONDS, stage='features'):
+            X = engineer_array(features)
+    except ValueError as e:
+        _report_error(log, 'features', str(e))
+        return None
+
+    log(f"  ✓ Processed {len(FEATURE_COLS)} features")
+
+    cache = get_prediction_cache() if use_cache else None
+    if cache is not None:
+        with metrics.timer(STAGE_SECONDS, stage='cache_lookup'):
+            cache_key = cache.make_key(X[0], model_entry.version, float(baseline), float(surge_threshold),
+                                       bool(top_k_only), int(top_k), bool(explain))
+            cached = cache.get(cache_key)
+        if cached is not None:
+            log("  ✓ Served from prediction cache")
+            with metrics.timer(STAGE_SECONDS, stage='serialize'):
+                result = cached.as_json(detail) if return_json else cached.as_dict(detail)
+            _finish(start, 'cache_hit')
+            return result
+
+    # ===== STEP 3: MAKE PREDICTION =====
+    log("\n[3/4] Generating prediction...")
+
+    try:
+        with metrics.timer(STAGE_SECONDS, stage='predict'):
+            # Compiled tree evaluator on the raw array; no DataFrame needed
+            prediction = predict_admissions(get_predictor(model_entry), X)[0]
+
+        is_surge = prediction > surge_threshold
+
+        log(f"  ✓ Predicted admissions: {prediction:.1f}")
+        log(f"  ✓ Baseline: {baseline:.1f}")
+        log(f"  ✓ Difference: {prediction - baseline:+.1f}")
+        log(f"  ✓ Surge alert: {'🚨 YES' if is_surge else '✓ No'}")
+    except Exception as e:
+        _report_error(log, 'predict', f"Error making prediction: {e}")
+        return None
+
+    # ===== STEP 4: CALCULATE SHAP VALUES =====
+    log("\n[4/4] Calculating SHAP explanations...")
+
+    if not explain:
+        log("  - Skipped (explain=False)")
+        shap_values = None
+        has_shap = False
+    else:
+        try:
+            with metrics.timer(STAGE_SECONDS, stage='shap'):
+                # Explainer is built once per loaded model and reused across calls
+                X_df = pd.DataFrame(X, columns=FEATURE_COLS)
+                shap_values = compute_shap_values(model_entry, X_df)[0]
+                base_value = get_base_value(model_entry, baseline)
+
+            log(f"  ✓ SHAP values calculated")
+            has_shap = True
+
+        except ImportError:
+            log("  ⚠ SHAP not installed - prediction without explanations")
+            log("    Install with: pip install shap")
+            logger.warning("shap is not installed; predictions are returned without explanations")
+            shap_values = None
+            has_shap = False
+        except Exception as e:
+            log(f"  ⚠ Error calculating SHAP: {e}")
+            logger.warning("Error calculating SHAP: %s", e)
+            metrics.inc('surge_prediction_errors_total', stage='shap')
+            shap_values = None
+            has_shap = False
+
+    # ===== BUILD OUTPUT =====
+    log("\nBuilding output...")
+    output_start = time.perf_counter()
+
+    if has_shap:
+        shap_summary = summarize_shap(X[0], shap_values, top_k=top_k, include_all=not top_k_only)
+    else:
+        shap_summary = {'top_positive_factors': [], 'top_negative_factors': [], 'positive_count': 0}
+    formatted_positive = shap_summary['top_positive_factors']
+    formatted_negative = shap_summary['top_negative_factors']
+
+    # Build output structure
+    output = {
+        'predicted_admissions': round(float(prediction), 1),
+        'baseline_average': round(float(baseline), 1),
+        'difference_from_baseline': round(float(prediction - baseline), 1),
+        'surge_alert': bool(is_surge),
+        'surge_threshold': round(float(surge_threshold), 1),
+        'confidence': 'high' if has_shap and shap_summary['positive_count'] >= 3 else 'moderate',
+        'top_positive_factors': formatted_positive,
+        'top_negative_factors': formatted_negative,
+        'shap_metadata': {
+            'base_value': round(float(base_value), 2) if has_shap else None,
+            'total_positive_impact': shap_summary['total_positive_impact'] if has_shap else None,
+            'total_negative_impact': shap_summary['total_negative_impact'] if has_shap else None,
+            'shap_available': has_shap
+        },
+        'input_features': {k: round(float(v), 2) if isinstance(v, (int, float)) else v
+                           for k, v in features.items()},
+    }
+    if not top_k_only:
+        output['all_shap_values'] = shap_summary['all_shap_values'] if has_shap else None
+    output['model_info'] = {
+        'model_type': type(pred_model).__name__,
+        'model_version': model_entry.version,
+        'model_loaded_at': model_entry.loaded_at.strftime('%Y-%m-%d %H:%M:%S'),
+        'prediction_timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    }
+    metrics.observe(STAGE_SECONDS, time.perf_counter() - output_start, stage='output')
+
+    if verbose:
+        _print_summary(output)
+
+    with metrics.timer(STAGE_SECONDS, stage='serialize'):
+        if cache is not None:
+            entry = CachedPrediction(output)
+            cache.put(cache_key, entry)
+            result = entry.as_json(detail) if return_json else entry.as_dict(detail)
+        elif return_json:
+            result = to_json(output, detail)
+        else:
+            result = shape_output(output, detail)
+
+    _finish(start, 'ok')
+    return result
+
+
+def _quiet(*args, **kwargs) -> None:
+    pass
+
+
+def _report_error(log, stage: str, message: str) -> None:
+    log(f"  ✗ {message}")
+    logger.warning("Prediction failed at %s stage: %s", stage, message)
+    metrics.inc('surge_prediction_errors_total', stage=stage)
+    metrics.inc('surge_prediction_requests_total', outcome='error')
+
+
+def _finish(start: float, outcome: str) -> None:
+    metrics.observe(STAGE_SECONDS, time.perf_counter() - start, stage='total')
+    metrics.inc('surge_prediction_requests_total', outcome=outcome)
+
+
+def _print_summary(output: Dict[str, Any]) -> None:
+    """Console summary of a prediction (verbose mode only)."""
+    formatted_positive = output['top_positive_factors']
+    formatted_negative = output['top_negative_factors']
+
+    print("\n" + "=" * 80)
+    print("PREDICTION RESULTS")
+    print("=" * 80)
+    print(f"Predicted Admissions: {output['predicted_admissions']:.1f}")
+    print(f"Baseline: {output['baseline_average']:.1f}")
+    print(f"Difference: {output['difference_from_baseline']:+.1f}")
+    print(f"Surge Alert: {'🚨 YES - Prepare for high volume!' if output['surge_alert'] else '✓ No surge expected'}")
+
+    if formatted_positive:
+        print(f"\n📈 Top Factors INCREASING Admissions:")
+        for i, factor in enumerate(formatted_positive[:3], 1):
+            print(f"  {i}. {factor['reason']} (impact: +{factor['impact']:.1f})")
+
+    if formatted_negative:
+        print(f"\n📉 Top Factors DECREASING Admissions:")
+        for i, factor in enumerate(formatted_negative[:3], 1):
+            print(f"  {i}. {factor['reason']} (impact: {factor['impact']:.1f})")
+
+
+def predict_batch(rows: FeatureRows, baseline: float = 150, surge_threshold: float = 184,
+                  return_json: bool = False, explain: bool = False, top_k: int = 5):
+    """
+    Predict admissions for many feature rows with a single model call
+
+    Features are engineered for all rows in one vectorized pass and the model's
+    predict is called once, so each row's values are identical to what
+    predict_from_features returns for that row on its own.
+
+    Args:
+        rows: List of feature dicts, a DataFrame or an ndarray (see engineer_features)
+        baseline (float): Historical average admissions (for comparison)
+        surge_threshold (float): Admission level considered a surge
+        return_json (bool): Return JSON string vs dict
+        explain (bool): Add top SHAP factors to each row, computed for the
+                        whole batch in one explainer call
+        top_k (int): Number of positive and negative factors per row
+
+    Returns:
+        Dict with one prediction entry per input row, in input order,
+        or None if the model or features are invalid
+
+    Example:
+        result = predict_batch([features_ward_a, features_ward_b])
+        result['predictions'][0]['predicted_admissions']
+    """
+    start = time.perf_counter()
+    try:
+        with metrics.timer(BATCH_STAGE_SECONDS, stage='load'):
+            model_entry = get_registry().entry('surge_model')
+    except Exception as e:
+        logger.warning("Batch prediction failed loading model: %s", e)
+        return None
+
+    try:
+        with metrics.timer(BATCH_STAGE_SECONDS, stage='features'):
+            X = engineer_array(rows)
+    except ValueError as e:
+        logger.warning("Batch prediction rejected input: %s", e)
+        return None
+
+    with metrics.timer(BATCH_STAGE_SECONDS, stage='predict'):
+        predictions = predict_admissions(get_predictor(model_entry, len(X)), X)
+    with metrics.timer(BATCH_STAGE_SECONDS, stage='output'):
+        rows_out = _summarize_predictions(predictions, baseline, surge_threshold)
+    output = {
+        'count': int(len(predictions)),
+        'predictions': rows_out,
+    }
+
+    if explain:
+        try:
+            with metrics.timer(BATCH_STAGE_SECONDS, stage='shap'):
+                X_df = pd.DataFrame(X, columns=FEATURE_COLS)
+                shap_matrix = compute_shap_values(model_entry, X_df)
+            for row, shap_summary in zip(rows_out, summarize_shap_batch(X_df, shap_matrix, top_k=top_k)):
+                row['top_positive_factors'] = shap_summary['top_positive_factors']
+                row['top_negative_factors'] = shap_summary['top_negative_factors']
+            output['shap_base_value'] = round(get_base_value(model_entry, baseline), 2)
+        except ImportError:
+            logger.warning("shap is not installed; batch predictions are returned without explanations")
+        except Exception as e:
+            logger.warning("Error calculating batch SHAP: %s", e)
+
+    output['model_info'] = {
+        'model_type': type(model_entry.model).__name__,
+        'model_version': model_entry.version,
+        'model_loaded_at': model_entry.loaded_at.strftime('%Y-%m-%d %H:%M:%S'),
+        'prediction_timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    }
+
+    with metrics.timer(BATCH_STAGE_SECONDS, stage='serialize'):
+        result = json.dumps(output, indent=2) if return_json else output
+    metrics.observe(BATCH_STAGE_SECONDS, time.perf_counter() - start, stage='total')
+    metrics.inc('surge_batch_rows_total', float(len(predictions)))
+    return result
+
+
+def predict_admissions(model, X) -> np.ndarray:
+    """
+    Raw predictions for an engineered FEATURE_COLS matrix (ndarray or frame)
+
+    `model` is the fitted model or its CompiledEnsemble (see get_predictor).
+    """
+    return np.asarray(model.predict(X), dtype=np.float64)
+
+
+def _summarize_predictions(predictions: np.ndarray, baseline: float,
+                           surge_threshold: float) -> List[Dict[str, Any]]:
+    """Per-row prediction fields, rounded exactly as in predict_from_features."""
+    surges = predictions > surge_threshold
+    return [
+        {
+            'predicted_admissions': round(float(p), 1),
+            'baseline_average': round(float(baseline), 1),
+            'difference_from_baseline': round(float(p - baseline), 1),
+            'surge_alert': bool(s),
+            'surge_threshold': round(float(surge_threshold), 1),
+        }
+        for p, s in zip(predictions.tolist(), surges.tolist())
+    ]
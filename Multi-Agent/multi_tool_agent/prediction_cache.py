@@ -0,0 +1,134 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+
+from .model_registry import LoadedModel, get_registry
+from .response_format import shape_output, to_json
+
+
+class PredictionCache:
+    """
+    LRU + TTL cache of prediction outputs
+
+    Keys combine the engineered feature vector, quantized to `precision`
+    decimals so near-identical requests share an entry, with the model
+    version and the call's output options.
+
+    Args:
+        maxsize: Maximum number of cached predictions
+        ttl: Seconds an entry stays valid
+        precision: Decimals the engineered features are rounded to for the key
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0, precision: int = 2):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.precision = precision
+        self._entries: 'OrderedDict[Hashable, Tuple[float, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def make_key(self, feature_vector: np.ndarray, model_version: str, *options: Hashable) -> Hashable:
+        """Cache key for one engineered feature row."""
+        quantized = np.round(np.asarray(feature_vector, dtype=np.float64), self.precision)
+        # Avoid -0.0 and 0.0 producing different keys
+        quantized += 0.0
+        return (model_version, quantized.tobytes()) + options
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self) -> None:
+        """Drop every entry (called when the registry reloads a model)."""
+        with self._lock:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+            'ttl_seconds': self.ttl,
+            'precision': self.precision,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+        }
+
+
+class CachedPrediction:
+    """A cached output dict plus its lazily serialized JSON, per detail tier."""
+
+    __slots__ = ('output', 'encoded')
+
+    def __init__(self, output: Dict[str, Any]):
+        self.output = output
+        self.encoded: Dict[str, str] = {}
+
+    def as_json(self, detail: str = 'full') -> str:
+        text = self.encoded.get(detail)
+        if text is None:
+            text = self.encoded[detail] = to_json(self.output, detail)
+        return text
+
+    def as_dict(self, detail: str = 'full') -> Dict[str, Any]:
+        # Callers may mutate the result; never hand out the cached object itself
+        return copy.deepcopy(shape_output(self.output, detail))
+
+
+_cache: Optional[PredictionCache] = None
+_cache_lock = threading.Lock()
+
+
+def _on_model_reload(name: str, entry: LoadedModel) -> None:
+    if name == 'surge_model' and _cache is not None:
+        _cache.invalidate()
+
+
+def get_prediction_cache() -> PredictionCache:
+    """Return the process-wide prediction cache, invalidated whenever the surge model reloads."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = PredictionCache()
+                get_registry().add_reload_listener(_on_model_reload)
+    return _cache
+
+
+def configure_prediction_cache(maxsize: int = 1024, ttl: float = 300.0, precision: int = 2) -> PredictionCache:
+    """Replace the process-wide cache with one using the given settings."""
+    global _cache
+    get_prediction_cache()
+    with _cache_lock:
+        _cache = PredictionCache(maxsize=maxsize, ttl=ttl, precision=precision)
+    return _cache
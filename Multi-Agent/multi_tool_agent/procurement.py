@@ -0,0 +1,496 @@
+import json
+import math
+import os
+import time
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+
+# Procurement rules from procurement_agent's instruction
+BUFFER_PCT = 0.20          # (daily demand x days until surge) + 20% buffer
+MIN_SUPPLY_DAYS = 3        # never plan for less than a 3-day supply
+GREEN_DAYS = 3.0           # > 3 days of supply
+RED_DAYS = 1.0             # < 1 day of supply (1-3 days is YELLOW)
+
+ALERT_LEVELS = np.array(['RED', 'YELLOW', 'GREEN'])
+
+# Stockout simulation defaults: relative spread of the whole forecast, of
+# single days around it, and of supplier lead times
+DEMAND_CV = 0.20
+DAILY_CV = 0.10
+LEAD_CV = 0.25
+SIMULATION_PATHS = 5000
+# Upper bound on items x paths x days held in memory by one simulation
+MAX_SIMULATION_CELLS = int(os.environ.get('STOCKOUT_MAX_CELLS', '20000000'))
+
+# Units used per surge admission (admissions above BASELINE_ADMISSIONS), from
+# data/historical_surge.csv (2022-2024 totals: 2.23 oxygen cylinders and 0.11
+# ICU admissions per surge patient). The file has no ventilator data; 0.04
+# assumes about a third of surge ICU admissions are ventilated
+DEFAULT_USAGE_PER_ADMISSION = {
+    'oxygen_cylinders': 2.23,
+    'icu_beds': 0.11,
+    'ventilators': 0.04,
+}
+BASELINE_ADMISSIONS = 150
+
+# Beds and ventilators are capacity, not consumables: each admission holds one
+# for the length of stay, so the requirement is peak units in use, not the sum
+CAPACITY_ITEMS = ('icu_beds', 'ventilators')
+LENGTH_OF_STAY_DAYS = 4
+
+DemandInput = Union[float, List[float]]
+
+
+def _demand_matrix(items: List[str], days: int, daily_demand: Optional[Dict[str, DemandInput]],
+                   predicted_admissions: Optional[List[float]],
+                   usage_per_admission: Optional[Dict[str, float]],
+                   baseline: float = BASELINE_ADMISSIONS) -> np.ndarray:
+    """
+    Per-item, per-day demand over the surge window, shape (n_items, days)
+
+    For capacity items this is new units taken into use per day (e.g. ICU
+    admissions), not units in use.
+    """
+    demand = np.full((len(items), days), np.nan)
+    given = daily_demand or {}
+
+    if predicted_admissions is not None:
+        admissions = np.asarray(predicted_admissions, dtype=np.float64).ravel()
+        if admissions.size == 0:
+            raise ValueError("predicted_admissions is empty")
+        # Hold the last forecast day if the surge is further out than the forecast
+        admissions = np.pad(admissions[:days], (0, max(days - admissions.size, 0)), mode='edge')
+        # The usage rates are per surge patient, so only admissions above the baseline count
+        admissions = np.maximum(admissions - baseline, 0.0)
+        rates = {**DEFAULT_USAGE_PER_ADMISSION, **(usage_per_admission or {})}
+        usage = np.array([rates.get(item, np.nan) for item in items])
+        demand = np.outer(usage, admissions)
+
+    for i, item in enumerate(items):
+        if item in given:
+            values = np.atleast_1d(np.asarray(given[item], dtype=np.float64))
+            demand[i] = np.pad(values[:days], (0, max(days - values.size, 0)), mode='edge')
+
+    missing = [item for item, row in zip(items, demand) if np.isnan(row).any()]
+    if missing:
+        raise ValueError(f"No demand for {missing}: pass daily_demand or usage_per_admission for them")
+    return demand
+
+
+def in_use(demand: np.ndarray, length_of_stay: int = LENGTH_OF_STAY_DAYS) -> np.ndarray:
+    """Units in use each day when every unit of daily demand is held for `length_of_stay` days."""
+    cumulative = np.cumsum(demand, axis=-1)
+    released = np.zeros_like(cumulative)
+    if length_of_stay < cumulative.shape[-1]:
+        released[..., length_of_stay:] = cumulative[..., :-length_of_stay]
+    return cumulative - released
+
+
+def compute_requirements(stock: np.ndarray, demand: np.ndarray, lead_days: Optional[np.ndarray] = None,
+                         buffer_pct: float = BUFFER_PCT,
+                         min_supply_days: float = MIN_SUPPLY_DAYS,
+                         capacity: Optional[np.ndarray] = None,
+                         length_of_stay: int = LENGTH_OF_STAY_DAYS) -> Dict[str, np.ndarray]:
+    """
+    Vectorized procurement requirements for every item at once
+
+    Consumables need their total demand over the window; capacity items
+    (beds, ventilators) need their peak units in use, see in_use().
+
+    Args:
+        stock: Current stock per item (free units for capacity items), shape (n,)
+        demand: Daily demand per item over the days until the surge, shape (n, days)
+        lead_days: Supplier lead time per item in days (NaN if unknown), shape (n,)
+        buffer_pct: Safety buffer on top of surge demand
+        min_supply_days: Minimum days of average demand to hold (consumables)
+        capacity: Which items are capacity, shape (n,) bool (default: none)
+        length_of_stay: Days a capacity unit stays in use
+
+    Returns:
+        Dict of (n,) arrays: avg_daily_demand, surge_demand (total use, or peak
+        units in use for capacity items), required, deficit, order_quantity,
+        days_of_supply (for capacity items, days until units in use exceed
+        stock), alert_code (0 RED, 1 YELLOW, 2 GREEN), lead_time_ok and
+        stockout_before_delivery
+    """
+    stock = np.asarray(stock, dtype=np.float64)
+    demand = np.atleast_2d(np.asarray(demand, dtype=np.float64))
+    days = demand.shape[1]
+    capacity = np.zeros(stock.shape, dtype=bool) if capacity is None else np.asarray(capacity, dtype=bool)
+
+    occupancy = in_use(demand, length_of_stay)
+    surge_demand = np.where(capacity, occupancy.max(axis=1), demand.sum(axis=1))
+    avg_daily = demand.sum(axis=1) / days
+    required = np.ceil(np.where(capacity, surge_demand * (1 + buffer_pct),
+                                np.maximum(surge_demand * (1 + buffer_pct), avg_daily * min_supply_days)))
+    deficit = np.maximum(required - stock, 0.0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        days_of_supply = np.where(avg_daily > 0, stock / avg_daily, np.inf)
+    over = occupancy > stock[:, None]
+    days_of_supply = np.where(capacity, np.where(over.any(axis=1), over.argmax(axis=1), np.inf), days_of_supply)
+    alert_code = np.where(days_of_supply < RED_DAYS, 0, np.where(days_of_supply <= GREEN_DAYS, 1, 2))
+
+    if lead_days is None:
+        lead_days = np.full(stock.shape, np.nan)
+    lead_days = np.asarray(lead_days, dtype=np.float64)
+    known = ~np.isnan(lead_days)
+    return {
+        'avg_daily_demand': avg_daily,
+        'surge_demand': surge_demand,
+        'required': required,
+        'deficit': deficit,
+        'order_quantity': np.ceil(deficit),
+        'days_of_supply': days_of_supply,
+        'alert_code': alert_code,
+        # Delivery must land before the surge starts...
+        'lead_time_ok': np.where(known, lead_days <= days, True),
+        # ...and current stock must last until it does
+        'stockout_before_delivery': known & (days_of_supply < lead_days),
+    }
+
+
+def _error(message: str, return_json: bool):
+    output = {'error': message}
+    return json.dumps(output) if return_json else output
+
+
+def calculate_procurement_requirements(current_stock: Dict[str, float], days_until_surge: int = 7,
+                                       daily_demand: Optional[Dict[str, Any]] = None,
+                                       predicted_admissions: Optional[List[float]] = None,
+                                       usage_per_admission: Optional[Dict[str, float]] = None,
+                                       lead_days: Optional[Dict[str, float]] = None,
+                                       baseline: float = BASELINE_ADMISSIONS,
+                                       return_json: bool = False):
+    """
+    Compute requirements, deficits, order quantities and alert levels for all items in one pass.
+
+    Applies the procurement rules: requirement = (daily demand x days until surge) + 20% buffer,
+    at least a 3-day supply; alert GREEN > 3 days of supply, YELLOW 1-3 days, RED < 1 day;
+    supplier lead time must fit before the surge and before current stock runs out.
+    ICU beds and ventilators are capacity: their requirement is the peak number in use
+    (each surge ICU admission holds one for 4 days) + 20%, against free units in stock.
+
+    Args:
+        current_stock (dict): Units on hand per item, e.g. {'oxygen_cylinders': 250, 'icu_beds': 6}
+        days_until_surge (int): Days between today and the surge
+        daily_demand (dict): Optional demand per item - one units/day value or a list of
+            per-day values (e.g. {'oxygen_cylinders': 150})
+        predicted_admissions (list): Optional forecast admissions per day (e.g. a
+            forecast_horizon trajectory); demand = (admissions - baseline) x usage_per_admission
+        usage_per_admission (dict): Units per surge admission per day for items not in
+            daily_demand (defaults: oxygen_cylinders 2.23, icu_beds 0.11, ventilators 0.04)
+        lead_days (dict): Optional supplier lead time in days per item
+        baseline (float): Normal daily admissions; only admissions above it use surge supplies
+        return_json (bool): Return JSON string vs dict
+
+    Returns:
+        Per-item requirement, deficit, order_quantity, days_of_supply, alert and lead-time
+        checks (most urgent first) plus a summary of alert counts and orders needed, or
+        {'error': ...} if the arguments are invalid
+
+    Example:
+        calculate_procurement_requirements({'oxygen_cylinders': 250}, days_until_surge=7,
+                                           daily_demand={'oxygen_cylinders': 150},
+                                           lead_days={'oxygen_cylinders': 2})
+        # requirement 1050 + 20% = 1260, deficit 1010, 1.7 days of supply -> YELLOW
+    """
+    if days_until_surge < 1:
+        return _error(f"days_until_surge must be at least 1, got {days_until_surge}", return_json)
+    items = list(current_stock or {})
+    if not items:
+        return _error("current_stock is empty", return_json)
+    try:
+        stock = np.array([current_stock[item] for item in items], dtype=np.float64)
+        demand = _demand_matrix(items, int(days_until_surge), daily_demand, predicted_admissions,
+                                usage_per_admission, baseline)
+        leads = np.array([(lead_days or {}).get(item, np.nan) for item in items], dtype=np.float64)
+    except (TypeError, ValueError) as e:
+        return _error(str(e), return_json)
+    capacity = np.array([item in CAPACITY_ITEMS for item in items])
+
+    result = compute_requirements(stock, demand, leads, capacity=capacity)
+    alerts = ALERT_LEVELS[result['alert_code']]
+    # Most urgent first: alert level, then days of supply
+    order = np.lexsort((result['days_of_supply'], result['alert_code']))
+
+    rows = []
+    for i in order:
+        days_of_supply = float(result['days_of_supply'][i])
+        rows.append({
+            'item': items[i],
+            'kind': 'capacity' if capacity[i] else 'consumable',
+            'current_stock': float(stock[i]),
+            'avg_daily_demand': round(float(result['avg_daily_demand'][i]), 1),
+            'surge_demand': round(float(result['surge_demand'][i]), 1),
+            'required': int(result['required'][i]),
+            'deficit': int(result['deficit'][i]),
+            'order_quantity': int(result['order_quantity'][i]),
+            'days_of_supply': round(days_of_supply, 2) if math.isfinite(days_of_supply) else None,
+            'alert': str(alerts[i]),
+            'urgent': bool(result['alert_code'][i] == 0),
+            'lead_days': None if np.isnan(leads[i]) else float(leads[i]),
+            'lead_time_ok': bool(result['lead_time_ok'][i]),
+            'stockout_before_delivery': bool(result['stockout_before_delivery'][i]),
+            'reasoning': (f"{'Peak in use' if capacity[i] else 'Predicted surge'}: {result['surge_demand'][i]:.0f}, "
+                          f"Current stock: {stock[i]:.0f}, Deficit: {result['deficit'][i]:.0f}"),
+        })
+
+    output = {
+        'days_until_surge': int(days_until_surge),
+        'buffer_pct': BUFFER_PCT,
+        'items': rows,
+        'summary': {
+            'RED': int((result['alert_code'] == 0).sum()),
+            'YELLOW': int((result['alert_code'] == 1).sum()),
+            'GREEN': int((result['alert_code'] == 2).sum()),
+            'orders_needed': [r['item'] for r in rows if r['order_quantity'] > 0],
+            'total_order_units': int(result['order_quantity'].sum()),
+            'lead_time_alerts': [r['item'] for r in rows if r['order_quantity'] > 0 and
+                                 (not r['lead_time_ok'] or r['stockout_before_delivery'])],
+        },
+    }
+    if return_json:
+        return json.dumps(output, indent=2)
+    return output
+
+
+def _lognormal_factors(rng: np.random.Generator, cv: float, shape) -> np.ndarray:
+    """Multiplicative noise with mean 1 and coefficient of variation `cv` (float32)."""
+    if cv <= 0:
+        return np.ones(shape, dtype=np.float32)
+    sigma = math.sqrt(math.log1p(cv * cv))
+    noise = rng.standard_normal(shape, dtype=np.float32)
+    return np.exp(noise * np.float32(sigma) - np.float32(sigma * sigma / 2))
+
+
+def _median_day(days: np.ndarray, mask: np.ndarray, horizon: int) -> np.ndarray:
+    """Per-row median of integer `days` (1..horizon) where `mask`, NaN for rows with none."""
+    n_rows = days.shape[0]
+    bins = horizon + 1
+    index = np.arange(n_rows)[:, None] * bins + np.where(mask, days, 0)
+    counts = np.bincount(index.ravel(), minlength=n_rows * bins).reshape(n_rows, bins)
+    counts[:, 0] = 0
+    running = np.cumsum(counts, axis=1)
+    total = running[:, -1]
+    # Lower median, as a whole day
+    median = (running >= ((total + 1) // 2)[:, None]).argmax(axis=1).astype(np.float64)
+    median[total == 0] = np.nan
+    return median
+
+
+def simulate_depletion(stock: np.ndarray, demand: np.ndarray, lead_days: np.ndarray,
+                       service_level: float = 0.95, demand_cv: float = DEMAND_CV,
+                       daily_cv: float = DAILY_CV, lead_cv: float = LEAD_CV,
+                       n_paths: int = SIMULATION_PATHS, seed: Optional[int] = 0,
+                       capacity: Optional[np.ndarray] = None,
+                       length_of_stay: int = LENGTH_OF_STAY_DAYS) -> Dict[str, np.ndarray]:
+    """
+    Monte Carlo stock depletion for every item at once
+
+    Each path scales an item's forecast by one lognormal forecast-error
+    factor for the whole window (demand_cv, per item) and by a factor per day
+    (daily_cv) shared by all items, since every item's demand follows the
+    same admissions. Lead times are lognormal (mean lead_days, lead_cv),
+    rounded to whole days. Demand past the forecast holds its last day.
+    Current stock serves demand until the order arrives (unmet demand is
+    lost); the order covers the rest of the window. Capacity items (beds,
+    ventilators) run short when units in use (see in_use) exceed stock, and
+    their order covers the window's peak in use.
+
+    Args:
+        stock: Current stock per item, shape (n,)
+        demand: Forecast daily demand per item over the planning window, shape (n, days)
+        lead_days: Mean supplier lead time per item in days, shape (n,)
+        service_level: Share of paths the order quantity must cover
+        demand_cv, daily_cv, lead_cv: Coefficients of variation (0 = deterministic)
+        n_paths: Paths per item
+        seed: Random seed (None for a fresh one)
+        capacity: Which items are capacity, shape (n,) bool (default: none)
+        length_of_stay: Days a capacity unit stays in use
+
+    Returns:
+        Dict of (n,) arrays: stockout_probability (demand before delivery exceeds
+        stock), expected_shortfall (mean units short before delivery, over all
+        paths), stockout_day_p50 (median day stock runs out on those paths, NaN
+        if none), late_delivery_probability (delivery after the window),
+        window_demand_p50 / window_demand_p95 (peak in use for capacity items),
+        and order_quantity (units that leave no shortage after delivery on
+        `service_level` of paths)
+    """
+    stock = np.asarray(stock, dtype=np.float64)
+    demand = np.atleast_2d(np.asarray(demand, dtype=np.float64))
+    lead_days = np.asarray(lead_days, dtype=np.float64)
+    n_items, window = demand.shape
+    if not 0 < service_level < 1:
+        raise ValueError("service_level must be between 0 and 1")
+    if np.isnan(lead_days).any() or (lead_days < 0).any():
+        raise ValueError("lead_days must be known and non-negative for every item")
+
+    rng = np.random.default_rng(seed)
+
+    # ===== STEP 1: LEAD TIMES =====
+    leads = lead_days[:, None] * _lognormal_factors(rng, lead_cv, (n_items, n_paths))
+    leads = np.rint(leads).astype(np.int64)
+
+    horizon = max(window, int(leads.max()))
+    if n_items * n_paths * horizon > MAX_SIMULATION_CELLS:
+        raise ValueError(f"{n_items} items x {n_paths} paths x {horizon} days exceeds "
+                         f"{MAX_SIMULATION_CELLS:,} cells; lower n_paths")
+
+    # ===== STEP 2: CUMULATIVE DEMAND PATHS =====
+    # (items, days, paths) float32, summed day by day: each step adds whole
+    # contiguous rows of paths, ~15x faster than np.cumsum over a short axis
+    forecast = np.pad(demand, ((0, 0), (0, horizon - window)), mode='edge').astype(np.float32)
+    cumulative = forecast[:, :, None] * _lognormal_factors(rng, daily_cv, (1, horizon, n_paths))
+    for day in range(1, horizon):
+        np.add(cumulative[:, day], cumulative[:, day - 1], out=cumulative[:, day])
+    capacity = np.zeros(n_items, dtype=bool) if capacity is None else np.asarray(capacity, dtype=bool)
+    if capacity.any():
+        # Capacity rows become the running peak of units in use: still
+        # non-decreasing, so everything below reads them like demand to date
+        held = cumulative[capacity]
+        if length_of_stay < horizon:
+            held[:, length_of_stay:] -= cumulative[capacity][:, :-length_of_stay]
+        cumulative[capacity] = np.maximum.accumulate(held, axis=1)
+    # The forecast-error factor is constant along a path, so it is applied to
+    # the values read out (and to stock as a threshold), not the whole array
+    level = _lognormal_factors(rng, demand_cv, (n_items, n_paths)).astype(np.float64)
+
+    def demand_over(days: np.ndarray) -> np.ndarray:
+        """Demand over the first `days` days of each path (0 for 0 days)."""
+        taken = np.take_along_axis(cumulative, np.maximum(days - 1, 0)[:, None, :], axis=1)[:, 0, :]
+        return np.where(days > 0, taken * level, 0.0)
+
+    # ===== STEP 3: STOCKOUT BEFORE DELIVERY =====
+    shortfall = np.maximum(demand_over(leads) - stock[:, None], 0.0)
+    stocked_out = shortfall > 0
+    # Cumulative demand only grows, so the days it stays within stock count up to the stockout day
+    threshold = (stock[:, None] / level).astype(np.float32)
+    first_day = (cumulative <= threshold[:, None, :]).sum(axis=1) + 1
+
+    # ===== STEP 4: ORDER QUANTITY FOR THE SERVICE LEVEL =====
+    # Stock left at delivery carries on; the order covers what remains of the
+    # window (nothing, if it arrives after the window)
+    window_demand = cumulative[:, window - 1, :] * level
+    need = np.where(capacity[:, None], window_demand - stock[:, None],
+                    window_demand - np.maximum(stock[:, None], demand_over(np.minimum(leads, window))))
+    need = np.where(leads >= window, 0.0, np.maximum(need, 0.0))
+    window_p50, window_p95 = np.quantile(window_demand, [0.5, 0.95], axis=1)
+
+    return {
+        'stockout_probability': stocked_out.mean(axis=1),
+        'expected_shortfall': shortfall.mean(axis=1),
+        'stockout_day_p50': _median_day(first_day, stocked_out, horizon),
+        'late_delivery_probability': (leads > window).mean(axis=1),
+        'window_demand_p50': window_p50,
+        'window_demand_p95': window_p95,
+        'order_quantity': np.ceil(np.quantile(need, service_level, axis=1)),
+    }
+
+
+def simulate_stockout_risk(current_stock: Dict[str, float], lead_days: Dict[str, float],
+                           days_until_surge: int = 7,
+                           daily_demand: Optional[Dict[str, Any]] = None,
+                           predicted_admissions: Optional[List[float]] = None,
+                           usage_per_admission: Optional[Dict[str, float]] = None,
+                           service_level: float = 0.95, demand_cv: float = DEMAND_CV,
+                           lead_cv: float = LEAD_CV, n_paths: int = SIMULATION_PATHS,
+                           seed: int = 0, baseline: float = BASELINE_ADMISSIONS, return_json: bool = False):
+    """
+    Probability of running out before the supplier delivers, for all items in one pass.
+
+    Simulates thousands of demand and lead-time paths per item around the forecast
+    instead of a single point estimate, and sizes the order for a target service level.
+    Takes the same stock and demand arguments as calculate_procurement_requirements.
+
+    Args:
+        current_stock (dict): Units on hand per item, e.g. {'oxygen_cylinders': 250, 'icu_beds': 6}
+        lead_days (dict): Supplier lead time in days per item (e.g. the fastest supplier's
+            lead_days from get_resource_snapshot)
+        days_until_surge (int): Planning window in days
+        daily_demand (dict): Optional forecast demand per item - one units/day value or a
+            list of per-day values
+        predicted_admissions (list): Optional forecast admissions per day (e.g. a
+            forecast_horizon trajectory); demand = (admissions - baseline) x usage_per_admission
+        usage_per_admission (dict): Units per surge admission per day for items not in
+            daily_demand (defaults: oxygen_cylinders 2.23, icu_beds 0.11, ventilators 0.04)
+        service_level (float): Share of simulated paths the order must fully cover
+        demand_cv (float): Forecast uncertainty as a coefficient of variation
+        lead_cv (float): Lead-time uncertainty as a coefficient of variation
+        n_paths (int): Simulated paths per item
+        seed (int): Random seed, so repeated calls agree
+        baseline (float): Normal daily admissions; only admissions above it use surge supplies
+        return_json (bool): Return JSON string vs dict
+
+    Returns:
+        Per-item stockout_probability before delivery, expected_shortfall (units),
+        median stockout day, late_delivery_probability, window demand p50/p95,
+        order_quantity at the service level next to the rule-based one (highest
+        risk first), plus a summary of at-risk items and total order units, or
+        {'error': ...} if the arguments are invalid
+
+    Example:
+        simulate_stockout_risk({'oxygen_cylinders': 250, 'icu_beds': 6},
+                               lead_days={'oxygen_cylinders': 2, 'icu_beds': 5},
+                               days_until_surge=7, daily_demand={'oxygen_cylinders': 150},
+                               predicted_admissions=[180, 190, 200])
+    """
+    start = time.perf_counter()
+    if days_until_surge < 1:
+        return _error(f"days_until_surge must be at least 1, got {days_until_surge}", return_json)
+    items = list(current_stock or {})
+    if not items:
+        return _error("current_stock is empty", return_json)
+    missing = [item for item in items if item not in (lead_days or {})]
+    if missing:
+        return _error(f"No lead_days for {missing}: pass the chosen supplier's lead time for every item",
+                      return_json)
+    capacity = np.array([item in CAPACITY_ITEMS for item in items])
+    try:
+        stock = np.array([current_stock[item] for item in items], dtype=np.float64)
+        demand = _demand_matrix(items, int(days_until_surge), daily_demand, predicted_admissions,
+                                usage_per_admission, baseline)
+        leads = np.array([lead_days[item] for item in items], dtype=np.float64)
+        sim = simulate_depletion(stock, demand, leads, service_level=service_level, demand_cv=demand_cv,
+                                 lead_cv=lead_cv, n_paths=int(n_paths), seed=seed, capacity=capacity)
+    except (TypeError, ValueError) as e:
+        return _error(str(e), return_json)
+    rule = compute_requirements(stock, demand, leads, capacity=capacity)
+    # Highest stockout risk first, then largest expected shortfall
+    order = np.lexsort((-sim['expected_shortfall'], -sim['stockout_probability']))
+
+    rows = []
+    for i in order:
+        stockout_day = float(sim['stockout_day_p50'][i])
+        rows.append({
+            'item': items[i],
+            'kind': 'capacity' if capacity[i] else 'consumable',
+            'current_stock': float(stock[i]),
+            'lead_days': float(leads[i]),
+            'stockout_probability': round(float(sim['stockout_probability'][i]), 3),
+            'expected_shortfall': round(float(sim['expected_shortfall'][i]), 1),
+            'stockout_day_p50': None if math.isnan(stockout_day) else stockout_day,
+            'late_delivery_probability': round(float(sim['late_delivery_probability'][i]), 3),
+            'window_demand_p50': round(float(sim['window_demand_p50'][i]), 1),
+            'window_demand_p95': round(float(sim['window_demand_p95'][i]), 1),
+            'order_quantity': int(sim['order_quantity'][i]),
+            'rule_order_quantity': int(rule['order_quantity'][i]),
+        })
+
+    output = {
+        'days_until_surge': int(days_until_surge),
+        'service_level': service_level,
+        'paths_per_item': int(n_paths),
+        'items': rows,
+        'summary': {
+            'stockout_risk': [r['item'] for r in rows if r['stockout_probability'] >= 1 - service_level],
+            'late_delivery_risk': [r['item'] for r in rows if r['late_delivery_probability'] >= 1 - service_level],
+            'total_order_units': int(sim['order_quantity'].sum()),
+        },
+        'elapsed_ms': round((time.perf_counter() - start) * 1000, 2),
+    }
+    if return_json:
+        return json.dumps(output, indent=2)
+    return output
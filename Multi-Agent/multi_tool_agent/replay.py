@@ -0,0 +1,540 @@
+"""
+Record a conversation against the live services, then replay it offline
+
+    cd Multi-Agent
+    # Live Gemini, MCP server and backend: saves every LLM response, MCP tool
+    # result and backend response the conversation produced
+    python -m multi_tool_agent.replay record diwali.json "Check ICU bed status" "Prepare for Diwali surge"
+
+    # No network: recorded LLM responses, a stub MCP server and a stub backend
+    python -m multi_tool_agent.replay replay diwali.json --warmup 1 --repeat 5 --report replay_report.json
+
+Both modes report wall time per hop: router / coordinator / sub-agent
+turns (inclusive of what they delegate to), LLM calls, tool calls and
+serialization (encoding each LLM request and tool result). Local function
+tools (forecasts, predictions, procurement maths) run for real during
+replay, so orchestration and tool changes can be benchmarked
+deterministically. With --latency recorded, the LLM and both stubs wait as
+long as the live services did instead of answering immediately. --trace
+appends per-hop spans to a file for `python -m multi_tool_agent.tracing summary`.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+
+from google.adk.agents import BaseAgent, LlmAgent
+from google.adk.apps import App
+from google.adk.models import LlmResponse
+from google.adk.plugins.base_plugin import BasePlugin
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+from .lazy_tools import LazyToolset
+from .metrics import metrics
+from .replay_stubs import LATENCY_MODES, StubBackend, load_fixture
+from .tracing import TracingPlugin, build_tracer_provider, walk_agents
+
+logger = logging.getLogger(__name__)
+
+FIXTURE_VERSION = 1
+HOPS = ('router_turn', 'coordinator_turn', 'sub_agent_turn', 'llm_call', 'tool_call', 'serialization')
+# Text returned when a replay asks an agent's LLM for more turns than were recorded
+EXHAUSTED_TEXT = '[replay: no recorded LLM response left for this agent]'
+
+HOP_SECONDS = 'agent_hop_seconds'
+metrics.describe(HOP_SECONDS, 'Wall time of each agent hop (turns, LLM calls, tool calls, serialization)')
+
+_APP_NAME = 'replay'
+_USER_ID = 'replay'
+
+
+def _mcp_toolsets(root: BaseAgent, resolve: bool) -> List[Tuple[BaseAgent, int, Any]]:
+    """(agent, index in agent.tools, PooledMCPToolset) for every pooled MCP toolset."""
+    found = []
+    for agent in walk_agents(root):
+        for index, tool in enumerate(getattr(agent, 'tools', None) or []):
+            if not isinstance(tool, LazyToolset) or not (resolve or tool.is_resolved):
+                continue
+            try:
+                resolved = tool.resolve()
+            except Exception as e:
+                logger.warning("Toolset %s failed to load: %s", tool.name, e)
+                continue
+            # Only MCP toolsets expose a session pool
+            if hasattr(resolved, 'pool'):
+                found.append((agent, index, resolved))
+    return found
+
+
+class HopTimer(BasePlugin):
+    """
+    Runner plugin timing every hop of a conversation
+
+    Spans are kept in `spans` (hop, ms, agent/tool/source labels) and
+    observed into the agent_hop_seconds histogram.
+    """
+
+    def __init__(self, root: BaseAgent):
+        super().__init__(name='hop_timer')
+        self.root_name = root.name
+        self.coordinators = {a.name for a in walk_agents(root) if isinstance(a, LlmAgent) and a.sub_agents}
+        self.spans: List[Dict[str, Any]] = []
+        self._open: Dict[Tuple[str, ...], List[float]] = {}
+
+    def add(self, hop: str, seconds: float, **labels: Any) -> None:
+        self.spans.append({'hop': hop, 'ms': seconds * 1000, **labels})
+        metrics.observe(HOP_SECONDS, seconds, hop=hop)
+
+    def _start(self, *key: str) -> None:
+        self._open.setdefault(key, []).append(time.perf_counter())
+
+    def _stop(self, *key: str) -> Optional[float]:
+        started = self._open.get(key)
+        return time.perf_counter() - started.pop() if started else None
+
+    def _turn(self, agent: BaseAgent) -> str:
+        if agent.name in self.coordinators:
+            return 'coordinator_turn'
+        return 'router_turn' if agent.name == self.root_name else 'sub_agent_turn'
+
+    def _serialization(self, source: str, encode, **labels: Any) -> None:
+        start = time.perf_counter()
+        try:
+            size = len(encode())
+        except Exception:
+            return
+        self.add('serialization', time.perf_counter() - start, source=source, bytes=size, **labels)
+
+    async def before_agent_callback(self, *, agent, callback_context):
+        self._start('agent', callback_context.invocation_id, agent.name)
+
+    async def after_agent_callback(self, *, agent, callback_context):
+        seconds = self._stop('agent', callback_context.invocation_id, agent.name)
+        if seconds is not None:
+            self.add(self._turn(agent), seconds, agent=agent.name)
+
+    async def before_model_callback(self, *, callback_context, llm_request):
+        # What would go over the wire to the model
+        self._serialization('llm_request', lambda: llm_request.model_dump_json(exclude_none=True),
+                            agent=callback_context.agent_name)
+        self._start('llm', callback_context.invocation_id, callback_context.agent_name)
+
+    async def after_model_callback(self, *, callback_context, llm_response):
+        seconds = self._stop('llm', callback_context.invocation_id, callback_context.agent_name)
+        if seconds is not None:
+            self.add('llm_call', seconds, agent=callback_context.agent_name)
+
+    async def before_tool_callback(self, *, tool, tool_args, tool_context):
+        self._start('tool', tool_context.function_call_id or tool.name)
+
+    async def after_tool_callback(self, *, tool, tool_args, tool_context, result):
+        seconds = self._stop('tool', tool_context.function_call_id or tool.name)
+        if seconds is not None:
+            self.add('tool_call', seconds, tool=tool.name, agent=tool_context.agent_name)
+        self._serialization('tool_result', lambda: json.dumps(result, default=str), tool=tool.name)
+
+
+class Recorder(BasePlugin):
+    """Runner plugin capturing LLM responses, MCP tool results and backend responses."""
+
+    def __init__(self):
+        super().__init__(name='replay_recorder')
+        self.llm: Dict[str, List[Dict[str, Any]]] = {}
+        self.mcp_calls: Dict[str, List[Dict[str, Any]]] = {}
+        self.http: Dict[str, Dict[str, Any]] = {}
+        self._started: Dict[Tuple[str, str], float] = {}
+
+    async def before_model_callback(self, *, callback_context, llm_request):
+        self._started[('llm', callback_context.agent_name)] = time.perf_counter()
+
+    async def after_model_callback(self, *, callback_context, llm_response):
+        start = self._started.pop(('llm', callback_context.agent_name), time.perf_counter())
+        self.llm.setdefault(callback_context.agent_name, []).append({
+            'response': llm_response.model_dump(mode='json', exclude_none=True),
+            'latency_ms': round((time.perf_counter() - start) * 1000, 3),
+        })
+
+    async def before_tool_callback(self, *, tool, tool_args, tool_context):
+        self._started[('tool', tool_context.function_call_id or tool.name)] = time.perf_counter()
+
+    async def after_tool_callback(self, *, tool, tool_args, tool_context, result):
+        start = self._started.pop(('tool', tool_context.function_call_id or tool.name), time.perf_counter())
+        pool = getattr(tool, 'pool', None)
+        if pool is not None:
+            self.mcp_calls.setdefault(pool.name, []).append({
+                'tool': tool.name,
+                'args': tool_args,
+                'result': result,
+                'latency_ms': round((time.perf_counter() - start) * 1000, 3),
+            })
+
+    def attach_http(self, client, base_url: str) -> None:
+        """Capture every response `client` receives, keyed by path relative to base_url."""
+        base_path = urlparse(base_url).path.rstrip('/')
+
+        async def on_request(request) -> None:
+            request.extensions['replay_start'] = time.perf_counter()
+
+        async def on_response(response) -> None:
+            await response.aread()
+            start = response.request.extensions.get('replay_start', time.perf_counter())
+            path = response.request.url.path
+            try:
+                body = response.json()
+            except ValueError:
+                body = None
+            self.http[path[len(base_path):] if path.startswith(base_path) else path] = {
+                'status': response.status_code,
+                'body': body,
+                'latency_ms': round((time.perf_counter() - start) * 1000, 3),
+            }
+
+        client.event_hooks['request'].append(on_request)
+        client.event_hooks['response'].append(on_response)
+
+
+class LlmReplay(BasePlugin):
+    """
+    Runner plugin answering every LLM call from the fixture (no model is called)
+
+    Responses are served per agent in recorded order. An agent asking for
+    more turns than were recorded gets EXHAUSTED_TEXT and is listed in
+    `exhausted`, which means the orchestration no longer matches the recording.
+    """
+
+    def __init__(self, responses: Dict[str, List[Dict[str, Any]]], timer: HopTimer, latency: str = 'zero',
+                 tracer: Optional[TracingPlugin] = None):
+        super().__init__(name='llm_replay')
+        self._queues = {agent: list(items) for agent, items in responses.items()}
+        self.timer = timer
+        self.latency = latency
+        self.tracer = tracer
+        self.exhausted: List[str] = []
+
+    def unused(self) -> Dict[str, int]:
+        return {agent: len(queue) for agent, queue in self._queues.items() if queue}
+
+    async def before_model_callback(self, *, callback_context, llm_request):
+        agent = callback_context.agent_name
+        start = time.perf_counter()
+        queue = self._queues.get(agent)
+        if queue:
+            recorded = queue.pop(0)
+            if self.latency == 'recorded':
+                await asyncio.sleep(recorded.get('latency_ms', 0) / 1000)
+            response = LlmResponse.model_validate(recorded['response'])
+        else:
+            self.exhausted.append(agent)
+            response = LlmResponse(content=types.Content(role='model', parts=[types.Part(text=EXHAUSTED_TEXT)]))
+        # Returning a response skips the model call and after_model_callback
+        self.timer.add('llm_call', time.perf_counter() - start, agent=agent)
+        if self.tracer is not None:
+            await self.tracer.after_model_callback(callback_context=callback_context, llm_response=response)
+        return response
+
+
+async def _converse(root: BaseAgent, messages: Sequence[str], plugins: List[BasePlugin]) -> List[float]:
+    """Send `messages` in order through one session; returns wall seconds per message."""
+    runner = InMemoryRunner(app=App(name=_APP_NAME, root_agent=root, plugins=plugins))
+    session = await runner.session_service.create_session(app_name=_APP_NAME, user_id=_USER_ID)
+    walls = []
+    try:
+        for message in messages:
+            start = time.perf_counter()
+            content = types.Content(role='user', parts=[types.Part(text=message)])
+            async for _ in runner.run_async(user_id=_USER_ID, session_id=session.id, new_message=content):
+                pass
+            walls.append(time.perf_counter() - start)
+    finally:
+        await runner.close()
+    return walls
+
+
+def _stats(values: Sequence[float]) -> Dict[str, float]:
+    ordered = sorted(values)
+    n = len(ordered)
+    return {
+        'count': n,
+        'total_ms': round(sum(ordered), 3),
+        'mean_ms': round(sum(ordered) / n, 3),
+        'p50_ms': round(ordered[(n - 1) // 2], 3),
+        'max_ms': round(ordered[-1], 3),
+    }
+
+
+def hop_report(spans: Sequence[Dict[str, Any]], walls: Sequence[float]) -> Dict[str, Any]:
+    """
+    Summarize HopTimer spans
+
+    Returns:
+        {'messages', 'wall': stats of per-message wall time, 'hops': {hop: stats},
+         'agents': {agent: turn stats}, 'llm': {agent: stats}, 'tools': {tool: stats},
+         'serialization': {source: stats + total bytes}}
+    """
+    def grouped(hop: str, label: str) -> Dict[str, Dict[str, float]]:
+        groups: Dict[str, List[float]] = {}
+        for span in spans:
+            if span['hop'] == hop or (hop == 'turn' and span['hop'].endswith('_turn')):
+                groups.setdefault(span.get(label, '?'), []).append(span['ms'])
+        return {key: _stats(values) for key, values in sorted(groups.items())}
+
+    serialization = grouped('serialization', 'source')
+    for source, stats in serialization.items():
+        stats['bytes'] = sum(s.get('bytes', 0) for s in spans
+                             if s['hop'] == 'serialization' and s.get('source') == source)
+    return {
+        'messages': len(walls),
+        'wall': _stats([w * 1000 for w in walls]) if walls else None,
+        'hops': {hop: _stats([s['ms'] for s in spans if s['hop'] == hop])
+                 for hop in HOPS if any(s['hop'] == hop for s in spans)},
+        'agents': grouped('turn', 'agent'),
+        'llm': grouped('llm_call', 'agent'),
+        'tools': grouped('tool_call', 'tool'),
+        'serialization': serialization,
+    }
+
+
+def _default_root() -> BaseAgent:
+    from .agent import root_agent
+    return root_agent
+
+
+async def record(messages: Sequence[str], fixture_path: str, root: Optional[BaseAgent] = None,
+                 trace_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Run `messages` against the live model, MCP server and backend and save a fixture
+
+    Args:
+        messages: User messages, sent in order in one session
+        fixture_path: Where to write the fixture JSON
+        root: Agent to run (default: agent.root_agent)
+        trace_path: Also append tracing spans to this JSON-lines file
+
+    Returns:
+        hop_report of the live run
+    """
+    from . import resource_snapshot
+
+    root = root or _default_root()
+    timer, recorder = HopTimer(root), Recorder()
+    recorder.attach_http(resource_snapshot.get_http_client(), resource_snapshot.API_BASE_URL)
+    plugins: List[BasePlugin] = [timer, recorder]
+    provider = build_tracer_provider(trace_path) if trace_path else None
+    if provider is not None:
+        plugins.append(TracingPlugin(root, provider))
+    try:
+        walls = await _converse(root, messages, plugins)
+    finally:
+        if provider is not None:
+            provider.shutdown()
+
+    mcp: Dict[str, Dict[str, Any]] = {}
+    for _, _, toolset in _mcp_toolsets(root, resolve=False):
+        pool = toolset.pool
+        if pool.name not in mcp:
+            tools = await pool.list_tools()
+            mcp[pool.name] = {
+                'tools': [t.model_dump(mode='json', by_alias=True, exclude_none=True) for t in tools],
+                'calls': recorder.mcp_calls.get(pool.name, []),
+            }
+    if mcp:
+        from .mcp_pool import close_mcp_pools
+        await close_mcp_pools()
+
+    fixture = {
+        'version': FIXTURE_VERSION,
+        'recorded_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'root_agent': root.name,
+        'messages': list(messages),
+        'llm': recorder.llm,
+        'mcp': mcp,
+        'http': recorder.http,
+    }
+    with open(fixture_path, 'w', encoding='utf-8') as f:
+        json.dump(fixture, f, indent=2)
+    logger.info("Recorded %d LLM responses, %d MCP calls and %d backend responses to %s",
+                sum(map(len, recorder.llm.values())), sum(len(p['calls']) for p in mcp.values()),
+                len(recorder.http), fixture_path)
+    return hop_report(timer.spans, walls)
+
+
+async def replay(fixture_path: str, repeat: int = 1, latency: str = 'zero', warmup: int = 0,
+                 root: Optional[BaseAgent] = None, trace_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Replay a recorded conversation with no network access
+
+    LLM calls are answered from the fixture, every MCP toolset is swapped
+    for a stub MCP server (replay_stubs; erroring if the fixture never
+    recorded that pool) and the backend URL points at a stub
+    backend on 127.0.0.1, for the duration of the call.
+
+    Args:
+        fixture_path: Fixture written by record()
+        repeat: Times to replay the conversation (each in a fresh session)
+        latency: 'zero' (orchestration cost only) or 'recorded' (live service latencies)
+        warmup: Untimed replays first (model loading, MCP stub start-up)
+        root: Agent to run (default: agent.root_agent)
+        trace_path: Append tracing spans of the measured repeats to this
+            JSON-lines file (token counts come from the recorded responses)
+
+    Returns:
+        hop_report over all repeats, plus 'runs' (wall ms per repeat),
+        'llm_exhausted' and 'llm_unused' (non-empty means the replay
+        diverged from the recording), 'stub_backend' (requests, unmatched
+        paths) and 'stub_mcp' (pools missing from the fixture, and MCP calls
+        with no recorded match). The CLI exits 1 when llm_exhausted,
+        llm_unused or stub_mcp misses are non-empty
+    """
+    from . import resource_snapshot
+    from .mcp_pool import PooledMCPToolset, get_mcp_pool
+    from . import replay_stubs
+
+    fixture = load_fixture(fixture_path)
+    if fixture.get('version') != FIXTURE_VERSION:
+        raise ValueError(f"Unsupported fixture version {fixture.get('version')!r}")
+    root = root or _default_root()
+
+    backend = StubBackend(fixture.get('http', {}), latency)
+    original_url = resource_snapshot.API_BASE_URL
+    resource_snapshot.API_BASE_URL = backend.start()
+    # A client created for this loop before the swap would still point at the live backend
+    resource_snapshot._clients.pop(asyncio.get_running_loop(), None)
+
+    # Every MCP toolset is swapped, recorded or not, so no live server is ever started;
+    # a pool the conversation never used during recording gets a stub whose calls fail
+    recorded_pools = fixture.get('mcp', {})
+    misses_fd, misses_path = tempfile.mkstemp(prefix='replay_mcp_misses_', suffix='.jsonl')
+    os.close(misses_fd)
+    swapped, unrecorded = [], set()
+    for agent, index, toolset in _mcp_toolsets(root, resolve=True):
+        name = toolset.pool.name
+        if name not in recorded_pools and name not in unrecorded:
+            logger.warning("Fixture has no recording for MCP pool %s; its tool calls will return errors", name)
+            unrecorded.add(name)
+        stub_pool = get_mcp_pool(
+            f'{name}_replay', command=sys.executable,
+            args=[replay_stubs.__file__, 'mcp', os.path.abspath(fixture_path), name, '--latency', latency,
+                  '--misses', misses_path],
+            size=toolset.pool.size)
+        original = agent.tools[index]
+        agent.tools[index] = LazyToolset(lambda pool=stub_pool: PooledMCPToolset(pool), name=original.name)
+        swapped.append((agent, index, original))
+
+    spans: List[Dict[str, Any]] = []
+    walls: List[float] = []
+    runs, exhausted, unused = [], [], {}
+    provider = build_tracer_provider(trace_path) if trace_path else None
+    try:
+        for run in range(max(0, warmup) + max(1, repeat)):
+            timer = HopTimer(root)
+            # The tracer must see each LLM call before LlmReplay answers it
+            tracer = TracingPlugin(root, provider) if provider is not None and run >= warmup else None
+            llm = LlmReplay(fixture['llm'], timer, latency, tracer)
+            plugins: List[BasePlugin] = [timer] + ([tracer] if tracer else []) + [llm]
+            run_walls = await _converse(root, fixture['messages'], plugins)
+            if run < warmup:
+                continue
+            spans.extend(timer.spans)
+            walls.extend(run_walls)
+            runs.append(round(sum(run_walls) * 1000, 3))
+            exhausted.extend(llm.exhausted)
+            for agent_name, count in llm.unused().items():
+                unused[agent_name] = unused.get(agent_name, 0) + count
+    finally:
+        for agent, index, original in swapped:
+            agent.tools[index] = original
+        if swapped:
+            from .mcp_pool import close_mcp_pools
+            await close_mcp_pools()
+        backend.stop()
+        if provider is not None:
+            provider.shutdown()
+        resource_snapshot.API_BASE_URL = original_url
+        resource_snapshot._clients.pop(asyncio.get_running_loop(), None)
+        mcp_misses = _read_misses(misses_path)
+        os.remove(misses_path)
+
+    report = hop_report(spans, walls)
+    report.update({
+        'runs_ms': runs,
+        'latency': latency,
+        'llm_exhausted': sorted(set(exhausted)),
+        'llm_unused': unused,
+        'stub_backend': {'requests': backend.requests, 'misses': sorted(set(backend.misses))},
+        'stub_mcp': {'unrecorded_pools': sorted(unrecorded), 'misses': mcp_misses},
+    })
+    return report
+
+
+def _read_misses(path: str) -> List[Dict[str, Any]]:
+    """MCP calls the stub servers could not match, as appended by replay_stubs."""
+    try:
+        with open(path, encoding='utf-8') as f:
+            return [json.loads(line) for line in f if line.strip()]
+    except OSError:
+        return []
+
+
+def _print_report(report: Dict[str, Any]) -> None:
+    print(f"{'hop':<40}{'count':>7}{'total ms':>12}{'mean ms':>11}{'p50 ms':>11}{'max ms':>11}")
+
+    def row(label: str, s: Dict[str, float]) -> None:
+        print(f"{label:<40}{s['count']:>7}{s['total_ms']:>12.1f}{s['mean_ms']:>11.2f}"
+              f"{s['p50_ms']:>11.2f}{s['max_ms']:>11.2f}")
+
+    if report['wall']:
+        row('message (wall)', report['wall'])
+    for hop, stats in report['hops'].items():
+        row(hop, stats)
+    for section in ('agents', 'llm', 'tools', 'serialization'):
+        for name, stats in report[section].items():
+            row(f'  {section}:{name}', stats)
+    if report.get('llm_exhausted') or report.get('llm_unused'):
+        print(f"\n✗ Replay diverged from the recording: exhausted={report['llm_exhausted']} "
+              f"unused={report['llm_unused']}")
+    mcp_misses = report.get('stub_mcp', {}).get('misses')
+    if mcp_misses:
+        calls = sorted({f"{m['pool']}.{m['tool']}" for m in mcp_misses})
+        print(f"\n✗ {len(mcp_misses)} MCP calls had no recorded match: {calls}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Record and replay agent conversations for latency profiling")
+    commands = parser.add_subparsers(dest='command', required=True)
+    rec = commands.add_parser('record', help="Run against live services and save a fixture")
+    rec.add_argument('fixture')
+    rec.add_argument('messages', nargs='+')
+    rep = commands.add_parser('replay', help="Replay a fixture offline")
+    rep.add_argument('fixture')
+    rep.add_argument('--repeat', type=int, default=1)
+    rep.add_argument('--warmup', type=int, default=0, help="Untimed replays before the measured ones")
+    rep.add_argument('--latency', choices=LATENCY_MODES, default='zero',
+                     help="'recorded' makes the LLM and stubs wait as long as the live services did")
+    for sub in (rec, rep):
+        sub.add_argument('--report', help="Also write the hop report to this JSON file")
+        sub.add_argument('--trace', help="Append tracing spans to this JSON-lines file (see tracing.py)")
+    args = parser.parse_args(argv)
+
+    if args.command == 'record':
+        report = asyncio.run(record(args.messages, args.fixture, trace_path=args.trace))
+    else:
+        report = asyncio.run(replay(args.fixture, repeat=args.repeat, latency=args.latency, warmup=args.warmup,
+                                    trace_path=args.trace))
+    _print_report(report)
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    diverged = report.get('llm_exhausted') or report.get('llm_unused') or report.get('stub_mcp', {}).get('misses')
+    return 1 if diverged else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,213 @@
+"""
+Offline stand-ins for the procurement MCP server and the Express backend
+
+Both answer from a replay fixture (see replay.py), so a recorded
+conversation can be replayed without node, the backend or any network:
+
+    cd Multi-Agent
+    python -m multi_tool_agent.replay_stubs mcp fixture.json procurement   # stdio MCP server
+    python -m multi_tool_agent.replay_stubs http fixture.json --port 3999  # HTTP backend
+
+replay.py starts both itself; the CLI is for poking at a fixture by hand.
+"""
+import argparse
+import asyncio
+import inspect
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+LATENCY_MODES = ('zero', 'recorded')
+
+
+def load_fixture(path: str) -> Dict[str, Any]:
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _args_key(tool: str, args: Dict[str, Any]) -> str:
+    return json.dumps([tool, args], sort_keys=True, separators=(',', ':'))
+
+
+class RecordedToolCalls:
+    """
+    Recorded MCP tool results, looked up by tool name and arguments
+
+    Calls with identical arguments are answered in recorded order (the last
+    one repeats once they run out). Arguments never seen for a tool get its
+    first recorded result, so a replay that drifts slightly still completes;
+    every such miss is kept in `misses` and, with `misses_path`, appended to
+    that JSON-lines file so replay() can report it as divergence.
+    """
+
+    def __init__(self, calls: List[Dict[str, Any]], pool: str = '', misses_path: Optional[str] = None):
+        self._exact: Dict[str, List[Dict[str, Any]]] = {}
+        self._by_tool: Dict[str, List[Dict[str, Any]]] = {}
+        for call in calls:
+            self._exact.setdefault(_args_key(call['tool'], call['args']), []).append(call)
+            self._by_tool.setdefault(call['tool'], []).append(call)
+        self.pool = pool
+        self.misses_path = misses_path
+        self.misses: List[Dict[str, Any]] = []
+
+    def match(self, tool: str, args: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        queue = self._exact.get(_args_key(tool, args))
+        if queue:
+            return queue.pop(0) if len(queue) > 1 else queue[0]
+        recorded = self._by_tool.get(tool)
+        miss = {'pool': self.pool, 'tool': tool, 'args': args, 'answered': recorded is not None}
+        self.misses.append(miss)
+        if self.misses_path:
+            # One line per write; the pool's stub processes share the file
+            with open(self.misses_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(miss, sort_keys=True, default=str) + '\n')
+        return recorded[0] if recorded else None
+
+
+async def serve_mcp(fixture_path: str, pool: str, latency: str = 'zero',
+                    misses_path: Optional[str] = None) -> None:
+    """
+    Run a stdio MCP server exposing pool `pool`'s recorded tools and results
+
+    A pool the fixture has no recording for is served with no tools, and
+    every call to it returns an error (and counts as a miss).
+    """
+    from mcp import types
+    from mcp.server.lowlevel import Server
+    from mcp.server.stdio import stdio_server
+
+    recorded = load_fixture(fixture_path).get('mcp', {}).get(pool)
+    unrecorded = recorded is None
+    if unrecorded:
+        recorded = {'tools': [], 'calls': []}
+    tools = [types.Tool.model_validate(t) for t in recorded['tools']]
+    calls = RecordedToolCalls(recorded['calls'], pool, misses_path)
+
+    async def call_tool(name: str, arguments: Optional[Dict[str, Any]]) -> Any:
+        call = calls.match(name, arguments or {})
+        if call is None:
+            text = (f"Fixture has no recording for MCP pool {pool}" if unrecorded
+                    else f"No recorded result for {name}")
+            return types.CallToolResult(content=[types.TextContent(type='text', text=text)], isError=True)
+        if latency == 'recorded':
+            await asyncio.sleep(call.get('latency_ms', 0) / 1000)
+        return types.CallToolResult.model_validate(call['result'])
+
+    if 'on_call_tool' in inspect.signature(Server.__init__).parameters:
+        async def on_list_tools(ctx, params):
+            return types.ListToolsResult(tools=tools)
+
+        async def on_call_tool(ctx, params):
+            return await call_tool(params.name, params.arguments)
+
+        server = Server(f'{pool}-replay', on_list_tools=on_list_tools, on_call_tool=on_call_tool)
+    else:  # mcp < 2: decorator registration
+        server = Server(f'{pool}-replay')
+
+        @server.list_tools()
+        async def list_tools():
+            return tools
+
+        @server.call_tool()
+        async def handle_call_tool(name, arguments):
+            return await call_tool(name, arguments)
+
+    async with stdio_server() as (read, write):
+        await server.run(read, write, server.create_initialization_options())
+
+
+class StubBackend:
+    """
+    Express backend stand-in serving recorded GET responses on 127.0.0.1
+
+    Args:
+        responses: {path: {'status', 'body', 'latency_ms'}} as recorded,
+            paths relative to the API base URL (e.g. '/resources/inventory')
+        latency: 'zero', or 'recorded' to sleep each response's recorded latency
+        port: 0 picks a free port
+    """
+
+    def __init__(self, responses: Dict[str, Dict[str, Any]], latency: str = 'zero', port: int = 0):
+        self.responses = responses
+        self.latency = latency
+        self.requests = 0
+        self.misses: List[str] = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.split('?', 1)[0]
+                stub.requests += 1
+                recorded = stub.responses.get(path)
+                if recorded is None:
+                    stub.misses.append(path)
+                    status, body = 404, {'success': False, 'error': f"No recorded response for {path}"}
+                else:
+                    if stub.latency == 'recorded':
+                        time.sleep(recorded.get('latency_ms', 0) / 1000)
+                    status, body = recorded['status'], recorded['body']
+                payload = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self) -> str:
+        """Serve in a daemon thread; returns the base URL."""
+        self._thread = threading.Thread(target=self._server.serve_forever, name='stub-backend', daemon=True)
+        self._thread.start()
+        return self.url
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Serve a replay fixture's MCP tools or HTTP responses")
+    parser.add_argument('kind', choices=('mcp', 'http'))
+    parser.add_argument('fixture')
+    parser.add_argument('pool', nargs='?', help="MCP pool name recorded in the fixture (mcp only)")
+    parser.add_argument('--latency', choices=LATENCY_MODES, default='zero')
+    parser.add_argument('--port', type=int, default=3999, help="HTTP port (http only)")
+    parser.add_argument('--misses', help="Append MCP calls with no recorded match to this JSON-lines file")
+    args = parser.parse_args(argv)
+
+    if args.kind == 'mcp':
+        pools = list(load_fixture(args.fixture).get('mcp', {}))
+        pool = args.pool or (pools[0] if len(pools) == 1 else None)
+        if pool is None:
+            parser.error(f"pool must be one of {pools}")
+        if pool not in pools:
+            print(f"Fixture has no recording for MCP pool {pool}; every call will fail "
+                  f"(recorded pools: {pools})", file=sys.stderr)
+        asyncio.run(serve_mcp(args.fixture, pool, args.latency, args.misses))
+        return 0
+
+    backend = StubBackend(load_fixture(args.fixture).get('http', {}), args.latency, args.port)
+    print(f"Serving {len(backend.responses)} recorded responses on {backend.url}", file=sys.stderr)
+    try:
+        backend._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
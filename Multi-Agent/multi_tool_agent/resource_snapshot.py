@@ -0,0 +1,187 @@
+import asyncio
+import os
+import time
+import weakref
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from .metrics import metrics
+
+# Express backend (backend/server.js)
+API_BASE_URL = os.environ.get('HOSPITAL_API_URL', 'http://localhost:3000/api')
+REQUEST_TIMEOUT = float(os.environ.get('HOSPITAL_API_TIMEOUT', '5'))
+
+SNAPSHOT_SECTIONS = {
+    'inventory': '/resources/inventory',
+    'beds': '/resources/capacity',
+    'staffing': '/resources/staffing',
+    'suppliers': '/procurement/suppliers',
+}
+
+# Requested "items" that are bed counts, answered by the capacity section
+BED_ITEMS = {f'{ward}_beds': ward for ward in ('general', 'icu', 'emergency', 'isolation')}
+
+SNAPSHOT_SECONDS = 'resource_snapshot_seconds'
+metrics.describe(SNAPSHOT_SECONDS, 'Latency of resource snapshot backend fetches')
+
+# One pooled client per event loop (httpx connection pools are loop-bound)
+_clients: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]' = weakref.WeakKeyDictionary()
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the keep-alive client for the running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = _clients[loop] = httpx.AsyncClient(
+            base_url=API_BASE_URL,
+            timeout=REQUEST_TIMEOUT,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+        )
+    return client
+
+
+def _key(name: str) -> str:
+    """'Oxygen Cylinders' / 'oxygen-cylinders' -> 'oxygen_cylinders'"""
+    return '_'.join(name.lower().replace('-', ' ').split())
+
+
+async def _fetch(client: httpx.AsyncClient, section: str) -> Any:
+    with metrics.timer(SNAPSHOT_SECONDS, section=section):
+        response = await client.get(SNAPSHOT_SECTIONS[section])
+    try:
+        body = response.json()
+    except ValueError:
+        body = {}
+    if response.status_code >= 400 or not body.get('success', True):
+        message = body.get('error') or body.get('message') or response.reason_phrase
+        raise RuntimeError(f"HTTP {response.status_code}: {message}")
+    return body.get('data', [])
+
+
+def _compact_inventory(rows: List[Dict[str, Any]], wanted: Optional[set]) -> Dict[str, Any]:
+    items = {}
+    for row in rows:
+        key = _key(row['item_name'])
+        if wanted and key not in wanted:
+            continue
+        items[key] = {
+            'stock': row.get('current_stock', 0),
+            'reorder_level': row.get('reorder_level'),
+            'unit': row.get('unit'),
+            'status': row.get('status') or ('low' if row.get('current_stock', 0) < row.get('reorder_level', 0) else 'normal'),
+        }
+    return {
+        'items': items,
+        'low_stock': sorted(k for k, v in items.items() if v['status'] == 'low'),
+        'missing': sorted(wanted - items.keys() - BED_ITEMS.keys()) if wanted else [],
+    }
+
+
+def _compact_beds(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    by_ward: Dict[str, Dict[str, int]] = {}
+    for row in rows:
+        ward = by_ward.setdefault(row['ward_type'], {'total': 0, 'occupied': 0, 'available': 0, 'reserved': 0})
+        ward['total'] += row.get('total_beds', 0)
+        ward['occupied'] += row.get('occupied_beds', 0)
+        ward['available'] += row.get('available_beds', 0)
+        ward['reserved'] += row.get('reserved_beds', 0)
+    for ward in by_ward.values():
+        ward['occupancy_pct'] = round(ward['occupied'] / ward['total'] * 100) if ward['total'] else 0
+    return {
+        'by_ward': by_ward,
+        'total_available': sum(w['available'] for w in by_ward.values()),
+    }
+
+
+def _compact_staffing(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    by_type: Dict[str, Dict[str, int]] = {}
+    for row in rows:
+        staff = by_type.setdefault(row['staff_type'], {'current': 0, 'available': 0, 'on_shift': 0, 'on_leave': 0})
+        staff['current'] += row.get('current_count', 0)
+        staff['available'] += row.get('available_count', 0)
+        staff['on_shift'] += row.get('on_shift_count', 0)
+        staff['on_leave'] += row.get('on_leave_count', 0)
+    return {'by_type': by_type}
+
+
+def _compact_suppliers(rows: List[Dict[str, Any]], wanted: Optional[set]) -> Dict[str, Any]:
+    by_item: Dict[str, List[Dict[str, Any]]] = {}
+    for row in rows:
+        supplier = {
+            'id': row.get('supplier_id'),
+            'name': row.get('name'),
+            'rating': row.get('rating'),
+            'lead_days': row.get('avg_delivery_days'),
+        }
+        for item in row.get('items_supplied') or []:
+            key = _key(item)
+            if wanted and key not in wanted:
+                continue
+            by_item.setdefault(key, []).append(supplier)
+    for suppliers in by_item.values():
+        # Fastest delivery first, then best rated
+        suppliers.sort(key=lambda s: (s['lead_days'] if s['lead_days'] is not None else float('inf'),
+                                      -(s['rating'] or 0)))
+    return {
+        'by_item': by_item,
+        'no_supplier': sorted(wanted - by_item.keys()) if wanted else [],
+    }
+
+
+async def get_resource_snapshot(items: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Current inventory, bed capacity, staffing and suppliers in one call.
+
+    Fetches the four backend endpoints concurrently over a pooled HTTP client.
+    Use this instead of checking inventory and suppliers item by item.
+
+    Args:
+        items: Inventory items to report, e.g. ['oxygen_cylinders', 'ventilators'].
+            Names are matched case-insensitively with spaces treated as underscores.
+            Omit for every item.
+
+    Returns:
+        dict: {
+            'inventory': {'items': {item: {stock, reorder_level, unit, status}}, 'low_stock', 'missing'}
+                (bed items such as 'icu_beds' are answered by 'beds'),
+            'beds': {'by_ward': {ward: {total, occupied, available, reserved, occupancy_pct}}, 'total_available'},
+            'staffing': {'by_type': {staff_type: {current, available, on_shift, on_leave}}},
+            'suppliers': {'by_item': {item: [{id, name, rating, lead_days}, ...]}, 'no_supplier'},
+            'errors': {section: message} for any endpoint that failed (other sections are still returned),
+            'fetched_at', 'latency_ms'
+        }
+
+    Example:
+        get_resource_snapshot(['oxygen_cylinders', 'icu_beds', 'ventilators'])
+    """
+    start = time.perf_counter()
+    wanted = {_key(item) for item in items} if items else None
+    client = get_http_client()
+
+    sections = list(SNAPSHOT_SECTIONS)
+    results = await asyncio.gather(*(_fetch(client, s) for s in sections), return_exceptions=True)
+    raw = dict(zip(sections, results))
+
+    snapshot: Dict[str, Any] = {}
+    errors: Dict[str, str] = {}
+    compactors = {
+        'inventory': lambda rows: _compact_inventory(rows, wanted),
+        'beds': _compact_beds,
+        'staffing': _compact_staffing,
+        'suppliers': lambda rows: _compact_suppliers(rows, wanted),
+    }
+    for section in sections:
+        if isinstance(raw[section], Exception):
+            errors[section] = str(raw[section]) or type(raw[section]).__name__
+            snapshot[section] = None
+            continue
+        snapshot[section] = compactors[section](raw[section])
+
+    snapshot['errors'] = errors
+    snapshot['fetched_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    snapshot['latency_ms'] = round((time.perf_counter() - start) * 1000, 1)
+    metrics.inc('resource_snapshot_requests_total', outcome='partial' if errors else 'ok')
+    return snapshot
@@ -0,0 +1,131 @@
+"""
+Verbosity tiers and encodings for prediction tool output
+
+Everything a tool returns is fed back into the LLM's context, so agents ask
+for the smallest tier that answers the question:
+
+    minimal   predicted_admissions, surge_alert, surge_threshold,
+              difference_from_baseline (+ surge_probability / cascade stage)
+    summary   minimal + baseline_average, confidence and the top 3 factors
+              each way as {feature, impact, reason}
+    standard  everything except all_shap_values and input_features;
+              model_info reduced to model_version
+    full      the complete output (the default, unchanged)
+
+full is serialized as before (indent=2); the smaller tiers use compact
+separators. Programmatic callers can use to_msgpack instead of JSON
+(needs the optional msgpack package).
+"""
+import json
+import re
+from typing import Any, Dict, Optional
+
+DETAIL_LEVELS = ('minimal', 'summary', 'standard', 'full')
+SUMMARY_FACTORS = 3
+
+_MINIMAL_KEYS = ('predicted_admissions', 'surge_alert', 'surge_threshold', 'difference_from_baseline',
+                 'surge_probability')
+_SUMMARY_KEYS = _MINIMAL_KEYS + ('baseline_average', 'confidence')
+_FACTOR_KEYS = ('top_positive_factors', 'top_negative_factors')
+_COMPACT = (',', ':')
+
+# Line breaks with their indentation, words, single digits and single
+# punctuation marks: a rough stand-in for Gemini's SentencePiece tokenizer,
+# which splits numbers digit by digit
+_TOKEN_PATTERN = re.compile(r"\n *|[A-Za-z]+|\d|[^\sA-Za-z\d]")
+
+
+def _check_detail(detail: str) -> str:
+    if detail not in DETAIL_LEVELS:
+        raise ValueError(f"detail must be one of {', '.join(DETAIL_LEVELS)}, got {detail!r}")
+    return detail
+
+
+def shape_output(output: Dict[str, Any], detail: str = 'full') -> Dict[str, Any]:
+    """
+    Reduce a prediction output dict to a verbosity tier
+
+    Args:
+        output: predict_from_features / predict_cascade output (not modified)
+        detail: One of DETAIL_LEVELS
+
+    Returns:
+        A new dict for the smaller tiers, `output` itself for 'full'. Error
+        outputs (with an 'error' key) are returned unchanged at every tier.
+    """
+    _check_detail(detail)
+    if detail == 'full' or 'error' in output:
+        return output
+
+    if detail == 'standard':
+        shaped = {k: v for k, v in output.items()
+                  if k not in ('all_shap_values', 'input_features', 'model_info')}
+        if 'model_info' in output:
+            shaped['model_info'] = {'model_version': output['model_info'].get('model_version')}
+        return shaped
+
+    keys = _MINIMAL_KEYS if detail == 'minimal' else _SUMMARY_KEYS
+    shaped = {k: output[k] for k in keys if k in output}
+    if 'cascade' in output:
+        shaped['cascade_stage'] = output['cascade'].get('stage')
+    if detail == 'summary':
+        for key in _FACTOR_KEYS:
+            shaped[key] = [{'feature': f['feature'], 'impact': f['impact'], 'reason': f['reason']}
+                           for f in output.get(key, [])[:SUMMARY_FACTORS]]
+    return shaped
+
+
+def to_json(output: Dict[str, Any], detail: str = 'full') -> str:
+    """Serialize `output` at a tier: indent=2 for 'full', compact separators otherwise."""
+    shaped = shape_output(output, detail)
+    if detail == 'full':
+        return json.dumps(shaped, indent=2)
+    return json.dumps(shaped, separators=_COMPACT)
+
+
+def to_msgpack(output: Dict[str, Any], detail: str = 'full') -> bytes:
+    """
+    MessagePack encoding of `output` at a tier, for programmatic callers
+
+    Raises:
+        ImportError: msgpack is not installed (pip install msgpack)
+    """
+    import msgpack
+    return msgpack.packb(shape_output(output, detail), use_bin_type=True)
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate LLM token count of `text` (see _TOKEN_PATTERN)."""
+    return len(_TOKEN_PATTERN.findall(text))
+
+
+def payload_report(output: Dict[str, Any]) -> Dict[str, Dict[str, Optional[int]]]:
+    """
+    Payload size of one output at every tier
+
+    Returns:
+        {tier: {'json_bytes', 'tokens', 'msgpack_bytes'}}; msgpack_bytes is
+        None when msgpack is not installed. 'full_indent' is the pre-tier
+        default (full tier, indent=2) the others are compared against.
+    """
+    try:
+        import msgpack  # noqa: F401
+        has_msgpack = True
+    except ImportError:
+        has_msgpack = False
+
+    report = {}
+    for detail in DETAIL_LEVELS:
+        text = to_json(output, detail) if detail != 'full' else json.dumps(output, separators=_COMPACT)
+        report[detail] = {
+            'json_bytes': len(text.encode('utf-8')),
+            'tokens': estimate_tokens(text),
+            'msgpack_bytes': len(to_msgpack(output, detail)) if has_msgpack else None,
+        }
+    full_indent = to_json(output, 'full')
+    report['full_indent'] = {
+        'json_bytes': len(full_indent.encode('utf-8')),
+        'tokens': estimate_tokens(full_indent),
+        'msgpack_bytes': report['full']['msgpack_bytes'],
+    }
+    return report
@@ -0,0 +1,245 @@
+import logging
+import re
+import threading
+from dataclasses import dataclass
+from typing import AsyncGenerator, Dict, List, Optional, Pattern, Tuple
+
+from google.adk.agents import BaseAgent, LlmAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event
+
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Longer messages are usually multi-part requests; leave those to the coordinator
+MAX_ROUTABLE_WORDS = 30
+
+metrics.describe('intent_router_requests_total', 'User messages seen by the intent router, by intent')
+metrics.describe('intent_router_llm_calls_saved_total', 'Coordinator LLM round trips skipped by local routing')
+metrics.describe('intent_router_llm_calls_added_total',
+                 'LLM round trips wasted by local routing (a routed agent transferred the message on)')
+
+
+@dataclass(frozen=True)
+class Intent:
+    """
+    One of the coordinator's fixed query types
+
+    Attributes:
+        name: Intent label
+        patterns: Regexes (matched case-insensitively) that identify the intent
+        targets: Agents to run, in order, instead of the coordinator
+        llm_calls_saved: Coordinator LLM round trips the direct dispatch replaces
+            (one routing/transfer decision per delegated agent)
+    """
+    name: str
+    patterns: Tuple[Pattern, ...]
+    targets: Tuple[str, ...]
+    llm_calls_saved: int
+
+
+def _patterns(*regexes: str) -> Tuple[Pattern, ...]:
+    return tuple(re.compile(r, re.IGNORECASE) for r in regexes)
+
+
+# The five query types from the coordinator's instruction, plus its multi-step scenario
+INTENTS: List[Intent] = [
+    Intent('status_check', _patterns(
+        r'\b(hospital|current|resource|inventory|stock|bed|icu)\s+(status|levels?|situation)\b',
+        r'\bcheck\s+(on\s+)?(the\s+|our\s+)?(current\s+|available\s+)?(\w+\s+)?(status|inventory|stock|beds?|capacity)\b',
+        r'\bhow many\b.*\b(beds?|cylinders?|ventilators?|nurses|doctors|staff)\s+(are|is|do we (currently )?have|have we got|remain)\b',
+        r'\bhow many\b.*\b(available|free|left|in stock|on hand)\b',
+        r'\b(current|available)\s+(inventory|stock|beds?|capacity|staff(ing)?)\b',
+    ), ('procurement_agent',), 1),
+    Intent('surge_prediction', _patterns(
+        r'\b(predict|forecast|project|estimate)\w*\b.*\b(surge|patients?|admissions?|demand)\b',
+        r'\b(expected|upcoming)\s+(surge|patients?|admissions?)\b',
+    ), ('predictive_agent', 'procurement_agent'), 2),
+    Intent('order_management', _patterns(
+        r'\b(create|place|raise|draft|make)\b.*\b(purchase order|order|po)\b',
+        r'\border\s+\d+\b.*\b(cylinders?|ventilators?|beds?|units?)\b',
+    ), ('procurement_agent',), 1),
+    Intent('historical_analysis', _patterns(
+        r'\b(historical|history|past years?|last year)\b',
+        r'\b(disease|seasonal|festival|monthly)\s+(patterns?|trends?)\b',
+        r'\bshow\b.*\b(patterns?|trends?)\b',
+    ), ('predictive_agent',), 1),
+    # Multi-step scenario: forecast and status fan out in parallel (surge_workflow.py)
+    Intent('surge_preparation', _patterns(
+        r'\b(prepare|get ready|plan)\b.*\b(surge|festival|season)\b',
+    ), ('surge_preparation_workflow',), 3),
+    Intent('approval_workflow', _patterns(
+        r'\bpending\s+(purchase\s+)?(orders?|approvals?)\b',
+        r'\b(approve|reject)\b.*\bPO-?\d+\b',
+        r'\b(status of|track)\b.*\bPO-?\d+\b',
+    ), ('procurement_agent',), 1),
+]
+
+
+# Phrases that rule an intent out even when one of its patterns matches. A
+# status lookup answers "what do we have now"; questions about what will be
+# needed (future tense, need/should, upcoming festivals) are demand questions
+# for the predictive agent, so they fall back to the coordinator.
+EXCLUSIONS: Dict[str, Tuple[Pattern, ...]] = {
+    'status_check': _patterns(
+        r"\b(will|won'?t|going to|gonna|should|need(s|ed)?|require[ds]?|enough|last through)\b",
+        r'\b(next|upcoming|coming|tomorrow|forecast\w*|predict\w*|expected)\b',
+        r'\b(festivals?|holidays?|season|diwali|holi|eid|dussehra|navratri|christmas|new year|pongal|onam|ganesh)\b',
+    ),
+}
+
+
+@dataclass(frozen=True)
+class RouteDecision:
+    intent: str
+    targets: Tuple[str, ...]
+    llm_calls_saved: int
+
+
+def classify(message: str, intents: Optional[List[Intent]] = None,
+             exclusions: Optional[Dict[str, Tuple[Pattern, ...]]] = None) -> Optional[RouteDecision]:
+    """
+    Match a user message against the fixed query types
+
+    Returns:
+        The route if exactly one intent matches, None when unsure (no match,
+        several intents match, a matched intent's EXCLUSIONS phrase appears,
+        or the message is too long to be a simple query)
+    """
+    text = ' '.join((message or '').split())
+    if not text or len(text.split()) > MAX_ROUTABLE_WORDS:
+        return None
+    matched = [intent for intent in (intents or INTENTS)
+               if any(p.search(text) for p in intent.patterns)]
+    if len(matched) != 1:
+        return None
+    intent = matched[0]
+    excluded = (EXCLUSIONS if exclusions is None else exclusions).get(intent.name, ())
+    if any(p.search(text) for p in excluded):
+        return None
+    return RouteDecision(intent.name, intent.targets, intent.llm_calls_saved)
+
+
+class _RouterStats:
+    def __init__(self):
+        self.by_intent: Dict[str, int] = {}
+        self.llm_calls_saved = 0
+        self.llm_calls_added = 0
+        self._lock = threading.Lock()
+
+    def record(self, decision: Optional[RouteDecision], label: str = 'fallback') -> None:
+        intent = decision.intent if decision else label
+        saved = decision.llm_calls_saved if decision else 0
+        with self._lock:
+            self.by_intent[intent] = self.by_intent.get(intent, 0) + 1
+            self.llm_calls_saved += saved
+        metrics.inc('intent_router_requests_total', intent=intent)
+        if saved:
+            metrics.inc('intent_router_llm_calls_saved_total', saved)
+
+    def record_added(self, added: int) -> None:
+        with self._lock:
+            self.llm_calls_added += added
+        metrics.inc('intent_router_llm_calls_added_total', added)
+
+
+_stats = _RouterStats()
+
+
+def router_stats() -> Dict[str, object]:
+    """
+    Messages per intent (plus 'resumed' and 'fallback') and coordinator LLM round trips saved
+
+    llm_calls_saved is net of llm_calls_added, the round trips a routed agent
+    spent only to transfer the message elsewhere.
+    """
+    total = sum(_stats.by_intent.values())
+    unrouted = _stats.by_intent.get('fallback', 0) + _stats.by_intent.get('resumed', 0)
+    return {
+        'messages': total,
+        'routed': total - unrouted,
+        'resumed': _stats.by_intent.get('resumed', 0),
+        'fallback': _stats.by_intent.get('fallback', 0),
+        'by_intent': dict(_stats.by_intent),
+        'llm_calls_saved': _stats.llm_calls_saved - _stats.llm_calls_added,
+        'llm_calls_added': _stats.llm_calls_added,
+    }
+
+
+def _user_text(ctx: InvocationContext) -> str:
+    content = ctx.user_content
+    if content is None or not content.parts:
+        return ''
+    return ' '.join(part.text for part in content.parts if part.text)
+
+
+class IntentRouterAgent(BaseAgent):
+    """
+    Root agent that dispatches obvious intents without the coordinator's LLM hop
+
+    A follow-up message goes back to the sub-agent that replied last, as ADK's
+    runner does when the coordinator is the root (the router itself is not an
+    LLM agent, so the runner would otherwise always start here). Otherwise,
+    messages matching exactly one of the fixed query types go straight to the
+    target agent(s), and everything else goes to `coordinator`, so behaviour
+    for anything unrecognised is unchanged.
+    """
+
+    coordinator: BaseAgent
+
+    def _resumable_agent(self, ctx: InvocationContext) -> Optional[BaseAgent]:
+        """
+        The sub-agent that replied last, if it can transfer back up to the coordinator
+
+        Mirrors the runner's own choice of agent for a continuing session;
+        None when the coordinator (or nobody) replied last.
+        """
+        for event in reversed(ctx.session.events):
+            if event.author == 'user' or event.actions.agent_state is not None or event.actions.end_of_agent:
+                continue
+            if event.author in (self.name, self.coordinator.name):
+                return None
+            agent = self.coordinator.find_sub_agent(event.author)
+            if agent is not None and self._transferable(agent):
+                return agent
+        return None
+
+    def _transferable(self, agent: BaseAgent) -> bool:
+        while agent is not None and agent is not self.coordinator:
+            if not isinstance(agent, LlmAgent) or agent.disallow_transfer_to_parent:
+                return False
+            agent = agent.parent_agent
+        return agent is self.coordinator
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        resumed = self._resumable_agent(ctx)
+        if resumed is not None:
+            _stats.record(None, label='resumed')
+            async for event in resumed.run_async(ctx):
+                yield event
+            return
+
+        decision = classify(_user_text(ctx))
+        targets = [self.find_agent(name) for name in decision.targets] if decision else []
+        if decision and not all(targets):
+            logger.warning("Route %s names unknown agents %s", decision.intent, decision.targets)
+            decision = None
+        _stats.record(decision)
+
+        if decision is None:
+            async for event in self.coordinator.run_async(ctx):
+                yield event
+            return
+
+        logger.info("Routing %s directly to %s", decision.intent, ', '.join(decision.targets))
+        target_names = set(decision.targets)
+        transfers = 0
+        for agent in targets:
+            async for event in agent.run_async(ctx):
+                # A routed agent handing the message on means its LLM call was a wasted hop
+                if event.actions.transfer_to_agent and event.author in target_names:
+                    transfers += 1
+                yield event
+        if transfers:
+            _stats.record_added(transfers)
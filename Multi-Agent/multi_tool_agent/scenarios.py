@@ -0,0 +1,491 @@
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .compiled_trees import get_predictor
+from .features import FEATURE_COLS, REQUIRED_FEATURES, engineer_array
+from .metrics import metrics
+from .model_registry import get_registry
+
+logger = logging.getLogger(__name__)
+
+# Inputs a scenario may vary; every other feature comes from the base row
+SCENARIO_AXES = ('temperature', 'air_quality', 'temp_change_1d', 'aqi_change_1d', 'month', 'day_of_week')
+
+# Valid range per axis (samples are clipped, integer axes rounded)
+AXIS_LIMITS = {
+    'temperature': (-10.0, 50.0),
+    'air_quality': (0.0, 500.0),
+    'temp_change_1d': (-25.0, 25.0),
+    'aqi_change_1d': (-300.0, 300.0),
+    'month': (1, 12),
+    'day_of_week': (0, 6),
+}
+INTEGER_AXES = {'month', 'day_of_week'}
+
+MAX_SCENARIOS = int(os.environ.get('SCENARIO_MAX_ROWS', '1000000'))
+# Scenarios explained with SHAP at most (sampled, surge scenarios first)
+EXPLAIN_ROWS = 2000
+# Monte Carlo bins per surface axis
+SURFACE_BINS = 10
+
+metrics.describe('scenario_sweep_seconds', 'Latency of scenario sweeps by stage')
+metrics.describe('scenario_rows_total', 'Scenarios scored by the scenario engine')
+
+_COL = {name: i for i, name in enumerate(REQUIRED_FEATURES)}
+
+
+def default_base() -> Dict[str, float]:
+    """Training-set mean of every raw input (from feature_scaler.pkl), used for unspecified features."""
+    scaler = get_registry().get('scaler')
+    means = dict(zip(FEATURE_COLS, np.asarray(scaler.mean_, dtype=np.float64).tolist()))
+    base = {name: means[name] for name in REQUIRED_FEATURES}
+    for name in INTEGER_AXES | {'is_weekend'}:
+        base[name] = int(round(base[name]))
+    return base
+
+
+def _base_row(base_features: Optional[Dict[str, float]]) -> Tuple[np.ndarray, List[str]]:
+    given = dict(base_features or {})
+    unknown = sorted(set(given) - set(REQUIRED_FEATURES))
+    if unknown:
+        raise ValueError(f"Unknown features: {unknown}")
+    defaults = [name for name in REQUIRED_FEATURES if name not in given]
+    if defaults:
+        given = {**default_base(), **given}
+    return np.array([given[name] for name in REQUIRED_FEATURES], dtype=np.float64), defaults
+
+
+def _check_axes(names) -> None:
+    unknown = [name for name in names if name not in SCENARIO_AXES]
+    if unknown:
+        raise ValueError(f"Cannot vary {unknown}; scenario axes are {list(SCENARIO_AXES)}")
+
+
+def _clip(name: str, values: np.ndarray) -> np.ndarray:
+    low, high = AXIS_LIMITS[name]
+    values = np.clip(values, low, high)
+    return np.rint(values) if name in INTEGER_AXES else values
+
+
+def _finish_rows(rows: np.ndarray) -> np.ndarray:
+    # is_weekend follows day_of_week whenever the day is varied
+    rows[:, _COL['is_weekend']] = (rows[:, _COL['day_of_week']] >= 5).astype(np.float64)
+    return rows
+
+
+def expand_grid(base: np.ndarray, grid: Dict[str, Sequence[float]]) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """
+    Cartesian product of the grid axes over a base row
+
+    Returns:
+        (rows in REQUIRED_FEATURES order, shape (prod(len(axis)), 13),
+         {axis: values}) with rows in C order over the axes as given
+    """
+    _check_axes(grid)
+    axes = {name: np.unique(_clip(name, np.asarray(values, dtype=np.float64))) for name, values in grid.items()}
+    size = int(np.prod([len(v) for v in axes.values()])) if axes else 1
+    if size > MAX_SCENARIOS:
+        raise ValueError(f"Grid has {size:,} scenarios (limit {MAX_SCENARIOS:,})")
+
+    rows = np.repeat(base[None, :], size, axis=0)
+    if axes:
+        mesh = np.meshgrid(*axes.values(), indexing='ij')
+        for name, values in zip(axes, mesh):
+            rows[:, _COL[name]] = values.ravel()
+    return _finish_rows(rows), axes
+
+
+def sample_monte_carlo(base: np.ndarray, distributions: Dict[str, Any], n_samples: int,
+                       seed: int = 0) -> np.ndarray:
+    """
+    Random scenarios around a base row
+
+    Each axis spec is one of:
+        [low, high]                      uniform
+        {'mean': m, 'std': s}            normal
+        {'choices': [...], 'p': [...]}   discrete (p optional)
+        a number                         fixed
+
+    Values are clipped to AXIS_LIMITS; month and day_of_week are rounded.
+    """
+    _check_axes(distributions)
+    if not 0 < n_samples <= MAX_SCENARIOS:
+        raise ValueError(f"n_samples must be between 1 and {MAX_SCENARIOS:,}")
+    rng = np.random.default_rng(seed)
+    rows = np.repeat(base[None, :], n_samples, axis=0)
+    for name, spec in distributions.items():
+        if isinstance(spec, (int, float)):
+            values = np.full(n_samples, float(spec))
+        elif isinstance(spec, dict) and 'choices' in spec:
+            values = rng.choice(np.asarray(spec['choices'], dtype=np.float64), n_samples, p=spec.get('p'))
+        elif isinstance(spec, dict) and 'mean' in spec:
+            values = rng.normal(float(spec['mean']), float(spec.get('std', 0.0)), n_samples)
+        elif isinstance(spec, (list, tuple)) and len(spec) == 2:
+            values = rng.uniform(float(spec[0]), float(spec[1]), n_samples)
+        else:
+            raise ValueError(f"Bad distribution for {name}: {spec!r}")
+        rows[:, _COL[name]] = _clip(name, values)
+    return _finish_rows(rows)
+
+
+def score_scenarios(rows: np.ndarray, surge_threshold: float = 184) -> Dict[str, np.ndarray]:
+    """
+    Predicted admissions and calibrated surge probability for every scenario
+
+    One vectorized call per model for the whole sweep.
+    """
+    from .cascade import get_calibration
+
+    registry = get_registry()
+    X = engineer_array(rows)
+    with metrics.timer('scenario_sweep_seconds', stage='regressor'):
+        admissions = np.asarray(get_predictor(registry.entry('surge_model'), len(X)).predict(X), dtype=np.float64)
+    with metrics.timer('scenario_sweep_seconds', stage='classifier'):
+        raw = get_predictor(registry.entry('classifier'), len(X)).predict_proba(X)[:, 1]
+        probability = get_calibration(surge_threshold).apply(raw)
+    return {'X': X, 'admissions': admissions, 'probability': probability,
+            'surge': admissions > surge_threshold}
+
+
+def _crossing_regions(x_values: np.ndarray, y_values: np.ndarray, mask: np.ndarray) -> List[Dict[str, Any]]:
+    """Per x value, the contiguous y ranges of crossing cells."""
+    regions = []
+    for i, x in enumerate(x_values.tolist()):
+        runs, start = [], None
+        for j, crossed in enumerate(mask[i].tolist() + [False]):
+            if crossed and start is None:
+                start = j
+            elif not crossed and start is not None:
+                runs.append([_num(y_values[start]), _num(y_values[j - 1])])
+                start = None
+        if runs:
+            regions.append({'x': _num(x), 'y_ranges': runs})
+    return regions
+
+
+def _num(value: float) -> float:
+    value = float(value)
+    return int(value) if value.is_integer() else round(value, 2)
+
+
+# Per-scenario score -> per-cell statistic in surfaces
+_CELL_STATS = (('surge_share', 'surge', 3), ('surge_probability', 'probability', 3),
+               ('mean_admissions', 'admissions', 1))
+
+
+def _surface(x_name: str, y_name: str, x_values: np.ndarray, y_values: np.ndarray,
+             cells: Dict[str, np.ndarray], counts: Optional[np.ndarray],
+             crossing_share: float) -> Dict[str, Any]:
+    crossing = cells['surge_share'] >= crossing_share
+    surface = {'x_axis': x_name, 'y_axis': y_name,
+               'x': [_num(v) for v in x_values], 'y': [_num(v) for v in y_values]}
+    # Rows follow x, columns follow y
+    for stat, _, digits in _CELL_STATS:
+        surface[stat] = np.round(cells[stat], digits).tolist()
+    if counts is not None:
+        surface['scenarios_per_cell'] = counts.tolist()
+    surface['crossing_share'] = crossing_share
+    surface['crossing_cells'] = round(float(crossing.mean()), 4) if crossing.size else 0.0
+    surface['crossing_regions'] = _crossing_regions(x_values, y_values, crossing)
+    return surface
+
+
+def grid_surface(scores: Dict[str, np.ndarray], axes: Dict[str, np.ndarray], x_name: str, y_name: str,
+                 crossing_share: float = 0.5) -> Dict[str, Any]:
+    """Surge share/probability over two grid axes, averaged over the other axes."""
+    shape = tuple(len(v) for v in axes.values())
+    names = list(axes)
+    others = tuple(i for i, name in enumerate(names) if name not in (x_name, y_name))
+
+    def reduce(values: np.ndarray) -> np.ndarray:
+        cube = values.astype(np.float64).reshape(shape)
+        cube = cube.mean(axis=others) if others else cube
+        return cube if names.index(x_name) < names.index(y_name) else cube.T
+
+    cells = {stat: reduce(scores[key]) for stat, key, _ in _CELL_STATS}
+    return _surface(x_name, y_name, axes[x_name], axes[y_name], cells, None, crossing_share)
+
+
+def _bin_axis(rows: np.ndarray, name: str, bins: int) -> Tuple[np.ndarray, np.ndarray]:
+    """(bin centers, bin index per row); axes with few distinct values keep them as-is."""
+    values = rows[:, _COL[name]]
+    distinct = np.unique(values)
+    if name in INTEGER_AXES or len(distinct) <= bins:
+        return distinct, np.searchsorted(distinct, values)
+    edges = np.linspace(values.min(), values.max(), bins + 1)
+    index = np.clip(np.searchsorted(edges, values, side='right') - 1, 0, bins - 1)
+    return (edges[:-1] + edges[1:]) / 2, index
+
+
+def _cell_means(cell: np.ndarray, size: int, scores: Dict[str, np.ndarray]) -> Tuple[Dict[str, np.ndarray], np.ndarray]:
+    counts = np.bincount(cell, minlength=size)
+    cells = {}
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for stat, key, _ in _CELL_STATS:
+            # Empty cells have no estimate
+            cells[stat] = np.nan_to_num(np.bincount(cell, scores[key].astype(np.float64), size) / counts, nan=0.0)
+    return cells, counts
+
+
+def binned_surface(rows: np.ndarray, scores: Dict[str, np.ndarray], x_name: str, y_name: str,
+                   crossing_share: float = 0.5, bins: int = SURFACE_BINS) -> Dict[str, Any]:
+    """Surge share/probability over two varied axes, binned (Monte Carlo sweeps)."""
+    x_values, x_index = _bin_axis(rows, x_name, bins)
+    y_values, y_index = _bin_axis(rows, y_name, bins)
+    shape = (len(x_values), len(y_values))
+    cells, counts = _cell_means(x_index * shape[1] + y_index, shape[0] * shape[1], scores)
+    cells = {stat: values.reshape(shape) for stat, values in cells.items()}
+    return _surface(x_name, y_name, x_values, y_values, cells, counts.reshape(shape), crossing_share)
+
+
+def axis_profile(rows: np.ndarray, scores: Dict[str, np.ndarray], name: str,
+                 crossing_share: float = 0.5, bins: int = SURFACE_BINS) -> Dict[str, Any]:
+    """Surge share/probability along a single varied axis."""
+    values, index = _bin_axis(rows, name, bins)
+    cells, counts = _cell_means(index, len(values), scores)
+    crossing = cells['surge_share'] >= crossing_share
+    regions = _crossing_regions(np.array([0.0]), values, crossing[None, :])
+    profile = {'x_axis': name, 'x': [_num(v) for v in values]}
+    for stat, _, digits in _CELL_STATS:
+        profile[stat] = np.round(cells[stat], digits).tolist()
+    profile['scenarios_per_cell'] = counts.tolist()
+    profile['crossing_share'] = crossing_share
+    profile['crossing_cells'] = round(float(crossing.mean()), 4)
+    profile['crossing_ranges'] = regions[0]['y_ranges'] if regions else []
+    return profile
+
+
+def _explain_chunk(X: np.ndarray) -> np.ndarray:
+    """SHAP values for a block of engineered rows (runs in pool workers)."""
+    import pandas as pd
+    from .explain import compute_shap_values
+
+    entry = get_registry().entry('surge_model')
+    return compute_shap_values(entry, pd.DataFrame(X, columns=FEATURE_COLS))
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            # spawn: forking a process that runs event loops and HTTP clients is unsafe
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+            _pool_workers = workers
+        return _pool
+
+
+def shutdown_scenario_pool() -> None:
+    """Stop the SHAP worker processes (started on the first explain with workers > 1)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True)
+            _pool = None
+
+
+def explain_scenarios(scores: Dict[str, np.ndarray], max_rows: int = EXPLAIN_ROWS, workers: int = 1,
+                      top_k: int = 5, seed: int = 0) -> Dict[str, Any]:
+    """
+    SHAP drivers across a sweep
+
+    Explains up to `max_rows` scenarios (surge scenarios first, the rest
+    sampled), split into blocks across `workers` processes when workers > 1.
+
+    Returns:
+        {'rows_explained', 'workers', 'top_drivers': [{feature, mean_abs_impact,
+         mean_impact_surge, mean_impact_no_surge}]}
+    """
+    rng = np.random.default_rng(seed)
+    surge_idx = np.flatnonzero(scores['surge'])
+    other_idx = np.flatnonzero(~scores['surge'])
+    take_surge = rng.permutation(surge_idx)[:max_rows // 2 if len(other_idx) else max_rows]
+    take_other = rng.permutation(other_idx)[:max_rows - len(take_surge)]
+    chosen = np.concatenate([take_surge, take_other])
+    X = scores['X'][chosen]
+
+    if workers > 1 and len(X) > 1:
+        blocks = np.array_split(X, min(workers, len(X)))
+        shap_values = np.concatenate(list(_get_pool(workers).map(_explain_chunk, blocks)))
+    else:
+        shap_values = _explain_chunk(X)
+
+    is_surge = scores['surge'][chosen]
+    mean_abs = np.abs(shap_values).mean(axis=0)
+    order = np.argsort(-mean_abs, kind='stable')[:top_k]
+
+    def mean_where(mask: np.ndarray, i: int) -> Optional[float]:
+        return round(float(shap_values[mask, i].mean()), 2) if mask.any() else None
+
+    return {
+        'rows_explained': int(len(X)),
+        'workers': int(workers),
+        'top_drivers': [
+            {
+                'feature': FEATURE_COLS[i],
+                'mean_abs_impact': round(float(mean_abs[i]), 2),
+                'mean_impact_surge': mean_where(is_surge, i),
+                'mean_impact_no_surge': mean_where(~is_surge, i),
+            }
+            for i in order
+        ],
+    }
+
+
+def _error(message: str, return_json: bool):
+    output = {'error': message}
+    return json.dumps(output) if return_json else output
+
+
+def run_scenarios(base_features: Optional[Dict[str, float]] = None,
+                  grid: Optional[Dict[str, List[float]]] = None,
+                  monte_carlo: Optional[Dict[str, Any]] = None,
+                  n_samples: int = 10000,
+                  surface_axes: Optional[List[str]] = None,
+                  surge_threshold: float = 184,
+                  crossing_share: float = 0.5,
+                  explain: bool = False,
+                  explain_workers: int = 1,
+                  seed: int = 0,
+                  return_json: bool = False):
+    """
+    What-if sweep: score many weather/calendar scenarios at once
+
+    Answers questions like "what if AQI hits 300 during Diwali week with a 10°C
+    drop?" in one call. Varies temperature, air_quality, temp_change_1d,
+    aqi_change_1d, month and day_of_week over a grid or Monte Carlo samples,
+    scores every scenario with vectorized model calls and returns surge
+    surfaces and the regions where predicted admissions cross the threshold.
+
+    Args:
+        base_features (dict): Values for everything not varied (admissions_lag1,
+            admissions_rolling7, er_admissions, ...). Missing features use
+            training-set averages and are listed in 'defaults_used'.
+        grid (dict): Axis -> list of values; every combination is scored,
+            e.g. {'air_quality': [200, 250, 300, 350], 'temp_change_1d': [-10, -5, 0]}
+        monte_carlo (dict): Axis -> distribution, sampled n_samples times:
+            [low, high] uniform, {'mean': m, 'std': s} normal,
+            {'choices': [...]} discrete, or a fixed number
+        n_samples (int): Monte Carlo scenarios (up to 1,000,000)
+        surface_axes (list): One or two axes for the probability surface
+            (default: the first two varied axes)
+        surge_threshold (float): Admission level considered a surge
+        crossing_share (float): Share of a cell's scenarios whose predicted
+            admissions exceed surge_threshold for the cell to count as crossing
+        explain (bool): Add SHAP drivers for a sample of scenarios
+        explain_workers (int): Processes to spread SHAP over (1 = in process)
+        seed (int): Random seed for Monte Carlo sampling
+        return_json (bool): Return JSON string vs dict
+
+    Returns:
+        dict with scenarios, surge_share (share with predicted admissions above
+        surge_threshold), mean_surge_probability (calibrated surge classifier),
+        admissions percentiles, worst_case scenario, surface (x/y values;
+        surge_share, surge_probability and mean_admissions per cell;
+        crossing_regions), defaults_used, timings and, with explain=True, drivers;
+        {'error': ...} if the arguments are invalid (the message names the bad one)
+
+    Example:
+        # Diwali week: AQI 200-400, temperature drop 0-10°C, every weekday
+        run_scenarios({'month': 11, 'admissions_lag1': 165, 'admissions_rolling7': 160},
+                      grid={'air_quality': [200, 250, 300, 350, 400],
+                            'temp_change_1d': [-10, -7.5, -5, -2.5, 0],
+                            'day_of_week': [0, 1, 2, 3, 4, 5, 6]})
+    """
+    if (grid is None) == (monte_carlo is None):
+        return _error("Pass exactly one of grid or monte_carlo", return_json)
+    start = time.perf_counter()
+    timings: Dict[str, float] = {}
+
+    # ===== STEP 1: EXPAND SCENARIOS =====
+    try:
+        base, defaults = _base_row(base_features)
+        if grid is not None:
+            rows, axes = expand_grid(base, grid)
+            varied = [name for name, values in axes.items() if len(values) > 1]
+        else:
+            rows = sample_monte_carlo(base, monte_carlo, int(n_samples), seed)
+            axes = None
+            varied = [name for name in monte_carlo if len(np.unique(rows[:, _COL[name]])) > 1]
+        surface_axes = list(surface_axes or varied[:2])
+        _check_axes(surface_axes)
+        if len(surface_axes) > 2 or len(set(surface_axes)) != len(surface_axes):
+            raise ValueError(f"surface_axes takes one or two different axes, got {surface_axes}")
+    except (TypeError, ValueError) as e:
+        logger.warning("Scenario sweep rejected: %s", e)
+        return _error(str(e), return_json)
+    timings['expand_ms'] = (time.perf_counter() - start) * 1000
+
+    # ===== STEP 2: SCORE (one vectorized call per model) =====
+    score_start = time.perf_counter()
+    scores = score_scenarios(rows, surge_threshold)
+    timings['score_ms'] = (time.perf_counter() - score_start) * 1000
+
+    # ===== STEP 3: SURFACE AND CROSSING REGIONS =====
+    surface_start = time.perf_counter()
+    surface = None
+    if len(surface_axes) == 1:
+        surface = axis_profile(rows, scores, surface_axes[0], crossing_share)
+    elif len(surface_axes) == 2:
+        x_name, y_name = surface_axes
+        if axes is not None and x_name in axes and y_name in axes:
+            surface = grid_surface(scores, axes, x_name, y_name, crossing_share)
+        else:
+            surface = binned_surface(rows, scores, x_name, y_name, crossing_share)
+    timings['surface_ms'] = (time.perf_counter() - surface_start) * 1000
+
+    admissions = scores['admissions']
+    worst = int(np.argmax(admissions))
+    output: Dict[str, Any] = {
+        'mode': 'grid' if grid is not None else 'monte_carlo',
+        'scenarios': int(len(rows)),
+        'varied_axes': varied,
+        'surge_threshold': float(surge_threshold),
+        'surge_share': round(float(scores['surge'].mean()), 4),
+        'mean_surge_probability': round(float(scores['probability'].mean()), 4),
+        'admissions_percentiles': {
+            f'p{q}': round(float(v), 1) for q, v in zip((5, 50, 95), np.percentile(admissions, [5, 50, 95]))
+        },
+        'worst_case': {
+            'predicted_admissions': round(float(admissions[worst]), 1),
+            'surge_probability': round(float(scores['probability'][worst]), 3),
+            'scenario': {name: _num(rows[worst, _COL[name]]) for name in varied},
+        },
+        'surface': surface,
+        'defaults_used': defaults,
+    }
+
+    # ===== STEP 4: OPTIONAL SHAP DRIVERS =====
+    if explain:
+        explain_start = time.perf_counter()
+        try:
+            output['drivers'] = explain_scenarios(scores, workers=max(1, int(explain_workers)), seed=seed)
+        except ImportError:
+            logger.warning("shap is not installed; scenario sweep returned without drivers")
+            output['drivers'] = None
+        timings['explain_ms'] = (time.perf_counter() - explain_start) * 1000
+
+    elapsed = time.perf_counter() - start
+    timings['total_ms'] = elapsed * 1000
+    output['timings'] = {k: round(v, 1) for k, v in timings.items()}
+    output['scenarios_per_sec'] = round(len(rows) / elapsed) if elapsed > 0 else None
+    metrics.observe('scenario_sweep_seconds', elapsed, stage='total')
+    metrics.inc('scenario_rows_total', float(len(rows)))
+
+    if return_json:
+        return json.dumps(output, indent=2)
+    return output
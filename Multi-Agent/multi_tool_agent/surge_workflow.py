@@ -0,0 +1,126 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Any, AsyncGenerator, Dict, List
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.genai import types
+
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+STATUS_ITEMS = ['oxygen_cylinders', 'icu_beds', 'ventilators']
+
+BRANCH_SECONDS = 'surge_workflow_branch_seconds'
+metrics.describe(BRANCH_SECONDS, 'Latency of each surge preparation workflow branch')
+
+_DONE = object()
+
+
+class SurgePreparationAgent(BaseAgent):
+    """
+    "Prepare for <festival> surge" as a fan-out / join workflow
+
+    The forecast (`predictive`) and the procurement status snapshot don't
+    depend on each other, so they run concurrently; `procurement` then
+    calculates and drafts orders with both results in the session history.
+    Per-branch timings are written to session state under
+    'surge_workflow:timings' and to the surge_workflow_branch_seconds histogram.
+    """
+
+    predictive: BaseAgent
+    procurement: BaseAgent
+    status_items: List[str] = STATUS_ITEMS
+
+    async def _status_event(self, ctx: InvocationContext) -> Event:
+        from .resource_snapshot import get_resource_snapshot
+
+        try:
+            snapshot = await get_resource_snapshot(self.status_items)
+            text = "Procurement status snapshot: " + json.dumps(snapshot, separators=(',', ':'))
+        except Exception as e:
+            logger.warning("Status snapshot failed: %s", e)
+            snapshot = None
+            text = f"Procurement status snapshot unavailable ({e}); check inventory with your tools."
+        return Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            content=types.Content(role='model', parts=[types.Part(text=text)]),
+            actions=EventActions(state_delta={'surge_workflow:snapshot': snapshot}),
+        )
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        timings: Dict[str, float] = {}
+        start = time.perf_counter()
+        # Each branch hands over one event at a time and waits until the runner
+        # has taken it, so agents still see their own events in the session
+        # before their next step (as they would when run sequentially)
+        handoff: asyncio.Queue = asyncio.Queue()
+
+        async def emit(item: Any) -> None:
+            ack = asyncio.get_running_loop().create_future()
+            await handoff.put((item, ack))
+            await ack
+
+        async def forecast_branch() -> None:
+            branch_start = time.perf_counter()
+            try:
+                async for event in self.predictive.run_async(ctx):
+                    await emit(event)
+            finally:
+                timings['forecast'] = time.perf_counter() - branch_start
+                await emit(_DONE)
+
+        async def status_branch() -> None:
+            branch_start = time.perf_counter()
+            try:
+                event = await self._status_event(ctx)
+                timings['status'] = time.perf_counter() - branch_start
+                await emit(event)
+            finally:
+                timings.setdefault('status', time.perf_counter() - branch_start)
+                await emit(_DONE)
+
+        # ===== STEP 1: FAN OUT =====
+        tasks = [asyncio.create_task(forecast_branch()), asyncio.create_task(status_branch())]
+        try:
+            running = len(tasks)
+            while running:
+                item, ack = await handoff.get()
+                if item is _DONE:
+                    running -= 1
+                else:
+                    yield item
+                ack.set_result(None)
+            # Surface a branch failure once both have finished
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+        timings['fan_out'] = time.perf_counter() - start
+
+        # ===== STEP 2: JOIN - ORDER CALCULATION =====
+        orders_start = time.perf_counter()
+        async for event in self.procurement.run_async(ctx):
+            yield event
+        timings['orders'] = time.perf_counter() - orders_start
+        timings['total'] = time.perf_counter() - start
+
+        for branch, seconds in timings.items():
+            metrics.observe(BRANCH_SECONDS, seconds, branch=branch)
+        summary: Dict[str, Any] = {f'{k}_ms': round(v * 1000, 1) for k, v in timings.items()}
+        summary['critical_path'] = max(('forecast', 'status'), key=lambda b: timings[b]) + ' -> orders'
+        summary['overlap_saved_ms'] = round((timings['forecast'] + timings['status'] - timings['fan_out']) * 1000, 1)
+        logger.info("Surge preparation timings: %s", summary)
+
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            actions=EventActions(state_delta={'surge_workflow:timings': summary}),
+        )
@@ -0,0 +1,508 @@
+"""
+End-to-end tracing of agent conversations
+
+TracingPlugin emits one OpenTelemetry span per hop: every agent turn (router,
+coordinator, sub-agent, nested under the agent that transferred to it),
+LLM call and tool call (Python function, MCP or transfer_to_agent). Spans
+carry timing, prompt/response token counts and payload sizes, and go to a
+JSON-lines file, an OTLP/HTTP collector, or both:
+
+    cd Multi-Agent
+    AGENT_TRACE_FILE=traces.jsonl adk web
+    AGENT_TRACE_OTLP_ENDPOINT=http://localhost:4318/v1/traces adk web
+    python -m multi_tool_agent.replay replay diwali.json --trace traces.jsonl
+
+    # Slowest hops across every session in the files
+    python -m multi_tool_agent.tracing summary traces.jsonl --top 15
+
+The OTLP exporter needs opentelemetry-exporter-otlp-proto-http. Tracing is
+off unless one of the variables is set (or the plugin is passed to a
+runner), and the plugin uses its own tracer provider, so ADK's built-in
+spans are not duplicated into these exports.
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import sys
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from google.adk.agents import BaseAgent, LlmAgent
+from google.adk.plugins.base_plugin import BasePlugin
+from opentelemetry import trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import ReadableSpan, TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, SpanExporter, SpanExportResult
+from opentelemetry.trace import Span, Status, StatusCode
+
+from .response_format import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# JSON-lines span file (appended to)
+TRACE_FILE = os.environ.get('AGENT_TRACE_FILE')
+# OTLP/HTTP traces endpoint, e.g. http://localhost:4318/v1/traces
+TRACE_OTLP_ENDPOINT = os.environ.get('AGENT_TRACE_OTLP_ENDPOINT')
+
+SERVICE_NAME = 'multi_tool_agent'
+RANKINGS = ('self', 'total', 'p95')
+
+
+def tracing_enabled() -> bool:
+    return bool(TRACE_FILE or TRACE_OTLP_ENDPOINT)
+
+
+class JsonlSpanExporter(SpanExporter):
+    """Appends each finished span to `path` as one JSON object per line."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        lines = [json.dumps(span_record(span), default=str) for span in spans]
+        try:
+            with self._lock, open(self.path, 'a', encoding='utf-8') as f:
+                f.write('\n'.join(lines) + '\n')
+        except OSError as e:
+            logger.warning("Could not write %d spans to %s: %s", len(lines), self.path, e)
+            return SpanExportResult.FAILURE
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self) -> None:
+        pass
+
+
+def span_record(span: ReadableSpan) -> Dict[str, Any]:
+    """Flat dict of a finished span, as written by JsonlSpanExporter."""
+    context = span.get_span_context()
+    return {
+        'trace_id': format(context.trace_id, '032x'),
+        'span_id': format(context.span_id, '016x'),
+        'parent_id': format(span.parent.span_id, '016x') if span.parent else None,
+        'name': span.name,
+        'start_ns': span.start_time,
+        'duration_ms': round((span.end_time - span.start_time) / 1e6, 3),
+        'status': span.status.status_code.name,
+        'attributes': dict(span.attributes or {}),
+    }
+
+
+def build_tracer_provider(trace_file: Optional[str] = None,
+                          otlp_endpoint: Optional[str] = None) -> TracerProvider:
+    """
+    Tracer provider exporting to a JSON-lines file and/or an OTLP/HTTP collector
+
+    Raises:
+        ImportError: otlp_endpoint given without opentelemetry-exporter-otlp-proto-http
+    """
+    provider = TracerProvider(resource=Resource.create({'service.name': SERVICE_NAME}))
+    if trace_file:
+        provider.add_span_processor(BatchSpanProcessor(JsonlSpanExporter(trace_file)))
+    if otlp_endpoint:
+        try:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        except ImportError as e:
+            raise ImportError("OTLP export needs opentelemetry-exporter-otlp-proto-http "
+                              f"(pip install opentelemetry-exporter-otlp-proto-http): {e}")
+        provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter(endpoint=otlp_endpoint)))
+    return provider
+
+
+def _size(encode) -> Optional[int]:
+    try:
+        return len(encode().encode('utf-8'))
+    except Exception:
+        return None
+
+
+def _tool_kind(tool) -> str:
+    if tool.name == 'transfer_to_agent':
+        return 'transfer'
+    if getattr(tool, 'pool', None) is not None:
+        return 'mcp'
+    return 'agent' if type(tool).__name__ == 'AgentTool' else 'function'
+
+
+def walk_agents(root: BaseAgent) -> List[BaseAgent]:
+    """root and every agent under it, including custom agents' agent fields."""
+    seen, stack, agents = set(), [root], []
+    while stack:
+        agent = stack.pop()
+        if id(agent) in seen:
+            continue
+        seen.add(id(agent))
+        agents.append(agent)
+        stack.extend(agent.sub_agents)
+        stack.extend(v for v in agent.__dict__.values() if isinstance(v, BaseAgent))
+    return agents
+
+
+class TracingPlugin(BasePlugin):
+    """
+    Runner plugin emitting a span per agent turn, LLM call and tool call
+
+    Every user message (ADK invocation) is one trace rooted at the root
+    agent's turn. A sub-agent's turn is a child of the turn that handed
+    over to it, and LLM and tool calls are children of their agent's turn.
+
+    Args:
+        root: The runner's root agent (names the router and coordinator hops)
+        provider: Where spans go (default: built from AGENT_TRACE_FILE /
+            AGENT_TRACE_OTLP_ENDPOINT)
+    """
+
+    def __init__(self, root: BaseAgent, provider: Optional[TracerProvider] = None):
+        super().__init__(name='tracing')
+        self.root_name = root.name
+        self.coordinators = {a.name for a in walk_agents(root) if isinstance(a, LlmAgent) and a.sub_agents}
+        self.provider = provider or build_tracer_provider(TRACE_FILE, TRACE_OTLP_ENDPOINT)
+        self.tracer = self.provider.get_tracer(__name__)
+        # (invocation, kind, name) -> open spans, innermost last
+        self._open: Dict[Tuple[str, str, str], List[Span]] = {}
+        # invocation -> open agent turns in start order
+        self._turns: Dict[str, List[Tuple[str, Span]]] = {}
+
+    def _turn_hop(self, agent: BaseAgent) -> str:
+        if agent.name in self.coordinators:
+            return 'coordinator_turn'
+        return 'router_turn' if agent.name == self.root_name else 'sub_agent_turn'
+
+    def _latest_turn(self, invocation_id: str) -> Optional[Span]:
+        turns = self._turns.get(invocation_id)
+        return turns[-1][1] if turns else None
+
+    def _agent_span(self, invocation_id: str, agent_name: str) -> Optional[Span]:
+        """Open turn of `agent_name`, else the latest open turn of the invocation."""
+        spans = self._open.get((invocation_id, 'agent', agent_name))
+        return spans[-1] if spans else self._latest_turn(invocation_id)
+
+    def _start(self, key: Tuple[str, str, str], name: str, parent: Optional[Span],
+               attributes: Dict[str, Any]) -> Span:
+        context = trace.set_span_in_context(parent) if parent is not None else None
+        span = self.tracer.start_span(name, context=context,
+                                      attributes={k: v for k, v in attributes.items() if v is not None})
+        self._open.setdefault(key, []).append(span)
+        return span
+
+    def _pop(self, key: Tuple[str, str, str]) -> Optional[Span]:
+        spans = self._open.get(key)
+        if not spans:
+            return None
+        span = spans.pop()
+        if not spans:
+            del self._open[key]
+        return span
+
+    @staticmethod
+    def _finish(span: Span, attributes: Dict[str, Any], error: Optional[BaseException] = None) -> None:
+        span.set_attributes({k: v for k, v in attributes.items() if v is not None})
+        if error is not None:
+            span.record_exception(error)
+            span.set_status(Status(StatusCode.ERROR, f"{type(error).__name__}: {error}"))
+        span.end()
+
+    # ===== AGENT TURNS =====
+
+    async def before_agent_callback(self, *, agent, callback_context):
+        invocation = callback_context.invocation_id
+        parent = None
+        ancestor = agent.parent_agent
+        while ancestor is not None and parent is None:
+            spans = self._open.get((invocation, 'agent', ancestor.name))
+            parent = spans[-1] if spans else None
+            ancestor = ancestor.parent_agent
+        if parent is None:
+            # Custom agents hold some sub-agents as plain fields (no parent_agent)
+            parent = self._latest_turn(invocation)
+        hop = self._turn_hop(agent)
+        span = self._start((invocation, 'agent', agent.name), f'{hop} {agent.name}', parent, {
+            'hop': hop,
+            'agent.name': agent.name,
+            'agent.parent': parent.attributes.get('agent.name') if parent is not None else None,
+            'session.id': callback_context.session.id,
+            'invocation.id': invocation,
+        })
+        self._turns.setdefault(invocation, []).append((agent.name, span))
+
+    def _end_turn(self, agent, callback_context, error: Optional[BaseException] = None) -> None:
+        invocation = callback_context.invocation_id
+        span = self._pop((invocation, 'agent', agent.name))
+        if span is None:
+            return
+        turns = self._turns.get(invocation, [])
+        if (agent.name, span) in turns:
+            turns.remove((agent.name, span))
+        self._finish(span, {}, error)
+
+    async def after_agent_callback(self, *, agent, callback_context):
+        self._end_turn(agent, callback_context)
+
+    async def on_agent_error_callback(self, *, agent, callback_context, error):
+        self._end_turn(agent, callback_context, error)
+
+    # ===== LLM CALLS =====
+
+    async def before_model_callback(self, *, callback_context, llm_request):
+        invocation, agent = callback_context.invocation_id, callback_context.agent_name
+        try:
+            request_json = llm_request.model_dump_json(exclude_none=True)
+        except Exception:
+            request_json = None
+        self._start((invocation, 'llm', agent), f'llm_call {agent}', self._agent_span(invocation, agent), {
+            'hop': 'llm_call',
+            'agent.name': agent,
+            'llm.model': llm_request.model,
+            'llm.request_bytes': len(request_json.encode('utf-8')) if request_json is not None else None,
+            # Replaced by the model's own count when the response has usage metadata
+            'llm.prompt_tokens': estimate_tokens(request_json) if request_json is not None else None,
+            'session.id': callback_context.session.id,
+        })
+
+    def _end_llm(self, callback_context, llm_response=None, error: Optional[BaseException] = None) -> None:
+        span = self._pop((callback_context.invocation_id, 'llm', callback_context.agent_name))
+        if span is None:
+            return
+        attributes: Dict[str, Any] = {}
+        if llm_response is not None:
+            response_json = llm_response.model_dump_json(exclude_none=True)
+            attributes['llm.response_bytes'] = len(response_json.encode('utf-8'))
+            usage = llm_response.usage_metadata
+            if usage is not None and usage.prompt_token_count is not None:
+                attributes.update({
+                    'llm.prompt_tokens': usage.prompt_token_count,
+                    'llm.response_tokens': usage.candidates_token_count,
+                    'llm.cached_tokens': usage.cached_content_token_count,
+                    'llm.total_tokens': usage.total_token_count,
+                })
+            else:
+                # No usage metadata (e.g. a replayed response): keep the request
+                # estimate and estimate the response the same way
+                attributes.update({'llm.response_tokens': estimate_tokens(response_json),
+                                   'llm.tokens_estimated': True})
+        self._finish(span, attributes, error)
+
+    async def after_model_callback(self, *, callback_context, llm_response):
+        self._end_llm(callback_context, llm_response)
+
+    async def on_model_error_callback(self, *, callback_context, llm_request, error):
+        self._end_llm(callback_context, error=error)
+
+    # ===== TOOL CALLS =====
+
+    @staticmethod
+    def _tool_key(tool, tool_context) -> Tuple[str, str, str]:
+        return tool_context.invocation_id, 'tool', tool_context.function_call_id or tool.name
+
+    async def before_tool_callback(self, *, tool, tool_args, tool_context):
+        invocation, agent = tool_context.invocation_id, tool_context.agent_name
+        pool = getattr(tool, 'pool', None)
+        self._start(self._tool_key(tool, tool_context), f'tool_call {tool.name}',
+                    self._agent_span(invocation, agent), {
+                        'hop': 'tool_call',
+                        'agent.name': agent,
+                        'tool.name': tool.name,
+                        'tool.kind': _tool_kind(tool),
+                        'tool.mcp_pool': pool.name if pool is not None else None,
+                        'tool.transfer_to': tool_args.get('agent_name') if tool.name == 'transfer_to_agent' else None,
+                        'tool.args_bytes': _size(lambda: json.dumps(tool_args, default=str)),
+                        'session.id': tool_context.session.id,
+                    })
+
+    async def after_tool_callback(self, *, tool, tool_args, tool_context, result):
+        span = self._pop(self._tool_key(tool, tool_context))
+        if span is not None:
+            # The result goes back into the next LLM prompt
+            result_json = json.dumps(result, default=str)
+            self._finish(span, {'tool.result_bytes': len(result_json.encode('utf-8')),
+                                'tool.result_tokens': estimate_tokens(result_json)})
+
+    async def on_tool_error_callback(self, *, tool, tool_args, tool_context, error):
+        span = self._pop(self._tool_key(tool, tool_context))
+        if span is not None:
+            self._finish(span, {}, error)
+
+    # ===== LIFECYCLE =====
+
+    async def after_run_callback(self, *, invocation_context):
+        # Anything still open (e.g. an LLM call another plugin answered) ends with the run
+        invocation = invocation_context.invocation_id
+        for key in [k for k in self._open if k[0] == invocation]:
+            for span in reversed(self._open.pop(key)):
+                span.set_attribute('span.unfinished', True)
+                span.end()
+        self._turns.pop(invocation, None)
+
+    async def close(self) -> None:
+        self.provider.force_flush()
+
+
+def traced_app(root: BaseAgent, name: str = SERVICE_NAME):
+    """App running `root` with TracingPlugin (what adk web / adk run pick up)."""
+    from google.adk.apps import App
+
+    return App(name=name, root_agent=root, plugins=[TracingPlugin(root)])
+
+
+# ===== SUMMARY =====
+
+def load_spans(paths: Iterable[str]) -> List[Dict[str, Any]]:
+    """
+    Read JsonlSpanExporter files
+
+    Spans seen more than once (overlapping or concatenated files) are kept
+    once; unreadable lines are skipped with a warning.
+    """
+    spans: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    bad = 0
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    span = json.loads(line)
+                    spans.setdefault((span['trace_id'], span['span_id']), span)
+                except (ValueError, KeyError, TypeError):
+                    bad += 1
+    if bad:
+        logger.warning("Skipped %d malformed span lines", bad)
+    return list(spans.values())
+
+
+def _percentile(ordered: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile of an ascending sequence."""
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+def _label(span: Dict[str, Any]) -> str:
+    attributes = span.get('attributes', {})
+    return attributes.get('tool.name') or attributes.get('agent.name') or span.get('name', '?')
+
+
+def summarize_spans(spans: Sequence[Dict[str, Any]], top: int = 10, by: str = 'self') -> Dict[str, Any]:
+    """
+    Rank hops by where the time went, across every session in `spans`
+
+    Self time is a span's duration minus its direct children's, so a
+    coordinator turn is not charged for the sub-agent it waited on
+    (parallel children can push it to 0).
+
+    Args:
+        spans: span_record dicts (see load_spans)
+        top: Hops and individual spans to list
+        by: Rank hops by total 'self' time, total time or 'p95' duration
+
+    Returns:
+        {'sessions', 'traces', 'spans', 'hops': [{hop, name, count, total_ms,
+         self_ms, p50_ms, p95_ms, max_ms, mean tokens / bytes}], 'slowest': [...]}
+    """
+    if by not in RANKINGS:
+        raise ValueError(f"by must be one of {', '.join(RANKINGS)}")
+    child_ms: Dict[Tuple[str, str], float] = {}
+    for span in spans:
+        if span.get('parent_id'):
+            key = (span['trace_id'], span['parent_id'])
+            child_ms[key] = child_ms.get(key, 0.0) + span['duration_ms']
+
+    groups: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+    for span in spans:
+        span['self_ms'] = max(span['duration_ms'] - child_ms.get((span['trace_id'], span['span_id']), 0.0), 0.0)
+        hop = span.get('attributes', {}).get('hop', span.get('name', '?').split(' ')[0])
+        groups.setdefault((hop, _label(span)), []).append(span)
+
+    def mean_of(members: List[Dict[str, Any]], attribute: str) -> Optional[float]:
+        values = [m['attributes'][attribute] for m in members if m.get('attributes', {}).get(attribute) is not None]
+        return round(sum(values) / len(values), 1) if values else None
+
+    hops = []
+    for (hop, name), members in groups.items():
+        durations = sorted(m['duration_ms'] for m in members)
+        row = {
+            'hop': hop,
+            'name': name,
+            'count': len(members),
+            'total_ms': round(sum(durations), 3),
+            'self_ms': round(sum(m['self_ms'] for m in members), 3),
+            'p50_ms': round(_percentile(durations, 0.5), 3),
+            'p95_ms': round(_percentile(durations, 0.95), 3),
+            'max_ms': round(durations[-1], 3),
+            'errors': sum(1 for m in members if m.get('status') == 'ERROR'),
+        }
+        for attribute in ('llm.prompt_tokens', 'llm.response_tokens', 'llm.request_bytes',
+                          'tool.result_tokens', 'tool.result_bytes'):
+            value = mean_of(members, attribute)
+            if value is not None:
+                row['mean_' + attribute.split('.', 1)[1]] = value
+        hops.append(row)
+    hops.sort(key=lambda r: r[{'self': 'self_ms', 'total': 'total_ms', 'p95': 'p95_ms'}[by]], reverse=True)
+
+    slowest = sorted(spans, key=lambda s: s['self_ms'] if by == 'self' else s['duration_ms'], reverse=True)
+    return {
+        'sessions': len({s.get('attributes', {}).get('session.id') for s in spans} - {None}),
+        'traces': len({s['trace_id'] for s in spans}),
+        'spans': len(spans),
+        'ranked_by': by,
+        'hops': hops[:top],
+        'slowest': [
+            {
+                'name': s['name'],
+                'duration_ms': s['duration_ms'],
+                'self_ms': round(s['self_ms'], 3),
+                'trace_id': s['trace_id'],
+                'session_id': s.get('attributes', {}).get('session.id'),
+            }
+            for s in slowest[:top]
+        ],
+    }
+
+
+def _fmt(value: Optional[float]) -> str:
+    return '-' if value is None else f'{value:.0f}'
+
+
+def _print_summary(summary: Dict[str, Any]) -> None:
+    print(f"{summary['spans']} spans in {summary['traces']} traces from {summary['sessions']} sessions, "
+          f"ranked by {summary['ranked_by']} time\n")
+    print(f"{'hop':<17}{'name':<34}{'count':>6}{'self ms':>11}{'total ms':>11}{'p50 ms':>9}"
+          f"{'p95 ms':>9}{'max ms':>9}{'tok in':>8}{'tok out':>8}")
+    for r in summary['hops']:
+        tokens_out = r.get('mean_response_tokens', r.get('mean_result_tokens'))
+        print(f"{r['hop']:<17}{r['name'][:33]:<34}{r['count']:>6}{r['self_ms']:>11.1f}{r['total_ms']:>11.1f}"
+              f"{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}{r['max_ms']:>9.1f}"
+              f"{_fmt(r.get('mean_prompt_tokens')):>8}{_fmt(tokens_out):>8}")
+    print(f"\n{'slowest spans':<51}{'ms':>10}{'self ms':>10}  trace")
+    for s in summary['slowest']:
+        print(f"{s['name'][:50]:<51}{s['duration_ms']:>10.1f}{s['self_ms']:>10.1f}  {s['trace_id'][:16]}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Summarize agent trace files")
+    commands = parser.add_subparsers(dest='command', required=True)
+    summary = commands.add_parser('summary', help="Rank the slowest hops across recorded sessions")
+    summary.add_argument('files', nargs='+', help="JSON-lines span files (AGENT_TRACE_FILE / --trace)")
+    summary.add_argument('--top', type=int, default=10)
+    summary.add_argument('--by', choices=RANKINGS, default='self')
+    summary.add_argument('--json', help="Also write the summary to this file")
+    args = parser.parse_args(argv)
+
+    try:
+        spans = load_spans(args.files)
+    except OSError as e:
+        print(f"Could not read spans: {e}", file=sys.stderr)
+        return 1
+    if not spans:
+        print("No spans found", file=sys.stderr)
+        return 1
+    result = summarize_spans(spans, top=args.top, by=args.by)
+    _print_summary(result)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
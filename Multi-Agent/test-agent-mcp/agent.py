@@ -1,7 +1,6 @@
 import os
-from google.adk.tools.mcp_tool.mcp_toolset import MCPToolset
-from google.adk.tools.mcp_tool.mcp_session_manager import StdioConnectionParams, StdioServerParameters
 from google.adk.agents import Agent, LlmAgent
+from multi_tool_agent.mcp_pool import PooledMCPToolset, get_mcp_pool
 
 
 MCP_SERVER_PATH = "C:/ShubhamWorkspace/Dev/Hackathon/ArogyamAI/procurement-mcp/dist/index.js"
@@ -61,13 +60,8 @@ root_agent = LlmAgent(
 # 🟡 YELLOW: 1-3 days supply (100-300 cylinders) - Order now
 # 🔴 RED: <1 day supply (<100 cylinders) - EMERGENCY ORDER""",
     tools=[
-        MCPToolset(
-            connection_params=StdioConnectionParams(
-                server_params=StdioServerParameters(
-                    command='node',
-                    args=[os.path.abspath(MCP_SERVER_PATH)],
-                ),
-            ),
+        PooledMCPToolset(
+            get_mcp_pool('procurement-mcp', command='node', args=[os.path.abspath(MCP_SERVER_PATH)]),
         )
     ],
 )